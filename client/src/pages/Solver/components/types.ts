@@ -29,6 +29,14 @@ export interface ResultData {
   total_coke_consumption: number;
   total_gas_consumption: number;
   total_iron_production: number;
+  backend?: string | null;
+  wall_time_ms?: number | null;
+  solve_time_ms?: number | null;
+  iterations?: number | null;
+  variables?: number | null;
+  constraints?: number | null;
+  cache_hit?: boolean | null;
+  stats_token?: string;
 }
 
 export interface ModalProps {
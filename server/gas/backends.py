@@ -0,0 +1,493 @@
+import ctypes
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from gas.deadline import Deadline
+from gas.engine import BoundedSimplexEngine, LinearProgram, LPSolution
+
+# OR-Tools импортируется при первом обращении к решателю (импорт занимает сотни миллисекунд),
+# поэтому веб-процессы, отправляющие расчеты в пул решателей (gas.pool), его не загружают
+
+
+class SolverOutput:
+    """
+    Подавление вывода решателей в stdout процесса. CLP печатает служебные строки
+    ("4000 slacks added") напрямую в стандартный вывод, минуя уровень журнала OR-Tools
+    (SuppressOutput), поэтому на время решения дескриптор 1 перенаправляется в /dev/null.
+    Дескриптор общий для процесса: пока решает хотя бы один поток, вывод других потоков
+    в stdout тоже не виден (журналы пишутся в файлы и stderr).
+    """
+
+    _lock = threading.Lock()
+    _count = 0
+    _saved = None
+
+    @staticmethod
+    def _flush():
+        sys.stdout.flush()
+        try:
+            ctypes.CDLL(None).fflush(None)  # Буфер stdio библиотек решателей
+        except (OSError, AttributeError):
+            pass
+
+    @classmethod
+    @contextmanager
+    def suppressed(cls):
+        with cls._lock:
+            if cls._count == 0:
+                try:
+                    cls._flush()
+                    saved = os.dup(1)
+                except (OSError, ValueError):
+                    saved = None
+                if saved is not None:
+                    devnull = os.open(os.devnull, os.O_WRONLY)
+                    os.dup2(devnull, 1)
+                    os.close(devnull)
+                cls._saved = saved
+            cls._count += 1
+        try:
+            yield
+        finally:
+            with cls._lock:
+                cls._count -= 1
+                if cls._count == 0 and cls._saved is not None:
+                    cls._flush()
+                    os.dup2(cls._saved, 1)
+                    os.close(cls._saved)
+                    cls._saved = None
+
+
+class SolverBackend(ABC):
+    """
+    Базовый класс решателя линейной задачи. Наследник обязан реализовать solve.
+    """
+
+    name = None
+    description = None
+
+    def is_available(self) -> bool:
+        return True
+
+    def supports(self, program: LinearProgram) -> bool:
+        """Решатель подходит для задачи такого размера и вида (для режима auto)"""
+        return True
+
+    @abstractmethod
+    def solve(self, program: LinearProgram, deadline: Optional[Deadline] = None) -> LPSolution:
+        """
+        Решение задачи. deadline - срок расчета: оставшееся время передается решателю как лимит,
+        отмена прерывает решатель. При истечении срока с найденным допустимым решением
+        возвращается статус FEASIBLE.
+        """
+
+
+class SimplexEngineBackend(SolverBackend):
+    """
+    Встроенный симплекс-метод (gas.engine), без внешних решателей.
+    """
+
+    name = "simplex"
+    description = "Встроенный симплекс-метод (NumPy)"
+
+    # Базис хранится плотной обратной матрицей m x m, поэтому движок рассчитан на малое число строк.
+    # Каждая смена базиса требует полной оценки столбцов, поэтому при тысячах переменных
+    # в режиме auto выбираются решатели OR-Tools
+    MAX_ROWS = 64
+    MAX_VARIABLES = 200
+
+    def supports(self, program: LinearProgram) -> bool:
+        return program.num_rows <= self.MAX_ROWS and program.num_variables <= self.MAX_VARIABLES
+
+    def solve(self, program: LinearProgram, deadline: Optional[Deadline] = None) -> LPSolution:
+        return BoundedSimplexEngine.solve(program, stop=deadline.stopped if deadline else None)
+
+
+class ModelBuilderBackend(SolverBackend):
+    """
+    Решатель OR-Tools через ModelBuilder: модель передается целиком массивами
+    (границы, целевая функция, матрица ограничений в формате CSR).
+
+    Шаблоны моделей (как у ORToolsBackend) здесь не используются: модель заполняется одним
+    вызовом за единицы микросекунд, а ModelSolverHelper при каждом решении заново передает
+    модель решателю и состояния между решениями не хранит, поэтому переиспользовать нечего.
+    """
+
+    def __init__(self, name: str, solver_id: str, description: str):
+        self.name = name
+        self.solver_id = solver_id
+        self.description = description
+
+    def is_available(self) -> bool:
+        from ortools.linear_solver.python import model_builder_helper
+
+        return model_builder_helper.ModelSolverHelper(self.solver_id).solver_is_supported()
+
+    def build_model(self, program: LinearProgram):
+        """Заполнение модели массивами"""
+        from ortools.linear_solver.python import model_builder
+
+        model = model_builder.Model()
+        model.helper.fill_model_from_sparse_data(
+            program.lower, program.upper, program.objective,
+            program.row_lower, program.row_upper, program.rows
+        )
+        model.helper.set_maximize(program.maximize)
+        return model
+
+    def solve(self, program: LinearProgram, deadline: Optional[Deadline] = None) -> LPSolution:
+        from ortools.linear_solver.python import model_builder, model_builder_helper
+
+        model = self.build_model(program)
+        solver = model_builder_helper.ModelSolverHelper(self.solver_id)
+        if deadline is None:
+            solver.solve(model.helper)
+        else:
+            solver.set_time_limit_in_seconds(deadline.remaining())
+            with deadline.interrupt(solver.interrupt_solve):
+                solver.solve(model.helper)
+
+        status = model_builder.SolveStatus(solver.status()).name
+        if status != "OPTIMAL" and not (status == "FEASIBLE" and solver.has_solution()):
+            return LPSolution(status)
+
+        return LPSolution(
+            status,
+            values=solver.variable_values(),
+            objective=solver.objective_value()
+        )
+
+
+class ORToolsBackend(SolverBackend):
+    """
+    Решатель OR-Tools через pywraplp (для решателей, не поддерживаемых ModelBuilder).
+
+    Создание решателя и переменных дороже самого расчета небольших задач, поэтому модели
+    хранятся как шаблоны по структуре задачи (размеры и позиции ненулевых коэффициентов):
+    при повторном расчете меняются только коэффициенты и границы. Шаблоны свои у каждого потока,
+    не более GAS_SOLVER_TEMPLATES на поток (LRU).
+    """
+
+    STATUSES = ["OPTIMAL", "FEASIBLE", "INFEASIBLE", "UNBOUNDED", "ABNORMAL", "NOT_SOLVED"]
+
+    def __init__(self, name: str, solver_id: str, description: str):
+        self.name = name
+        self.solver_id = solver_id
+        self.description = description
+        self._local = threading.local()
+
+    def is_available(self) -> bool:
+        from ortools.linear_solver import pywraplp
+
+        return pywraplp.Solver.CreateSolver(self.solver_id) is not None
+
+    def create_solver(self):
+        """Инициализация решателя OR-Tools"""
+        from ortools.linear_solver import pywraplp
+
+        solver = pywraplp.Solver.CreateSolver(self.solver_id)
+        if not solver:
+            raise ValueError(f"Не удалось инициализировать решатель {self.solver_id}")
+        solver.SuppressOutput()
+        return solver
+
+    def template(self, program: LinearProgram):
+        """Решатель, переменные и ограничения для структуры задачи (создаются один раз на поток)"""
+        templates = getattr(self._local, "templates", None)
+        if templates is None:
+            templates = self._local.templates = OrderedDict()
+
+        rows = program.rows
+        key = (
+            program.num_variables,
+            program.num_rows,
+            hashlib.sha1(rows.indptr.tobytes() + rows.indices.tobytes()).hexdigest(),
+        )
+        if key not in templates:
+            solver = self.create_solver()
+            variables = [solver.NumVar(0.0, 0.0, f"V_pg_{i}") for i in range(program.num_variables)]
+            constraints = [solver.Constraint(0.0, 0.0) for _ in range(program.num_rows)]
+            templates[key] = (solver, variables, constraints)
+            while len(templates) > settings.GAS_SOLVER_TEMPLATES:
+                templates.popitem(last=False)
+
+        templates.move_to_end(key)
+        return templates[key]
+
+    def solve(self, program: LinearProgram, deadline: Optional[Deadline] = None) -> LPSolution:
+        from ortools.linear_solver import pywraplp
+
+        solver, variables, constraints = self.template(program)
+        infinity = solver.infinity()
+
+        # Границы переменных
+        lower = np.maximum(program.lower, -infinity).tolist()
+        upper = np.minimum(program.upper, infinity).tolist()
+        for variable, lb, ub in zip(variables, lower, upper):
+            variable.SetBounds(lb, ub)
+
+        # Ограничения (по строкам матрицы CSR)
+        rows = program.rows
+        for k, (lb, ub) in enumerate(zip(np.maximum(program.row_lower, -infinity).tolist(),
+                                         np.minimum(program.row_upper, infinity).tolist())):
+            constraint = constraints[k]
+            constraint.SetBounds(lb, ub)
+            start, end = rows.indptr[k], rows.indptr[k + 1]
+            for j, coeff in zip(rows.indices[start:end].tolist(), rows.data[start:end].tolist()):
+                constraint.SetCoefficient(variables[j], coeff)
+
+        # Целевая функция
+        objective = solver.Objective()
+        for variable, coeff in zip(variables, program.objective.tolist()):
+            objective.SetCoefficient(variable, coeff)
+        if program.maximize:
+            objective.SetMaximization()
+        else:
+            objective.SetMinimization()
+
+        statuses = {getattr(pywraplp.Solver, name): name for name in self.STATUSES}
+        with SolverOutput.suppressed():
+            if deadline is None:
+                solver.SetTimeLimit(0)
+                status = statuses.get(solver.Solve(), "ABNORMAL")
+            else:
+                solver.SetTimeLimit(max(1, int(deadline.remaining() * 1000)))
+                with deadline.interrupt(solver.InterruptSolve):
+                    status = statuses.get(solver.Solve(), "ABNORMAL")
+        if status not in ("OPTIMAL", "FEASIBLE"):
+            return LPSolution(status)
+
+        return LPSolution(
+            status,
+            values=np.array([variable.solution_value() for variable in variables]),
+            objective=objective.Value(),
+            iterations=solver.iterations()
+        )
+
+
+class MixedIntegerBackend:
+    """
+    Решатель смешанной целочисленной задачи (SCIP через pywraplp) для дискретного режима расчета.
+    Задача - LinearProgram и маска целочисленных переменных. Начальное решение (hint) передается
+    решателю как подсказка, расчет останавливается при достижении относительного разрыва gap
+    или лимита времени. В решении возвращается лучшая оценка целевой функции (bound).
+    """
+
+    solver_id = "SCIP"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        from ortools.linear_solver import pywraplp
+
+        return pywraplp.Solver.CreateSolver(cls.solver_id) is not None
+
+    @classmethod
+    def solve(cls, program: LinearProgram, integer: np.ndarray, hint: Optional[np.ndarray] = None,
+              gap: float = 0.0, time_limit: Optional[float] = None,
+              deadline: Optional[Deadline] = None) -> LPSolution:
+        from ortools.linear_solver import pywraplp
+
+        solver = pywraplp.Solver.CreateSolver(cls.solver_id)
+        if not solver:
+            raise ValueError(f"Не удалось инициализировать решатель {cls.solver_id}")
+        solver.SuppressOutput()
+        infinity = solver.infinity()
+
+        lower = np.maximum(program.lower, -infinity).tolist()
+        upper = np.minimum(program.upper, infinity).tolist()
+        variables = [
+            solver.IntVar(lb, ub, f"x_{j}") if is_integer else solver.NumVar(lb, ub, f"x_{j}")
+            for j, (lb, ub, is_integer) in enumerate(zip(lower, upper, np.asarray(integer).tolist()))
+        ]
+
+        rows = program.rows
+        for k, (lb, ub) in enumerate(zip(np.maximum(program.row_lower, -infinity).tolist(),
+                                         np.minimum(program.row_upper, infinity).tolist())):
+            constraint = solver.Constraint(lb, ub)
+            start, end = rows.indptr[k], rows.indptr[k + 1]
+            for j, coeff in zip(rows.indices[start:end].tolist(), rows.data[start:end].tolist()):
+                constraint.SetCoefficient(variables[j], coeff)
+
+        objective = solver.Objective()
+        for variable, coeff in zip(variables, program.objective.tolist()):
+            objective.SetCoefficient(variable, coeff)
+        if program.maximize:
+            objective.SetMaximization()
+        else:
+            objective.SetMinimization()
+
+        if hint is not None:
+            solver.SetHint(variables, np.asarray(hint, dtype=np.float64).tolist())
+
+        parameters = pywraplp.MPSolverParameters()
+        parameters.SetDoubleParam(parameters.RELATIVE_MIP_GAP, gap)
+        limits = [time_limit] if time_limit is not None else []
+        if deadline is not None:
+            limits.append(deadline.remaining())
+        solver.SetTimeLimit(max(1, int(min(limits) * 1000)) if limits else 0)
+
+        statuses = {getattr(pywraplp.Solver, name): name for name in ORToolsBackend.STATUSES}
+        if deadline is None:
+            status = statuses.get(solver.Solve(parameters), "ABNORMAL")
+        else:
+            with deadline.interrupt(solver.InterruptSolve):
+                status = statuses.get(solver.Solve(parameters), "ABNORMAL")
+        if status not in ("OPTIMAL", "FEASIBLE"):
+            return LPSolution(status)
+
+        return LPSolution(
+            status,
+            values=np.array([variable.solution_value() for variable in variables]),
+            objective=objective.Value(),
+            iterations=solver.iterations(),
+            bound=objective.BestBound(),
+        )
+
+
+class SolverCalibration:
+    """
+    Таблица времени решения, полученная локальной калибровкой (manage.py calibrate_solvers).
+    Формат файла: {"entries": [{"backend", "variables", "rows", "seconds"}, ...]}.
+    """
+
+    _entries = None
+    _mtime = None
+
+    @classmethod
+    def path(cls) -> str:
+        return settings.GAS_SOLVER_CALIBRATION_FILE
+
+    @classmethod
+    def entries(cls) -> List[Dict]:
+        """Загрузка таблицы с перечитыванием при изменении файла"""
+        try:
+            mtime = os.path.getmtime(cls.path())
+        except OSError:
+            cls._entries, cls._mtime = [], None
+            return cls._entries
+
+        if cls._entries is None or mtime != cls._mtime:
+            with open(cls.path(), encoding="utf-8") as file:
+                cls._entries = json.load(file).get("entries", [])
+            cls._mtime = mtime
+        return cls._entries
+
+    @classmethod
+    def save(cls, entries: List[Dict]):
+        with open(cls.path(), "w", encoding="utf-8") as file:
+            json.dump({"entries": entries}, file, ensure_ascii=False, indent=2)
+        cls._entries, cls._mtime = None, None
+
+    @classmethod
+    def fastest(cls, program: LinearProgram, candidates: List[str]) -> Optional[str]:
+        """
+        Самый быстрый решатель для ближайшего по размеру откалиброванного экземпляра.
+        Близость - по логарифмам числа переменных и строк.
+        """
+        entries = [entry for entry in cls.entries() if entry["backend"] in candidates]
+        if not entries:
+            return None
+
+        def distance(entry):
+            return (abs(math.log(max(entry["variables"], 1)) - math.log(max(program.num_variables, 1)))
+                    + abs(math.log(max(entry["rows"], 1)) - math.log(max(program.num_rows, 1))))
+
+        nearest = min(distance(entry) for entry in entries)
+        entries = [entry for entry in entries if distance(entry) == nearest]
+        return min(entries, key=lambda entry: entry["seconds"])["backend"]
+
+
+class SolverBackendRegistry:
+    """
+    Реестр решателей. Выбор решателя: явно по имени или "auto" (по таблице калибровки).
+    """
+
+    AUTO = "auto"
+
+    # Порядок выбора в режиме auto при отсутствии калибровки
+    DEFAULT_ORDER = ["simplex", "glop", "clp", "scip", "pdlp"]
+
+    _backends: Dict[str, SolverBackend] = {}
+    _available: Dict[str, bool] = {}
+
+    @classmethod
+    def register(cls, backend: SolverBackend):
+        cls._backends[backend.name] = backend
+        cls._available.pop(backend.name, None)
+
+    @classmethod
+    def names(cls) -> List[str]:
+        return list(cls._backends)
+
+    @classmethod
+    def choices(cls) -> List[str]:
+        return [cls.AUTO] + cls.names()
+
+    @classmethod
+    def is_available(cls, name: str) -> bool:
+        if name not in cls._available:
+            cls._available[name] = cls._backends[name].is_available()
+        return cls._available[name]
+
+    @classmethod
+    def available(cls) -> List[str]:
+        return [name for name in cls._backends if cls.is_available(name)]
+
+    @classmethod
+    def get(cls, name: str) -> SolverBackend:
+        name = name.lower()
+        if name not in cls._backends:
+            raise ValueError(f"Неизвестный решатель: {name}. Доступные: {', '.join(cls.choices())}")
+        if not cls.is_available(name):
+            raise ValueError(f"Решатель {name} недоступен в текущей сборке OR-Tools")
+        return cls._backends[name]
+
+    @classmethod
+    def select(cls, name: Optional[str], program: LinearProgram) -> SolverBackend:
+        """
+        Решатель для задачи: явно заданный, из настроек или выбранный автоматически.
+        Явно заданный решатель, не подходящий для задачи (supports), - ошибка: иначе, например,
+        встроенный симплекс-метод с плотным базисом занимает процесс на время всего срока расчета.
+        Решатель из настроек GAS_SOLVER_BACKEND в таком случае заменяется выбранным автоматически.
+        """
+        if name and name.lower() != cls.AUTO:
+            backend = cls.get(name)
+            if not backend.supports(program):
+                raise ValueError(
+                    f"Решатель {backend.name} не подходит для задачи такого размера "
+                    f"({program.num_variables} переменных, {program.num_rows} ограничений), используйте auto"
+                )
+            return backend
+
+        name = settings.GAS_SOLVER_BACKEND.lower() if not name else cls.AUTO
+        if name != cls.AUTO:
+            backend = cls.get(name)
+            if backend.supports(program):
+                return backend
+
+        candidates = [name for name in cls.available() if cls._backends[name].supports(program)]
+        fastest = SolverCalibration.fastest(program, candidates)
+        if fastest:
+            return cls._backends[fastest]
+
+        for name in cls.DEFAULT_ORDER:
+            if name in candidates:
+                return cls._backends[name]
+        raise ValueError("Нет доступных решателей")
+
+
+SolverBackendRegistry.register(SimplexEngineBackend())
+SolverBackendRegistry.register(ModelBuilderBackend("glop", "GLOP", "Google GLOP (симплекс-метод)"))
+SolverBackendRegistry.register(ModelBuilderBackend("pdlp", "PDLP", "Google PDLP (метод первого порядка)"))
+SolverBackendRegistry.register(ModelBuilderBackend("scip", "SCIP", "SCIP (MIP-решатель)"))
+SolverBackendRegistry.register(ORToolsBackend("clp", "CLP", "COIN-OR CLP (симплекс-метод)"))
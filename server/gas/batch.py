@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import django
+from django.conf import settings
+
+from server.settings import ERROR_LOGGER
+
+
+def _init_worker():
+    """Инициализация Django в рабочем процессе пула"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+    django.setup()
+
+
+def _solve_scenario(data: Dict, backend: Optional[str]) -> Dict:
+    """Расчет одного сценария в рабочем процессе. Ошибка возвращается, а не выбрасывается"""
+    from gas.cache import CalculationCache
+
+    try:
+        return {"result": CalculationCache.calculate(data, backend)}
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def _solve_chunk(items: List[Dict], backend: Optional[str]) -> List[Dict]:
+    return [_solve_scenario(data, backend) for data in items]
+
+
+class BatchCalculationService:
+    """
+    Пакетный расчет сценариев на ограниченном пуле процессов.
+    Пул создается один раз на веб-процесс и переиспользуется между запросами,
+    сценарии передаются в процессы порциями. Порядок результатов совпадает с порядком сценариев.
+    Пул свой у каждого веб-процесса, поэтому всего процессов расчета - число веб-процессов,
+    умноженное на GAS_BATCH_WORKERS (по умолчанию 2, 0 - по числу ядер), и память растет так же.
+    """
+
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def executor(cls) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=cls.workers(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return cls._executor
+
+    @staticmethod
+    def workers() -> int:
+        return settings.GAS_BATCH_WORKERS or os.cpu_count() or 1
+
+    @classmethod
+    def calculate(cls, scenarios: List[Dict], backend: Optional[str] = None) -> List[Dict]:
+        """
+        Расчет списка проверенных сценариев.
+        Возвращает список {"result": ...} или {"error": ...} в порядке входных данных.
+        """
+        workers = cls.workers()
+        if workers <= 1 or len(scenarios) < settings.GAS_BATCH_MIN_PARALLEL:
+            return _solve_chunk(scenarios, backend)
+
+        # Порции: по несколько на процесс, чтобы выровнять нагрузку и сократить накладные расходы IPC
+        size = max(1, len(scenarios) // (workers * 4))
+        chunks = [scenarios[i:i + size] for i in range(0, len(scenarios), size)]
+
+        try:
+            results = cls.executor().map(_solve_chunk, chunks, [backend] * len(chunks))
+            return [item for chunk in results for item in chunk]
+        except Exception as e:
+            ERROR_LOGGER.error(f"Ошибка пула пакетного расчета: {str(e)}", exc_info=True)
+            cls.shutdown()
+            raise ValueError("Ошибка пакетного расчета")
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False, cancel_futures=True)
+                cls._executor = None
@@ -0,0 +1,202 @@
+import os
+import platform
+import statistics
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from gas.backends import SolverBackendRegistry
+from gas.furnaces import FurnaceArrays
+from gas.presolve import Presolve
+from gas.serializers import CalculateCreateSerializer, HistoryCreateSerializer
+from gas.services import GasDistributionService, SyntheticInputValues
+from rest_framework.renderers import JSONRenderer
+
+
+class PipelineBenchmark:
+    """
+    Замер каждого этапа расчета по отдельности на детерминированных синтетических данных
+    (SyntheticInputValues, seed 0):
+    - validate - проверка входных данных CalculateCreateSerializer;
+    - build - массивы печей и построение модели;
+    - presolve - предварительная обработка (при GAS_PRESOLVE);
+    - solve - решение каждым доступным решателем, подходящим для размера задачи;
+    - prepare - подготовка результатов;
+    - render - ответ в JSON (JSONRenderer);
+    - persist - сохранение History через HistoryCreateSerializer во временной базе данных.
+
+    Временная база создается тестовыми средствами Django (test_<имя базы>) и удаляется после замера.
+    Модели используют ArrayField, поэтому persist выполняется только на PostgreSQL; если база
+    недоступна, этап пропускается с указанием причины. Каждый этап выполняется один раз для прогрева,
+    затем repeats раз; в результат попадают медиана, минимум и максимум, мс.
+    """
+
+    SIZES = [8, 20, 100, 1000, 10000]
+
+    def __init__(self, sizes: Optional[List[int]] = None, repeats: int = 5, backends: Optional[List[str]] = None,
+                 persist: bool = True, log: Optional[Callable[[str], None]] = None):
+        self.sizes = sizes or self.SIZES
+        self.repeats = repeats
+        self.backends = backends or SolverBackendRegistry.available()
+        self.persist = persist
+        self.log = log or (lambda line: None)
+        self.results = []
+        self.skipped = {}
+
+    def run(self) -> Dict:
+        database = self._setup_database() if self.persist else None
+        if not self.persist:
+            self.skipped["persist"] = "отключено"
+        try:
+            for N in self.sizes:
+                self._run_size(N, database)
+        finally:
+            if database is not None:
+                connection.creation.destroy_test_db(database["old_name"], verbosity=0)
+
+        return {
+            "created_at": timezone.now().isoformat(),
+            "environment": self.environment(),
+            "sizes": self.sizes,
+            "repeats": self.repeats,
+            "results": self.results,
+            "skipped": self.skipped,
+        }
+
+    def _run_size(self, N: int, database: Optional[Dict]):
+        data = SyntheticInputValues.get_values(N)
+
+        validated = self._measure("validate", N, lambda: self._validate(data))
+        furnaces, program = self._measure("build", N, lambda: self._build(validated))
+
+        reduced = program
+        if settings.GAS_PRESOLVE:
+            presolve = self._measure("presolve", N, lambda: Presolve(program))
+            reduced = presolve.program if presolve.program is not None else program
+
+        solution = None
+        for name in self.backends:
+            backend = SolverBackendRegistry.get(name)
+            if not backend.supports(reduced):
+                self.skipped.setdefault(f"solve:{name}", f"не подходит для N={N}")
+                continue
+            result = self._measure("solve", N, lambda: backend.solve(reduced), backend=name)
+            if result.status == "OPTIMAL" and solution is None:
+                solution = presolve.restore(result) if reduced is not program else result
+        if solution is None:
+            self.skipped.setdefault("prepare", f"нет оптимального решения для N={N}")
+            return
+
+        result = self._measure("prepare", N, lambda: GasDistributionService._prepare_results(
+            furnaces, solution.values, solution.objective
+        ))
+        self._measure("render", N, lambda: JSONRenderer().render(result))
+
+        if database is not None:
+            history = dict(result, calculate=data)
+            self._measure("persist", N, lambda: self._save_history(history, database["user"]))
+
+    def _measure(self, stage: str, N: int, func: Callable, backend: Optional[str] = None):
+        value = func()  # Прогрев: импорт, кэши, шаблоны моделей
+        timings = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            value = func()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        entry = {
+            "stage": stage,
+            "backend": backend,
+            "N": N,
+            "median_ms": round(statistics.median(timings), 4),
+            "min_ms": round(min(timings), 4),
+            "max_ms": round(max(timings), 4),
+        }
+        self.results.append(entry)
+        label = f"{stage}:{backend}" if backend else stage
+        self.log(f"N={N:<6} {label:<14} медиана {entry['median_ms']:10.3f} мс, минимум {entry['min_ms']:10.3f} мс")
+        return value
+
+    @staticmethod
+    def _validate(data: Dict) -> Dict:
+        serializer = CalculateCreateSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    @staticmethod
+    def _build(data: Dict):
+        furnaces = FurnaceArrays(data)
+        return furnaces, GasDistributionService._build_linear_program(furnaces)
+
+    @staticmethod
+    def _save_history(data: Dict, user):
+        serializer = HistoryCreateSerializer(data=data, context={"request": SimpleNamespace(user=user)})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def _setup_database(self) -> Optional[Dict]:
+        """Временная база данных для этапа persist или None с причиной в skipped"""
+        from user.models import User
+
+        if connection.vendor != "postgresql":
+            self.skipped["persist"] = f"нужен PostgreSQL (ArrayField), настроен {connection.vendor}"
+            return None
+        try:
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        except Exception as e:
+            self.skipped["persist"] = f"база данных недоступна: {str(e).strip().splitlines()[0]}"
+            return None
+
+        user = User.objects.create_user(email="benchmark@example.com", password=None)
+        return {"old_name": old_name, "user": user}
+
+    @staticmethod
+    def environment() -> Dict:
+        try:
+            from ortools import __version__ as ortools_version
+        except ImportError:
+            ortools_version = None
+        return {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "ortools": ortools_version,
+            "presolve": settings.GAS_PRESOLVE,
+        }
+
+    @staticmethod
+    def compare(baseline: Dict, current: Dict, threshold: float = 0.2, min_ms: float = 0.05) -> Dict:
+        """
+        Сравнение двух замеров по медианам. Регрессия - этап стал медленнее больше чем на threshold
+        (доля) и больше чем на min_ms (чтобы шум коротких этапов не считался регрессией).
+        """
+        def key(entry):
+            return entry["stage"], entry["backend"], entry["N"]
+
+        before = {key(entry): entry["median_ms"] for entry in baseline["results"]}
+        report = {"regressions": [], "improvements": [], "unchanged": 0,
+                  "missing": [], "new": []}
+
+        for entry in current["results"]:
+            stage = key(entry)
+            if stage not in before:
+                report["new"].append(entry)
+                continue
+            old, new = before.pop(stage), entry["median_ms"]
+            change = {"stage": entry["stage"], "backend": entry["backend"], "N": entry["N"],
+                      "baseline_ms": old, "current_ms": new,
+                      "ratio": round(new / old, 3) if old > 0 else None}
+            if new - old > max(threshold * old, min_ms):
+                report["regressions"].append(change)
+            elif old - new > max(threshold * old, min_ms):
+                report["improvements"].append(change)
+            else:
+                report["unchanged"] += 1
+
+        report["missing"] = [{"stage": stage, "backend": backend, "N": N} for stage, backend, N in before]
+        return report
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from gas.deadline import Deadline
+from gas.pool import SolverPool
+from gas.services import GasDistributionService, InfeasibleCalculationError
+from gas.signing import SolverStatsSignature
+
+
+class MemoryCacheStore:
+    """
+    Кэш в памяти процесса: LRU-вытеснение по числу записей и время жизни записи.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Dict):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def count(self, counter: str):
+        with self._lock:
+            self._stats[counter] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats = {"hits": 0, "misses": 0}
+
+
+class DjangoCacheStore:
+    """
+    Общий кэш через бэкенд Django (CACHES): доступен всем рабочим процессам.
+    Вытеснение выполняет сам бэкенд, счетчики хранятся в нем же.
+    """
+
+    name = "django"
+    PREFIX = "gas:calculate:"
+    max_entries = None  # Ограничивается настройками бэкенда CACHES
+
+    def __init__(self, alias: str, ttl: int):
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.cache.get(self.PREFIX + key)
+
+    def set(self, key: str, value: Dict):
+        self.cache.set(self.PREFIX + key, value, timeout=self.ttl)
+
+    def count(self, counter: str):
+        key = f"{self.PREFIX}stats:{counter}"
+        self.cache.add(key, 0, timeout=None)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, timeout=None)
+
+    def stats(self) -> Dict:
+        return {
+            counter: self.cache.get(f"{self.PREFIX}stats:{counter}", 0)
+            for counter in ("hits", "misses")
+        }
+
+    def clear(self):
+        self.cache.delete_many([f"{self.PREFIX}stats:hits", f"{self.PREFIX}stats:misses"])
+
+
+class CalculationCache:
+    """
+    Кэш результатов расчета перед GasDistributionService.calculate_distribution.
+
+    Ключ - SHA-256 канонического JSON проверенных входных данных (CalculateCreateSerializer)
+    и имени решателя. Вещественные числа округляются до GAS_CACHE_FLOAT_DIGITS значащих цифр,
+    поэтому почти совпадающие запросы получают один ключ. Числовые списки округляются векторно
+    и входят в JSON хэшем своих байтов, чтобы ключ для тысяч печей строился за миллисекунды. Кэшируются и оптимальные решения,
+    и сообщения о несовместности ограничений.
+    Хранилище выбирается настройкой GAS_CACHE_BACKEND: memory, django или off.
+    """
+
+    _store = None
+
+    @classmethod
+    def store(cls):
+        if cls._store is None:
+            backend = settings.GAS_CACHE_BACKEND
+            if backend == "memory":
+                cls._store = MemoryCacheStore(settings.GAS_CACHE_MAX_ENTRIES, settings.GAS_CACHE_TTL)
+            elif backend == "django":
+                cls._store = DjangoCacheStore(settings.GAS_CACHE_ALIAS, settings.GAS_CACHE_TTL)
+        return cls._store
+
+    @classmethod
+    def quantize(cls, value):
+        """Округление вещественных чисел до заданного числа значащих цифр"""
+        if isinstance(value, float):
+            return float(f"{value:.{settings.GAS_CACHE_FLOAT_DIGITS}g}")
+        if isinstance(value, (list, tuple)):
+            if value and isinstance(value[0], (int, float)) and not isinstance(value[0], bool):
+                try:
+                    return cls.quantize_array(np.asarray(value, dtype=float))
+                except (TypeError, ValueError):
+                    pass
+            return [cls.quantize(item) for item in value]
+        if isinstance(value, dict):
+            return {key: cls.quantize(item) for key, item in value.items()}
+        return value
+
+    @staticmethod
+    def quantize_array(values: np.ndarray) -> np.ndarray:
+        """Векторное округление массива до заданного числа значащих цифр"""
+        digits = settings.GAS_CACHE_FLOAT_DIGITS
+        with np.errstate(divide="ignore", invalid="ignore"):
+            magnitude = np.floor(np.log10(np.abs(values)))
+        scale = 10.0 ** np.where(np.isfinite(magnitude), digits - 1 - magnitude, 0.0)
+        return np.round(values * scale) / scale + 0.0  # + 0.0 убирает отрицательный ноль
+
+    @staticmethod
+    def _encode(value):
+        """Массив входит в канонический JSON хэшем своих байтов"""
+        if isinstance(value, np.ndarray):
+            return f"sha256:{hashlib.sha256(value.tobytes()).hexdigest()}"
+        raise TypeError(f"Тип {type(value).__name__} не сериализуется в ключ кэша")
+
+    @classmethod
+    def key(cls, data: Dict, backend: Optional[str] = None, sensitivity: bool = False) -> str:
+        payload = {
+            "data": cls.quantize(dict(data)),
+            "backend": (backend or settings.GAS_SOLVER_BACKEND).lower(),
+            "sensitivity": sensitivity,
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=cls._encode)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def solve(data: Dict, backend: Optional[str] = None, sensitivity: bool = False,
+              deadline: Optional[Deadline] = None) -> Dict:
+        """Расчет в пуле решателей (если задан GAS_SOLVER_POOL_ADDRESS) или в текущем процессе"""
+        if SolverPool.enabled():
+            return SolverPool.calculate(data, backend, sensitivity, deadline)
+        return GasDistributionService.calculate_distribution(data, backend, sensitivity, deadline)
+
+    @classmethod
+    def calculate(cls, data: Dict, backend: Optional[str] = None, sensitivity: bool = False,
+                  deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Расчет с использованием кэша. Несовместность из кэша выбрасывается как при расчете.
+        Решения, прерванные по сроку (FEASIBLE_TIMEOUT), не кэшируются. Результат из кэша
+        отмечается cache_hit=True, показатели решателя в нем - исходного расчета.
+        """
+        store = cls.store()
+        if store is None:
+            return cls.solve(data, backend, sensitivity, deadline)
+
+        key = cls.key(data, backend, sensitivity)
+        entry = store.get(key)
+        if entry is not None:
+            store.count("hits")
+            if "error" in entry:
+                raise InfeasibleCalculationError(entry["error"])
+            return SolverStatsSignature.sign(dict(entry["result"], cache_hit=True))
+
+        store.count("misses")
+        try:
+            result = cls.solve(data, backend, sensitivity, deadline)
+        except InfeasibleCalculationError as e:
+            store.set(key, {"error": str(e)})
+            raise
+        if result["status"] == "OPTIMAL":
+            store.set(key, {"result": result})
+        return result
+
+    @classmethod
+    def stats(cls) -> Dict:
+        store = cls.store()
+        if store is None:
+            return {"backend": "off"}
+
+        stats = store.stats()
+        lookups = stats["hits"] + stats["misses"]
+        return dict(
+            stats,
+            backend=store.name,
+            max_entries=store.max_entries,
+            ttl=store.ttl,
+            hit_rate=round(stats["hits"] / lookups, 4) if lookups else None,
+        )
+
+    @classmethod
+    def clear(cls):
+        store = cls.store()
+        if store is not None:
+            store.clear()
@@ -0,0 +1,257 @@
+import glob
+import json
+import logging
+import os
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from gas.parsers import NDJSONParser
+from gas.serializers import CalculateCreateSerializer
+from gas.services import GasDistributionService
+from rest_framework.exceptions import ValidationError
+
+
+class TrafficCapture:
+    """
+    Запись выборки запросов POST /api/gas/calculate/ в NDJSON (gas.middleware.TrafficCaptureMiddleware).
+
+    Записывается доля GAS_CAPTURE_RATE запросов. Каждый процесс пишет в свой файл рядом
+    с GAS_CAPTURE_FILE: <имя>.<pid><расширение> (capture/calculate.12345.ndjson) - ротацию общего
+    файла несколько процессов выполнили бы одновременно и потеряли бы записи. Файл процесса
+    ротируется при достижении GAS_CAPTURE_MAX_BYTES, хранится GAS_CAPTURE_BACKUPS предыдущих
+    файлов (<файл>.1 - самый новый).
+    Запись обезличена: только поля входных данных расчета, параметры backend и sensitivity, время
+    с точностью до минуты, код и тело ответа, длительности; без пользователя, адреса и заголовков.
+    """
+
+    QUERY_PARAMS = ("backend", "sensitivity")
+
+    _logger = None
+    _pid = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        return settings.GAS_CAPTURE_RATE > 0
+
+    @staticmethod
+    def sampled() -> bool:
+        return random.random() < settings.GAS_CAPTURE_RATE
+
+    @staticmethod
+    def max_body() -> int:
+        """Тела больше файла записи и больше допустимого Django не записываются"""
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        return min(settings.GAS_CAPTURE_MAX_BYTES, limit) if limit is not None else settings.GAS_CAPTURE_MAX_BYTES
+
+    @staticmethod
+    def process_file(path: Optional[str] = None) -> str:
+        """Файл записи текущего процесса"""
+        stem, extension = os.path.splitext(path or settings.GAS_CAPTURE_FILE)
+        return f"{stem}.{os.getpid()}{extension}"
+
+    @classmethod
+    def logger(cls) -> logging.Logger:
+        """
+        Отдельный логгер с ротацией файла процесса: записи из нескольких потоков не перемешиваются.
+        В процессе, созданном fork после первой записи, файл открывается заново под его pid.
+        """
+        with cls._lock:
+            if cls._logger is None or cls._pid != os.getpid():
+                os.makedirs(os.path.dirname(settings.GAS_CAPTURE_FILE), exist_ok=True)
+                handler = RotatingFileHandler(
+                    cls.process_file(),
+                    maxBytes=settings.GAS_CAPTURE_MAX_BYTES,
+                    backupCount=settings.GAS_CAPTURE_BACKUPS,
+                    encoding="utf-8",
+                    delay=True,
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger = logging.getLogger("gas.capture")
+                for inherited in list(logger.handlers):
+                    logger.removeHandler(inherited)
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                cls._logger, cls._pid = logger, os.getpid()
+            return cls._logger
+
+    @staticmethod
+    def payload(body: bytes, content_type: str) -> Optional[Dict]:
+        """Входные данные расчета из тела запроса (JSON или NDJSON), только поля CalculateCreateSerializer"""
+        try:
+            if content_type.startswith(NDJSONParser.media_type):
+                data = NDJSONParser().parse(body.splitlines())
+            else:
+                data = json.loads(body.decode("utf-8"))
+        except Exception:
+            return None
+        if not isinstance(data, dict):
+            return None
+        fields = CalculateCreateSerializer.Meta.fields
+        return {key: value for key, value in data.items() if key in fields}
+
+    @classmethod
+    def entry(cls, request, body: bytes, response, duration: float) -> Optional[Dict]:
+        payload = cls.payload(body, request.content_type or "")
+        if payload is None:
+            return None
+
+        data = getattr(response, "data", None)
+        entry = {
+            "captured_at": timezone.now().replace(second=0, microsecond=0).isoformat(),
+            "params": {key: request.GET[key] for key in cls.QUERY_PARAMS if key in request.GET},
+            "payload": payload,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "phases": {
+                phase: round(seconds * 1000, 3) for phase, seconds in getattr(request, "phase_timings", {}).items()
+            },
+        }
+        if response.status_code == 200:
+            entry["result"] = data
+        elif isinstance(data, dict):
+            entry["error"] = data.get("error", data)
+        return entry
+
+    @classmethod
+    def record(cls, entry: Dict):
+        cls.logger().info(json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str))
+
+    @staticmethod
+    def corpus(path: Optional[str] = None) -> List[str]:
+        """
+        Файлы записи всех процессов (и path, если он есть) с предыдущими файлами, от старых
+        к новым по времени изменения: записи разных процессов идут примерно в порядке поступления.
+        """
+        path = path or settings.GAS_CAPTURE_FILE
+        stem, extension = os.path.splitext(path)
+        current = [path] + [
+            name for name in glob.glob(f"{glob.escape(stem)}.*{glob.escape(extension)}")
+            if name[len(stem) + 1:len(name) - len(extension)].isdigit()
+        ]
+        files = [
+            name
+            for base in current
+            for name in [f"{base}.{index}" for index in range(settings.GAS_CAPTURE_BACKUPS, 0, -1)] + [base]
+            if os.path.exists(name)
+        ]
+        return sorted(files, key=os.path.getmtime)
+
+    @staticmethod
+    def read(paths: List[str]) -> Iterator[Dict]:
+        for path in paths:
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class TrafficReplay:
+    """
+    Повторный расчет записанных запросов текущей версией GasDistributionService (без кэша и срока).
+
+    Запросы выполняются параллельно в concurrency потоках, как в веб-процессе. Для каждого запроса
+    сравнивается результат с записанным: статус, целевая функция и распределение ПГ (относительный
+    допуск tolerance) или текст ошибки проверки/расчета. Запросы, завершенные при записи
+    другой ошибкой (срок расчета, сбой сервера), повторяются, но не сравниваются.
+    """
+
+    COMPARED = (200, 400)
+
+    def __init__(self, entries: List[Dict], concurrency: int = 1, backend: Optional[str] = None,
+                 tolerance: float = 1e-6):
+        self.entries = entries
+        self.concurrency = concurrency
+        self.backend = backend
+        self.tolerance = tolerance
+
+    def run(self) -> Dict:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            replayed = list(executor.map(self._replay, self.entries))
+        elapsed = time.perf_counter() - start
+
+        differences = []
+        for index, (entry, (outcome, _)) in enumerate(zip(self.entries, replayed)):
+            if entry["status"] not in self.COMPARED:
+                continue
+            difference = self.compare(entry, outcome, self.tolerance)
+            if difference is not None:
+                differences.append({"index": index, "captured_at": entry.get("captured_at"),
+                                    "N": entry["payload"].get("N"), "difference": difference})
+
+        return {
+            "requests": len(self.entries),
+            "compared": sum(entry["status"] in self.COMPARED for entry in self.entries),
+            "concurrency": self.concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "throughput": round(len(self.entries) / elapsed, 2) if elapsed > 0 else None,
+            "latency_ms": self.percentiles([latency for _, latency in replayed]),
+            "recorded_latency_ms": self.percentiles([entry["duration_ms"] for entry in self.entries]),
+            "differences": differences,
+        }
+
+    def _replay(self, entry: Dict):
+        params = entry.get("params", {})
+        start = time.perf_counter()
+        try:
+            serializer = CalculateCreateSerializer(data=entry["payload"])
+            serializer.is_valid(raise_exception=True)
+            result = GasDistributionService.calculate_distribution(
+                serializer.validated_data,
+                backend=self.backend or params.get("backend"),
+                sensitivity=params.get("sensitivity", "").lower() in ("1", "true"),
+            )
+            outcome = {"result": result}
+        except ValidationError as e:
+            outcome = {"error": e.detail}
+        except ValueError as e:
+            outcome = {"error": str(e)}
+        return outcome, (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def compare(entry: Dict, outcome: Dict, tolerance: float) -> Optional[str]:
+        """Описание расхождения с записанным ответом или None"""
+        if "result" not in entry:
+            if "result" in outcome:
+                return f"при записи ошибка, сейчас результат {outcome['result']['status']}"
+            recorded, current = json.dumps(entry.get("error"), ensure_ascii=False), json.dumps(outcome["error"], ensure_ascii=False)
+            return None if recorded == current else f"другая ошибка: {current}"
+        if "result" not in outcome:
+            return f"при записи результат, сейчас ошибка: {json.dumps(outcome['error'], ensure_ascii=False)}"
+
+        recorded, current = entry["result"], outcome["result"]
+        if recorded["status"] != current["status"]:
+            return f"статус {recorded['status']} -> {current['status']}"
+
+        def differs(old, new):
+            return abs(new - old) > tolerance * max(1.0, abs(old))
+
+        if differs(recorded["objective"], current["objective"]):
+            return f"целевая функция {recorded['objective']} -> {current['objective']}"
+        if len(recorded["gas_distribution"]) != len(current["gas_distribution"]):
+            return "другое количество печей в распределении ПГ"
+        for furnace, (old, new) in enumerate(zip(recorded["gas_distribution"], current["gas_distribution"]), start=1):
+            if differs(old, new):
+                return f"расход ПГ печи {furnace}: {old} -> {new}"
+        return None
+
+    @staticmethod
+    def percentiles(values: List[float]) -> Optional[Dict]:
+        if not values:
+            return None
+        quantiles = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+        return {
+            "p50": round(quantiles[49], 3),
+            "p90": round(quantiles[89], 3),
+            "p99": round(quantiles[98], 3),
+            "max": round(max(values), 3),
+        }
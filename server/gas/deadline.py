@@ -0,0 +1,165 @@
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+
+from server.settings import BASE_LOGGER
+
+
+class DeadlineExceededError(ValueError):
+    """Срок расчета истек, допустимое решение не найдено"""
+
+
+class CalculationCancelledError(ValueError):
+    """Расчет отменен (клиент закрыл соединение)"""
+
+
+class Deadline:
+    """
+    Срок расчета. Оставшееся время передается решателю как ограничение по времени,
+    отмена (cancel) прерывает решатель, не дожидаясь срока.
+
+    Срок задается заголовком X-Calculation-Deadline или полем "deadline" тела запроса (в секундах),
+    по умолчанию GAS_DEADLINE_DEFAULT, и не может превышать GAS_DEADLINE_MAX.
+    """
+
+    HEADER = "HTTP_X_CALCULATION_DEADLINE"
+    POLL_INTERVAL = 0.1  # Период проверки соединения клиента, с
+
+    _socket_warned = False  # Предупреждение о недоступном сокете клиента выводится один раз на процесс
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_request(cls, request) -> "Deadline":
+        value = request.META.get(cls.HEADER)
+        if value is None and hasattr(request.data, "get"):
+            value = request.data.get("deadline")
+        if value is None:
+            return cls(settings.GAS_DEADLINE_DEFAULT)
+
+        try:
+            seconds = float(value)
+        except (TypeError, ValueError):
+            raise ValueError("Срок расчета должен быть числом секунд")
+        if not seconds > 0:
+            raise ValueError("Срок расчета должен быть больше нуля")
+        return cls(min(seconds, settings.GAS_DEADLINE_MAX))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def stopped(self) -> bool:
+        """Расчет нужно прервать: срок истек или расчет отменен"""
+        return self.cancelled or self.expired()
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+
+    @contextmanager
+    def interrupt(self, callback: Callable[[], None]):
+        """Регистрация прерывания решателя на время решения"""
+        with self._lock:
+            self._callbacks.append(callback)
+            cancelled = self.cancelled
+        if cancelled:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.remove(callback)
+
+    def error(self) -> ValueError:
+        """Ошибка для расчета, прерванного без допустимого решения"""
+        if self.cancelled:
+            return CalculationCancelledError("Расчет отменен: клиент закрыл соединение")
+        return DeadlineExceededError(f"Срок расчета истек ({self.seconds:g} с), допустимое решение не найдено")
+
+    @contextmanager
+    def watch(self, request):
+        """Отмена расчета при закрытии соединения клиентом (проверка сокета в отдельном потоке)"""
+        sock, owned = self._client_socket(request)
+        if sock is None:
+            yield self
+            return
+
+        done = threading.Event()
+
+        def poll():
+            while not done.wait(self.POLL_INTERVAL):
+                try:
+                    if sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b"":
+                        self.cancel()
+                        return
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    self.cancel()
+                    return
+
+        watcher = threading.Thread(target=poll, daemon=True)
+        watcher.start()
+        try:
+            yield self
+        finally:
+            done.set()
+            watcher.join()
+            if owned:
+                sock.close()
+
+    @classmethod
+    def _client_socket(cls, request) -> Tuple[Optional[socket.socket], bool]:
+        """
+        Сокет клиента и признак того, что его нужно закрыть после проверки.
+        gunicorn передает сокет в environ (gunicorn.socket). Иначе используется дескриптор
+        wsgi.input (fileno()), если поток его предоставляет: проверяется копия дескриптора.
+        У manage.py runserver поток ввода - LimitedStream без дескриптора, отмена при закрытии
+        соединения недоступна, расчет ограничивается только сроком (выводится предупреждение).
+        """
+        sock = request.META.get("gunicorn.socket")
+        if isinstance(sock, socket.socket):
+            return sock, False
+
+        stream = request.META.get("wsgi.input")
+        try:
+            fd = os.dup(stream.fileno())
+        except (AttributeError, OSError) as e:
+            cls._warn_no_socket(stream, e)
+            return None, False
+        try:
+            return socket.socket(fileno=fd), True
+        except OSError as e:
+            os.close(fd)
+            cls._warn_no_socket(stream, e)
+            return None, False
+
+    @classmethod
+    def _warn_no_socket(cls, stream, error: Exception):
+        """Предупреждение о недоступной отмене, один раз на процесс"""
+        if not cls._socket_warned:
+            cls._socket_warned = True
+            BASE_LOGGER.warning(
+                f"Сокет клиента недоступен ({type(stream).__name__}: {str(error) or type(error).__name__}), "
+                f"расчет при закрытии соединения не отменяется, только по сроку"
+            )
@@ -0,0 +1,545 @@
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+INFINITY = float("inf")
+
+
+class EngineError(Exception):
+    """
+    Встроенный движок не смог решить задачу (лимит итераций, вырожденный базис).
+    Сигнал для перехода на внешний решатель OR-Tools.
+    """
+
+
+class LinearProgram:
+    """
+    Линейная задача вида:
+        max (min) c·x,  lower <= x <= upper,  row_lower <= A·x <= row_upper.
+    Векторы хранятся массивами NumPy (float64), матрица ограничений - в формате CSR.
+    """
+
+    def __init__(self, objective, lower, upper, rows, row_lower, row_upper, maximize: bool = True):
+        self.objective = np.asarray(objective, dtype=np.float64)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.rows = sparse.csr_matrix(rows, dtype=np.float64)
+        self.row_lower = np.asarray(row_lower, dtype=np.float64)
+        self.row_upper = np.asarray(row_upper, dtype=np.float64)
+        self.maximize = maximize
+
+    @property
+    def num_variables(self) -> int:
+        return self.objective.shape[0]
+
+    @property
+    def num_rows(self) -> int:
+        return self.rows.shape[0]
+
+    def is_feasible(self, values, tol: float = 1e-6) -> bool:
+        """Точка удовлетворяет границам переменных и строк (допуск относительно модуля границы)"""
+        values = np.asarray(values, dtype=np.float64)
+        activity = self.rows @ values
+
+        def within(x, lower, upper):
+            with np.errstate(invalid="ignore"):
+                return bool(np.all(x >= lower - tol * (1.0 + np.abs(lower)))
+                            and np.all(x <= upper + tol * (1.0 + np.abs(upper))))
+
+        return within(values, self.lower, self.upper) and within(activity, self.row_lower, self.row_upper)
+
+    def activity_bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Наименьшее и наибольшее значение каждой строки A·x при lower <= x <= upper
+        (без учета остальных строк). Бесконечные границы переменных дают бесконечный диапазон.
+        """
+        # Произведения считаются только по хранимым коэффициентам, поэтому 0 * inf не возникает
+        positive = self.rows.multiply(self.rows > 0).tocsr()
+        negative = (self.rows - positive).tocsr()
+        negative.eliminate_zeros()
+
+        minimum = positive @ self.lower + negative @ self.upper
+        maximum = positive @ self.upper + negative @ self.lower
+        return minimum, maximum
+
+
+class LPSolution:
+    """
+    Результат решения линейной задачи.
+    iterations - число итераций решателя, None - решатель его не сообщает (ModelBuilder).
+    bound - лучшая оценка целевой функции (для целочисленных задач, по ней считается разрыв оптимальности).
+    backend и solve_time - решатель и время решения, с (заполняет GasDistributionService._solve).
+    """
+
+    def __init__(self, status: str, values: Optional[np.ndarray] = None,
+                 objective: Optional[float] = None, iterations: Optional[int] = None,
+                 sensitivity: Optional["SensitivityAnalysis"] = None,
+                 bound: Optional[float] = None):
+        self.status = status
+        self.values = values
+        self.objective = objective
+        self.iterations = iterations
+        self.sensitivity = sensitivity
+        self.bound = bound
+        self.backend = None
+        self.solve_time = None
+
+
+class SensitivityAnalysis:
+    """
+    Анализ чувствительности для оптимального базиса встроенного движка.
+    Все величины - в терминах исходной задачи (с учетом направления оптимизации):
+    двойственные оценки строк, приведенные стоимости переменных, диапазоны
+    коэффициентов целевой функции и границ строк, в которых базис остается оптимальным.
+    """
+
+    def __init__(self, state: "_SimplexState"):
+        self.state = state
+        self.program = state.program
+        self.sign = -1.0 if self.program.maximize else 1.0
+        n = self.program.num_variables
+        cost = np.zeros(state.size)
+        cost[:n] = self.sign * self.program.objective
+        self.reduced = state.reduced_costs(cost)
+        self.x_basic = state.basic_values()
+
+    def row_duals(self) -> np.ndarray:
+        """Изменение целевой функции на единицу активной границы строки (0 для неактивных строк)"""
+        n = self.program.num_variables
+        return self.sign * self.reduced[n:n + self.program.num_rows]
+
+    def reduced_costs(self) -> np.ndarray:
+        """Приведенные стоимости переменных (0 для базисных)"""
+        return self.sign * self.reduced[:self.program.num_variables]
+
+    def cost_range(self, direction) -> Tuple[float, float]:
+        """Диапазон t, при котором базис оптимален для целевой функции objective + t·direction"""
+        state = self.state
+        slope = np.zeros(state.size)
+        slope[:self.program.num_variables] = self.sign * np.asarray(direction, dtype=np.float64)
+        reduced_slope = state.reduced_costs(slope)
+
+        # Небазисная переменная на нижней границе требует r >= 0, на верхней - r <= 0
+        lower = (state.status == state.LOWER) | (state.status == state.FREE)
+        upper = (state.status == state.UPPER) | (state.status == state.FREE)
+        reduced = np.where(lower, np.maximum(self.reduced, 0.0), np.minimum(self.reduced, 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = -reduced / reduced_slope
+        tol = BoundedSimplexEngine.OPTIMALITY_TOL
+
+        t_max = min(
+            ratio[lower & (reduced_slope < -tol)].min(initial=np.inf),
+            ratio[upper & (reduced_slope > tol)].min(initial=np.inf),
+        )
+        t_min = max(
+            ratio[lower & (reduced_slope > tol)].max(initial=-np.inf),
+            ratio[upper & (reduced_slope < -tol)].max(initial=-np.inf),
+        )
+        return float(min(t_min, 0.0)), float(max(t_max, 0.0))
+
+    def objective_ranges(self) -> np.ndarray:
+        """Диапазоны коэффициентов целевой функции по переменным, массив (n, 2)"""
+        n = self.program.num_variables
+        ranges = np.empty((n, 2))
+        for j in range(n):
+            direction = np.zeros(n)
+            direction[j] = 1.0
+            ranges[j] = self.program.objective[j] + np.array(self.cost_range(direction))
+        return ranges
+
+    def bound_range(self, row: int, side: str) -> Optional[Tuple[float, float]]:
+        """
+        Диапазон значений границы строки (side - "lower" или "upper"), при котором базис
+        остается допустимым. None для бесконечной границы.
+        """
+        state = self.state
+        index = self.program.num_variables + row
+        bound = state.lower[index] if side == "lower" else state.upper[index]
+        if not np.isfinite(bound):
+            return None
+
+        if not self.is_active(row, side):
+            # Неактивная граница может двигаться до текущего значения строки
+            activity = self.state.solution()[index]
+            return (activity, np.inf) if side == "upper" else (-np.inf, activity)
+
+        # Активная граница: базисные переменные меняются вдоль столбца обратной матрицы базиса
+        column = state.inverse[:, row]
+        basis_lower, basis_upper = state.lower[state.basis], state.upper[state.basis]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_upper = (basis_upper - self.x_basic) / column
+            to_lower = (basis_lower - self.x_basic) / column
+        tol = BoundedSimplexEngine.PIVOT_TOL
+        positive, negative = column > tol, column < -tol
+        t_max = min(to_upper[positive].min(initial=np.inf), to_lower[negative].min(initial=np.inf))
+        t_min = max(to_lower[positive].max(initial=-np.inf), to_upper[negative].max(initial=-np.inf))
+        return bound + min(t_min, 0.0), bound + max(t_max, 0.0)
+
+    def is_active(self, row: int, side: str) -> bool:
+        """Граница строки активна: логическая переменная строки небазисная на этой границе"""
+        state = self.state
+        status = state.status[self.program.num_variables + row]
+        return status == state.FIXED or status == (state.LOWER if side == "lower" else state.UPPER)
+
+    def value_derivatives(self, row: int, side: str) -> np.ndarray:
+        """Изменение переменных на единицу изменения границы строки (нули для неактивной границы)"""
+        state = self.state
+        n = self.program.num_variables
+        derivatives = np.zeros(state.size)
+        if self.is_active(row, side):
+            derivatives[state.basis] = state.inverse[:, row]
+        return derivatives[:n]
+
+
+class ParametricSolution:
+    """
+    Результат параметрического анализа: отрезки (t_from, t_to, values) с постоянным решением.
+    """
+
+    def __init__(self, status: str, segments: Optional[List[Tuple[float, float, np.ndarray]]] = None,
+                 iterations: int = 0):
+        self.status = status
+        self.segments = segments or []
+        self.iterations = iterations
+
+
+class BoundedSimplexEngine:
+    """
+    Точный двухфазный симплекс-метод с двусторонними границами переменных.
+
+    Рассчитан на задачи с малым числом связующих строк (в стандартной модели их три:
+    газ, кокс, чугун): базис имеет размер m x m, а границы печей обрабатываются
+    без дополнительных строк. Логические переменные y = A·x несут границы строк,
+    искусственные переменные появляются только у строк, нарушенных в начальной точке.
+    Оценка столбцов и тест отношений выполняются векторно.
+    """
+
+    FEASIBILITY_TOL = 1e-6  # Допуск по нарушению границ (как у SCIP по умолчанию)
+    OPTIMALITY_TOL = 1e-9  # Допуск по приведенным стоимостям
+    PIVOT_TOL = 1e-11  # Минимальный модуль ведущего элемента
+    REFACTOR_EVERY = 32  # Период пересчета обратной матрицы базиса
+    DEGENERATE_STREAK = 20  # После стольких вырожденных шагов включается правило Бленда
+    CANDIDATES = 32  # Число кандидатов на вход в базис, перебираемых за одну оценку
+
+    @classmethod
+    def solve(cls, program: LinearProgram, max_iterations: Optional[int] = None,
+              sensitivity: bool = False, stop: Optional[Callable[[], bool]] = None) -> LPSolution:
+        """
+        Решение задачи. Возвращает LPSolution со статусом OPTIMAL, INFEASIBLE или UNBOUNDED,
+        при численных проблемах выбрасывает EngineError.
+        sensitivity - приложить анализ чувствительности для оптимального базиса.
+        stop - проверяется на каждой итерации; если вернул True, расчет прерывается
+        со статусом FEASIBLE (текущая допустимая точка фазы 2) или NOT_SOLVED (в фазе 1).
+        """
+        status, state, iterations = cls._optimize(program, max_iterations, stop)
+        if status not in ("OPTIMAL", "FEASIBLE"):
+            return LPSolution(status, iterations=iterations)
+
+        values = state.values()
+        return LPSolution(
+            status,
+            values=values,
+            objective=float(program.objective @ values),
+            iterations=iterations,
+            sensitivity=SensitivityAnalysis(state) if sensitivity and status == "OPTIMAL" else None
+        )
+
+    @classmethod
+    def sweep(cls, program: LinearProgram, direction, span: float,
+              max_iterations: Optional[int] = None) -> ParametricSolution:
+        """
+        Параметрический анализ по целевой функции: objective + t·direction, 0 <= t <= span.
+
+        После решения при t = 0 базис не пересчитывается заново: для текущего базиса
+        находится ближайшее t, при котором одна из приведенных стоимостей меняет знак,
+        и в этой точке базис улучшается по direction среди переменных с нулевой
+        приведенной стоимостью (оптимальная грань не меняется). Решение на отрезке
+        между точками излома постоянно, целевая функция линейна.
+        """
+        direction = np.asarray(direction, dtype=np.float64)
+        status, state, iterations = cls._optimize(program, max_iterations)
+        if status != "OPTIMAL":
+            return ParametricSolution(status, iterations=iterations)
+
+        n = program.num_variables
+        sign = -1.0 if program.maximize else 1.0
+        base = np.zeros(state.size)
+        base[:n] = sign * program.objective
+        slope = np.zeros(state.size)
+        slope[:n] = sign * direction
+
+        tol = cls.OPTIMALITY_TOL * (1.0 + np.abs(base).max() + span * np.abs(slope).max())
+        max_breakpoints = 10 * (n + program.num_rows) + 100
+        segments, t = [], 0.0
+
+        for _ in range(max_breakpoints):
+            reduced = state.reduced_costs(base + t * slope)
+            reduced_slope = state.reduced_costs(slope)
+
+            # Ближайшее t, при котором небазисная переменная становится выгодной
+            lower = (state.status == state.LOWER) | (state.status == state.FREE)
+            upper = (state.status == state.UPPER) | (state.status == state.FREE)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                steps = np.where(
+                    lower & (reduced_slope < -cls.OPTIMALITY_TOL), np.maximum(reduced, 0.0) / -reduced_slope,
+                    np.where(upper & (reduced_slope > cls.OPTIMALITY_TOL), np.maximum(-reduced, 0.0) / reduced_slope, np.inf)
+                )
+            end = min(span, t + steps.min())
+
+            if end > t or end >= span:
+                segments.append((t, end, state.values()))
+            if end >= span:
+                return ParametricSolution("OPTIMAL", segments, iterations)
+
+            # Точка излома: улучшение базиса по direction на оптимальной грани
+            allowed = np.abs(reduced + (end - t) * reduced_slope) <= tol
+            face_status, face_iterations = state.run(slope, 50 * state.size + 100, allowed)
+            iterations += face_iterations
+            if face_status != "OPTIMAL":
+                raise EngineError("Параметрический анализ: неограниченная грань")
+            t = end
+
+        raise EngineError("Параметрический анализ: превышено число точек излома")
+
+    @classmethod
+    def _optimize(cls, program: LinearProgram, max_iterations: Optional[int] = None,
+                  stop: Optional[Callable[[], bool]] = None):
+        """Двухфазный симплекс-метод. Возвращает статус, состояние и число итераций"""
+        n, m = program.num_variables, program.num_rows
+        if max_iterations is None:
+            max_iterations = 50 * (n + m) + 100
+
+        if np.any(program.lower > program.upper + cls.FEASIBILITY_TOL):
+            return "INFEASIBLE", None, 0
+        if np.any(program.row_lower > program.row_upper + cls.FEASIBILITY_TOL):
+            return "INFEASIBLE", None, 0
+
+        # Внутри решается задача минимизации
+        sign = -1.0 if program.maximize else 1.0
+        state = _SimplexState(program, sign * program.objective, cls)
+        state.stop = stop
+
+        # Фаза 1: минимизация суммы искусственных переменных
+        iterations = 0
+        if state.artificials.size:
+            cost = np.zeros(state.size)
+            cost[state.artificials] = 1.0
+            status, iterations = state.run(cost, max_iterations)
+            if status == "STOPPED":
+                return "NOT_SOLVED", state, iterations
+            if status != "OPTIMAL":
+                raise EngineError("Фаза 1 завершилась без оптимума")
+
+            infeasibility = state.solution()[state.artificials].sum()
+            bounds = np.concatenate([program.row_lower, program.row_upper])
+            bounds = np.abs(bounds[np.isfinite(bounds)])
+            scale = 1.0 + (bounds.max() if bounds.size else 0.0)
+            if infeasibility > cls.FEASIBILITY_TOL * scale:
+                return "INFEASIBLE", state, iterations
+
+            state.fix_artificials()
+
+        # Фаза 2: исходная целевая функция
+        cost = np.zeros(state.size)
+        cost[:n] = sign * program.objective
+        status, phase2_iterations = state.run(cost, max_iterations - iterations)
+        if status == "STOPPED":
+            status = "FEASIBLE"
+        return status, state, iterations + phase2_iterations
+
+
+class _SimplexState:
+    """
+    Состояние симплекс-метода: матрица системы A·x - y + D·w = 0, границы,
+    статусы небазисных переменных и обратная матрица базиса.
+    """
+
+    BASIC, LOWER, UPPER, FREE, FIXED = range(5)
+
+    def __init__(self, program: LinearProgram, cost: np.ndarray, engine):
+        self.engine = engine
+        self.stop = None  # Проверка прерывания расчета (см. BoundedSimplexEngine.solve)
+        self.program = program
+        n, m = program.num_variables, program.num_rows
+        self.m = m
+
+        lower, upper = program.lower, program.upper
+        finite_lower, finite_upper = np.isfinite(lower), np.isfinite(upper)
+
+        # Начальная точка: каждая переменная на границе, выгодной по целевой функции
+        at_upper = finite_upper & ((cost < 0) | ~finite_lower)
+        at_lower = finite_lower & ~at_upper
+        value = np.where(at_upper, upper, np.where(at_lower, lower, 0.0))
+        status = np.where(at_upper, self.UPPER, np.where(at_lower, self.LOWER, self.FREE))
+        status = np.where(lower == upper, self.FIXED, status)
+
+        activity = program.rows @ value
+        tol = engine.FEASIBILITY_TOL
+        feasible = (activity >= program.row_lower - tol) & (activity <= program.row_upper + tol)
+        violated = np.flatnonzero(~feasible)
+
+        # Логические переменные строк: базисные для выполненных строк, на границе - для нарушенных
+        target = np.where(activity < program.row_lower, program.row_lower, program.row_upper)
+        row_value = np.where(feasible, activity, target)
+        row_status = np.where(
+            feasible, self.BASIC,
+            np.where(program.row_lower == program.row_upper, self.FIXED,
+                     np.where(target == program.row_lower, self.LOWER, self.UPPER))
+        )
+
+        # Искусственные переменные только для нарушенных строк
+        gap = target[violated] - activity[violated]
+        artificial_columns = np.zeros((m, violated.size))
+        artificial_columns[violated, np.arange(violated.size)] = np.where(gap > 0, 1.0, -1.0)
+
+        self.matrix = np.hstack([program.rows.toarray(), -np.eye(m), artificial_columns])
+        self.lower = np.concatenate([lower, program.row_lower, np.zeros(violated.size)])
+        self.upper = np.concatenate([upper, program.row_upper, np.full(violated.size, np.inf)])
+        self.value = np.concatenate([value, row_value, np.abs(gap)])
+        self.status = np.concatenate([status, row_status, np.full(violated.size, self.BASIC)]).astype(np.int8)
+        self.size = self.matrix.shape[1]
+        self.artificials = n + m + np.arange(violated.size)
+
+        self.basis = n + np.arange(m)
+        self.basis[violated] = self.artificials
+        self._refactor()
+
+    def _refactor(self):
+        """Пересчет обратной матрицы базиса"""
+        try:
+            self.inverse = np.linalg.inv(self.matrix[:, self.basis])
+        except np.linalg.LinAlgError:
+            raise EngineError("Вырожденная матрица базиса")
+        self.pivots = 0
+
+    def fix_artificials(self):
+        """Закрепление искусственных переменных на нуле после фазы 1"""
+        self.upper[self.artificials] = 0.0
+        nonbasic = self.artificials[self.status[self.artificials] != self.BASIC]
+        self.status[nonbasic] = self.FIXED
+        self.value[nonbasic] = 0.0
+
+    def basic_values(self) -> np.ndarray:
+        """Значения базисных переменных из условия: матрица * значения = 0"""
+        nonbasic_value = np.where(self.status == self.BASIC, 0.0, self.value)
+        return self.inverse @ -(self.matrix @ nonbasic_value)
+
+    def solution(self) -> np.ndarray:
+        """Значения всех переменных"""
+        value = self.value.copy()
+        value[self.basis] = self.basic_values()
+        return value
+
+    def values(self) -> np.ndarray:
+        """Значения исходных переменных задачи с учетом их границ"""
+        n = self.program.num_variables
+        return np.clip(self.solution()[:n], self.program.lower, self.program.upper)
+
+    def reduced_costs(self, cost: np.ndarray) -> np.ndarray:
+        """Приведенные стоимости для текущего базиса"""
+        return cost - (cost[self.basis] @ self.inverse) @ self.matrix
+
+    def run(self, cost: np.ndarray, max_iterations: int, allowed: Optional[np.ndarray] = None):
+        """
+        Итерации симплекс-метода для заданной (минимизируемой) стоимости.
+        Переходы переменных на противоположную границу не меняют базис, поэтому
+        после расчета приведенных стоимостей кандидаты перебираются подряд,
+        пока не потребуется смена базиса.
+        allowed - маска переменных, которые могут входить в базис (по умолчанию все).
+        Возвращает статус (OPTIMAL, UNBOUNDED или STOPPED при прерывании через stop) и число итераций.
+        """
+        engine = self.engine
+        degenerate = 0
+        iteration = 0
+
+        while iteration < max_iterations:
+            if self.stop is not None and self.stop():
+                return "STOPPED", iteration
+            x_basic = self.basic_values()
+
+            # Приведенные стоимости через двойственные оценки базиса
+            reduced = self.reduced_costs(cost)
+            increase = ((self.status == self.LOWER) | (self.status == self.FREE)) & (reduced < -engine.OPTIMALITY_TOL)
+            decrease = ((self.status == self.UPPER) | (self.status == self.FREE)) & (reduced > engine.OPTIMALITY_TOL)
+            if allowed is not None:
+                increase &= allowed
+                decrease &= allowed
+            candidates = np.flatnonzero(increase | decrease)
+            if not candidates.size:
+                return "OPTIMAL", iteration
+
+            if degenerate <= engine.DEGENERATE_STREAK:
+                # Правило Данцига: лучшие кандидаты по убыванию модуля приведенной стоимости
+                score = -np.abs(reduced[candidates])
+                if candidates.size > engine.CANDIDATES:
+                    top = np.argpartition(score, engine.CANDIDATES)[:engine.CANDIDATES]
+                    candidates, score = candidates[top], score[top]
+                candidates = candidates[np.argsort(score, kind="stable")]
+            else:
+                # Правило Бленда: по возрастанию индекса
+                candidates = candidates[:1]
+
+            basis_lower, basis_upper = self.lower[self.basis], self.upper[self.basis]
+            for entering in candidates.tolist():
+                iteration += 1
+                direction = 1.0 if increase[entering] else -1.0
+                alpha = self.inverse @ self.matrix[:, entering]
+
+                # Тест отношений с учетом двусторонних границ
+                rate = -direction * alpha
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    limit = np.where(
+                        rate < -engine.PIVOT_TOL, (x_basic - basis_lower) / -rate,
+                        np.where(rate > engine.PIVOT_TOL, (basis_upper - x_basic) / rate, np.inf)
+                    )
+                limit = np.where(np.isnan(limit), np.inf, np.maximum(limit, 0.0))
+
+                step = self.upper[entering] - self.lower[entering]
+                leaving = None
+                if limit.size and limit.min() < step:
+                    step = limit.min()
+                    ties = np.flatnonzero(limit <= step + 1e-12)
+                    leaving = int(ties[np.argmax(np.abs(alpha[ties]))])
+
+                if not np.isfinite(step):
+                    return "UNBOUNDED", iteration
+
+                degenerate = degenerate + 1 if step < 1e-12 else 0
+
+                if leaving is None:
+                    # Переход небазисной переменной на противоположную границу
+                    self.status[entering] = self.UPPER if direction > 0 else self.LOWER
+                    self.value[entering] = self.upper[entering] if direction > 0 else self.lower[entering]
+                    x_basic = x_basic + rate * step
+                    if iteration >= max_iterations:
+                        break
+                    continue
+
+                self._pivot(entering, leaving, alpha, rate[leaving] < 0)
+                break
+
+        raise EngineError("Превышен лимит итераций симплекс-метода")
+
+    def _pivot(self, entering: int, leaving: int, alpha: np.ndarray, to_lower: bool):
+        """Смена базиса: entering входит на позицию leaving"""
+        out = self.basis[leaving]
+        if self.lower[out] == self.upper[out]:
+            self.status[out] = self.FIXED
+            self.value[out] = self.lower[out]
+        elif to_lower:
+            self.status[out] = self.LOWER
+            self.value[out] = self.lower[out]
+        else:
+            self.status[out] = self.UPPER
+            self.value[out] = self.upper[out]
+        self.basis[leaving] = entering
+        self.status[entering] = self.BASIC
+
+        self.pivots += 1
+        if self.pivots >= self.engine.REFACTOR_EVERY:
+            self._refactor()
+        else:
+            row = self.inverse[leaving] / alpha[leaving]
+            self.inverse -= np.outer(alpha, row)
+            self.inverse[leaving] = row
@@ -0,0 +1,158 @@
+import copy
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+class FurnaceArrays:
+    """
+    Параметры печей в виде массивов NumPy (float64), по одному массиву на поле.
+    Строится один раз из проверенных входных данных, производные коэффициенты
+    модели вычисляются векторно и переиспользуются при построении модели и подготовке результатов.
+    """
+
+    SCALAR_FIELDS = ["C_k", "C_pg", "V_pg_total", "K_total", "P_total"]
+    FURNACE_FIELDS = [
+        "V_pg_0", "V_pg_min", "V_pg_max", "K_0", "e",
+        "P_0", "S_0", "S_min", "S_max",
+        "delta_P_pg", "delta_P_k",
+        "delta_S_pg", "delta_S_k", "delta_S_p"
+    ]
+
+    SULFUR_ZERO_TOL = 1e-10  # Практически нулевой коэффициент влияния на серу
+
+    def __init__(self, data: Dict):
+        self.N = int(data["N"])
+        for field in self.SCALAR_FIELDS:
+            setattr(self, field, float(data[field]))
+        for field in self.FURNACE_FIELDS:
+            setattr(self, field, np.asarray(data[field], dtype=np.float64))
+        self._derive()
+
+    def replace(self, **fields) -> "FurnaceArrays":
+        """
+        Копия с замененными полями печей. Поля могут иметь форму (S, N) - по строке
+        на выборку коэффициентов, тогда все расчеты по печам выполняются для всех выборок сразу.
+        """
+        furnaces = copy.copy(self)
+        for field, value in fields.items():
+            setattr(furnaces, field, np.asarray(value, dtype=np.float64))
+        furnaces._derive()
+        return furnaces
+
+    def _derive(self):
+        """Производные коэффициенты модели"""
+        # Влияние ПГ на производство с учетом замены кокса, т/(м3/ч)
+        self.delta_P = self.delta_P_pg - self.e * self.delta_P_k
+        # Влияние ПГ на серу с учетом замены кокса, %/(м3/ч)
+        self.delta_S = self.delta_S_pg - self.e * self.delta_S_k
+        # Полное влияние ПГ на серу с учетом изменения производительности
+        self.sulfur_coeff = self.delta_S + self.delta_P * self.delta_S_p
+
+    def objective_coefficients(self, C_p: float) -> np.ndarray:
+        """Коэффициенты целевой функции по печам"""
+        return 0.5 * (self.e * self.C_k - self.C_pg) + 0.5 * C_p * self.delta_P
+
+    def objective_gradient(self, parameter: str) -> np.ndarray:
+        """Производная коэффициентов целевой функции по цене C_pg или C_k"""
+        if parameter == "C_pg":
+            return np.full(self.N, -0.5)
+        if parameter == "C_k":
+            return 0.5 * self.e
+        raise ValueError(f"Неизвестный параметр: {parameter}")
+
+    def sulfur_bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Границы расхода ПГ печей с учетом допустимого содержания серы"""
+        active = np.abs(self.sulfur_coeff) >= self.SULFUR_ZERO_TOL
+        coeff = np.where(active, self.sulfur_coeff, 1.0)
+
+        delta_min = (self.S_min - self.S_0) / coeff
+        delta_max = (self.S_max - self.S_0) / coeff
+
+        lower = np.where(active, self.V_pg_0 + np.minimum(delta_min, delta_max), -np.inf)
+        upper = np.where(active, self.V_pg_0 + np.maximum(delta_min, delta_max), np.inf)
+
+        return np.maximum(self.V_pg_min, lower), np.minimum(self.V_pg_max, upper)
+
+    def coke_consumption(self, gas: np.ndarray) -> np.ndarray:
+        """Расход кокса по печам при заданном расходе ПГ, т/ч"""
+        return self.K_0 + 0.001 * (self.V_pg_0 - gas) * self.e
+
+    def iron_production(self, gas: np.ndarray) -> np.ndarray:
+        """Производство чугуна по печам при заданном расходе ПГ, т/ч"""
+        return self.P_0 + (gas - self.V_pg_0) * self.delta_P
+
+    def total_coke_consumption(self, gas: np.ndarray):
+        """Расход кокса по цеху, т/ч"""
+        return self.K_0.sum(axis=-1) + 0.001 * (self.e * (self.V_pg_0 - gas)).sum(axis=-1)
+
+    def total_iron_production(self, gas: np.ndarray):
+        """Производство чугуна по цеху, т/ч"""
+        return self.P_0.sum(axis=-1) + (self.delta_P * (gas - self.V_pg_0)).sum(axis=-1)
+
+    def sulfur_content(self, gas: np.ndarray) -> np.ndarray:
+        """Содержание серы по печам при заданном расходе ПГ, %"""
+        return self.S_0 + (gas - self.V_pg_0) * self.delta_S
+
+
+class ResponseCurve:
+    """
+    Нелинейная характеристика печи по точкам: производство чугуна и (необязательно)
+    содержание серы в зависимости от расхода ПГ. Между точками значения интерполируются линейно.
+    Кривая производства должна быть вогнутой (прирост производства на единицу ПГ не растет).
+    """
+
+    def __init__(self, V_pg, P, S=None):
+        self.V_pg = np.asarray(V_pg, dtype=np.float64)
+        self.P = np.asarray(P, dtype=np.float64)
+        self.S = np.asarray(S, dtype=np.float64) if S is not None else None
+
+    def production(self, gas):
+        return np.interp(gas, self.V_pg, self.P)
+
+    def sulfur(self, gas):
+        return np.interp(gas, self.V_pg, self.S)
+
+    def sulfur_interval(self, S_min: float, S_max: float, V_pg_0: float):
+        """
+        Отрезок расхода ПГ, на котором содержание серы в [S_min, S_max]: по каждому участку кривой
+        находится допустимая часть, соседние части объединяются. Если отрезков несколько,
+        выбирается содержащий базовый расход или ближайший к нему. None - таких расходов нет.
+        """
+        v0, v1 = self.V_pg[:-1], self.V_pg[1:]
+        s0, s1 = self.S[:-1], self.S[1:]
+        ds = s1 - s0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Доля участка t, на которой S(t) = s0 + t·ds в границах
+            t_a, t_b = (S_min - s0) / ds, (S_max - s0) / ds
+        flat = ds == 0
+        t_low = np.where(flat, np.where((S_min <= s0) & (s0 <= S_max), 0.0, np.inf), np.minimum(t_a, t_b))
+        t_high = np.where(flat, np.where((S_min <= s0) & (s0 <= S_max), 1.0, -np.inf), np.maximum(t_a, t_b))
+        t_low, t_high = np.maximum(t_low, 0.0), np.minimum(t_high, 1.0)
+
+        intervals = []
+        for k in np.flatnonzero(t_low <= t_high):
+            low = v0[k] + t_low[k] * (v1[k] - v0[k])
+            high = v0[k] + t_high[k] * (v1[k] - v0[k])
+            if intervals and low <= intervals[-1][1]:
+                intervals[-1][1] = max(intervals[-1][1], high)
+            else:
+                intervals.append([low, high])
+        if not intervals:
+            return None
+        return min(intervals, key=lambda interval: max(interval[0] - V_pg_0, V_pg_0 - interval[1], 0.0))
+
+    def chord_error(self, left: float, right: float):
+        """
+        Наибольшее отклонение кривой производства от хорды на отрезке [left, right]
+        и точка, в которой оно достигается (в одной из заданных точек кривой).
+        """
+        inside = (self.V_pg > left) & (self.V_pg < right)
+        if not inside.any():
+            return 0.0, None
+        gas = self.V_pg[inside]
+        p_left, p_right = self.production(left), self.production(right)
+        chord = p_left + (gas - left) * (p_right - p_left) / (right - left)
+        deviation = np.abs(self.P[inside] - chord)
+        k = int(np.argmax(deviation))
+        return float(deviation[k]), float(gas[k])
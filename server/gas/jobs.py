@@ -0,0 +1,191 @@
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from gas.cache import CalculationCache
+from gas.deadline import Deadline
+from gas.models import CalculationJob
+from user.models import User
+
+from server.settings import ERROR_LOGGER
+
+
+class JobLimitError(ValueError):
+    """Превышен лимит одновременных заданий пользователя"""
+
+
+class CalculationJobQueue:
+    """
+    Очередь заданий асинхронного расчета в таблице CalculationJob.
+
+    Постановка: задание сохраняется со статусом PENDING, пока у пользователя не больше
+    GAS_JOB_USER_LIMIT незавершенных заданий. Обработка: обработчик забирает самое раннее
+    доступное задание через SELECT ... FOR UPDATE SKIP LOCKED и выполняет его вне транзакции.
+    Ошибки данных (ValueError, в том числе несовместность) завершают задание сразу,
+    прочие ошибки и зависшие задания повторяются с увеличивающейся задержкой до max_attempts.
+    """
+
+    ACTIVE = [CalculationJob.Status.PENDING, CalculationJob.Status.RUNNING]
+    FINISHED = [CalculationJob.Status.DONE, CalculationJob.Status.FAILED, CalculationJob.Status.EXPIRED]
+
+    @classmethod
+    def submit(cls, user: User, data: Dict, backend: Optional[str] = None, sensitivity: bool = False) -> CalculationJob:
+        """Постановка задания в очередь с проверкой лимита пользователя"""
+        with transaction.atomic():
+            # Блокировка строки пользователя: параллельные запросы одного пользователя проверяют лимит по очереди
+            User.objects.select_for_update().filter(pk=user.pk).first()
+            active = CalculationJob.objects.filter(user=user, status__in=cls.ACTIVE).count()
+            if active >= settings.GAS_JOB_USER_LIMIT:
+                raise JobLimitError(
+                    f"Превышен лимит одновременных заданий: {settings.GAS_JOB_USER_LIMIT}. "
+                    "Дождитесь завершения текущих расчетов"
+                )
+
+            return CalculationJob.objects.create(
+                user=user,
+                data=data,
+                backend=backend,
+                sensitivity=sensitivity,
+                max_attempts=settings.GAS_JOB_MAX_ATTEMPTS,
+                expires_at=timezone.now() + timedelta(seconds=settings.GAS_JOB_TTL),
+            )
+
+    @classmethod
+    def claim(cls, worker: str) -> Optional[CalculationJob]:
+        """Захват самого раннего доступного задания. Задания, заблокированные другими обработчиками, пропускаются"""
+        now = timezone.now()
+        with transaction.atomic():
+            job = (
+                CalculationJob.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=CalculationJob.Status.PENDING, available_at__lte=now, expires_at__gt=now)
+                .order_by("available_at", "id")
+                .first()
+            )
+            if job is None:
+                return None
+
+            job.status = CalculationJob.Status.RUNNING
+            job.worker = worker
+            job.started_at = now
+            job.attempts += 1
+            job.save(update_fields=["status", "worker", "started_at", "attempts"])
+        return job
+
+    @classmethod
+    def run(cls, job: CalculationJob):
+        """
+        Выполнение захваченного задания и запись результата.
+        Срок расчета - GAS_JOB_TIMEOUT, чтобы задание не было признано зависшим во время расчета.
+        """
+        try:
+            result = CalculationCache.calculate(
+                job.data, job.backend, job.sensitivity, deadline=Deadline(settings.GAS_JOB_TIMEOUT)
+            )
+        except ValueError as e:
+            cls._finish(job, CalculationJob.Status.FAILED, error=str(e))
+        except Exception as e:
+            ERROR_LOGGER.error(f"Ошибка задания расчета №{job.pk}: {str(e)}", exc_info=True)
+            cls._retry(job, "Внутренняя ошибка расчета")
+        else:
+            cls._finish(job, CalculationJob.Status.DONE, result=result)
+
+    @classmethod
+    def _finish(cls, job: CalculationJob, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        """
+        Запись результата. Условие по обработчику и номеру попытки не дает перезаписать задание,
+        которое уже признано зависшим и передано другому обработчику.
+        """
+        CalculationJob.objects.filter(
+            pk=job.pk, status=CalculationJob.Status.RUNNING, worker=job.worker, attempts=job.attempts
+        ).update(status=status, result=result, error=error, finished_at=timezone.now())
+
+    @classmethod
+    def _retry(cls, job: CalculationJob, error: str):
+        if job.attempts >= job.max_attempts:
+            cls._finish(job, CalculationJob.Status.FAILED, error=f"{error}. Исчерпано попыток: {job.attempts}")
+            return
+
+        CalculationJob.objects.filter(
+            pk=job.pk, status=CalculationJob.Status.RUNNING, worker=job.worker, attempts=job.attempts
+        ).update(status=CalculationJob.Status.PENDING, error=error, available_at=cls.retry_at(job.attempts))
+
+    @staticmethod
+    def retry_at(attempts: int):
+        """Экспоненциальная задержка перед повтором: GAS_JOB_RETRY_DELAY * 2^(попытка - 1)"""
+        return timezone.now() + timedelta(seconds=settings.GAS_JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+    @classmethod
+    def recover(cls) -> Dict:
+        """
+        Обслуживание очереди:
+        - задания в статусе RUNNING дольше GAS_JOB_TIMEOUT (обработчик завершился аварийно)
+          возвращаются в очередь или завершаются ошибкой, если попытки исчерпаны;
+        - не начатые до срока ожидания задания получают статус EXPIRED;
+        - завершенные задания старше GAS_JOB_RESULT_TTL удаляются.
+        """
+        now = timezone.now()
+        stale = CalculationJob.objects.filter(
+            status=CalculationJob.Status.RUNNING,
+            started_at__lt=now - timedelta(seconds=settings.GAS_JOB_TIMEOUT),
+        )
+
+        counts = {"requeued": 0, "failed": 0}
+        for job in stale.only("pk", "attempts", "max_attempts"):
+            # Условие по номеру попытки: задание могло завершиться, пока шла проверка
+            current = CalculationJob.objects.filter(
+                pk=job.pk, status=CalculationJob.Status.RUNNING, attempts=job.attempts
+            )
+            if job.attempts >= job.max_attempts:
+                counts["failed"] += current.update(
+                    status=CalculationJob.Status.FAILED,
+                    error=f"Превышено время выполнения. Исчерпано попыток: {job.attempts}",
+                    finished_at=now,
+                )
+            else:
+                counts["requeued"] += current.update(
+                    status=CalculationJob.Status.PENDING,
+                    error="Превышено время выполнения",
+                    available_at=cls.retry_at(job.attempts),
+                )
+
+        counts["expired"] = CalculationJob.objects.filter(
+            status=CalculationJob.Status.PENDING, expires_at__lte=now
+        ).update(status=CalculationJob.Status.EXPIRED, finished_at=now)
+
+        counts["deleted"], _ = CalculationJob.objects.filter(
+            status__in=cls.FINISHED, finished_at__lt=now - timedelta(seconds=settings.GAS_JOB_RESULT_TTL)
+        ).delete()
+        return counts
+
+    @classmethod
+    def process(cls, worker: str, once: bool = False, poll: float = 1.0, max_jobs: Optional[int] = None) -> int:
+        """
+        Цикл обработчика: забирает и выполняет задания, при пустой очереди ждет poll секунд.
+        Очередь обслуживается (recover) не реже чем раз в GAS_JOB_RECOVER_INTERVAL секунд
+        и при пустой очереди: под постоянной нагрузкой очередь не пустеет, а зависшие
+        и просроченные задания занимают лимит пользователей.
+        once - обработать доступные задания и выйти. Возвращает число выполненных заданий.
+        """
+        processed = 0
+        recovered = None
+        while max_jobs is None or processed < max_jobs:
+            if recovered is None or time.monotonic() - recovered >= settings.GAS_JOB_RECOVER_INTERVAL:
+                cls.recover()
+                recovered = time.monotonic()
+
+            job = cls.claim(worker)
+            if job is not None:
+                cls.run(job)
+                processed += 1
+                continue
+
+            cls.recover()
+            recovered = time.monotonic()
+            if once:
+                break
+            time.sleep(poll)
+        return processed
@@ -0,0 +1,393 @@
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from http.cookies import SimpleCookie
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class LoadTestError(ValueError):
+    """Ошибка описания сценария нагрузки или параметров запуска"""
+
+
+class HTTPClient:
+    """
+    Асинхронный клиент HTTP/1.1 на потоках asyncio: одно соединение keep-alive на сессию
+    (переоткрывается, если сервер его закрыл) и cookie по пути, как в браузере.
+    Тела запросов и ответов - JSON.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.cookies: Dict[str, Tuple[str, str]] = {}  # Имя -> (значение, путь)
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method: str, path: str, body: Optional[Dict] = None,
+                      token: Optional[str] = None) -> Tuple[int, Optional[object]]:
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Accept: application/json",
+            f"Content-Length: {len(payload)}",
+        ]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        if token is not None:
+            lines.append(f"Authorization: Bearer {token}")
+        cookies = [f"{name}={value}" for name, (value, prefix) in self.cookies.items() if path.startswith(prefix)]
+        if cookies:
+            lines.append(f"Cookie: {'; '.join(cookies)}")
+        message = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload
+
+        # Соединение, закрытое сервером между запросами, открывается заново один раз
+        for attempt in range(2):
+            reused = self._writer is not None
+            if not reused:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout
+                )
+            try:
+                self._writer.write(message)
+                await self._writer.drain()
+                status, headers, data = await asyncio.wait_for(self._response(), self.timeout)
+                break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if not reused or attempt:
+                    raise
+
+        for value in headers.get("set-cookie", []):
+            self._store_cookies(value)
+        if "close" in headers.get("connection", [""])[0].lower():
+            await self.close()
+
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+    async def _response(self):
+        status_line = await self._reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers: Dict[str, List[str]] = {}
+        while True:
+            line = (await self._reader.readuntil(b"\r\n")).decode("latin-1").rstrip("\r\n")
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers.setdefault(name.strip().lower(), []).append(value.strip())
+
+        if "chunked" in headers.get("transfer-encoding", [""])[0].lower():
+            chunks = []
+            while True:
+                size = int((await self._reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            return status, headers, b"".join(chunks)
+        if "content-length" in headers:
+            return status, headers, await self._reader.readexactly(int(headers["content-length"][0]))
+        if status in (204, 304) or 100 <= status < 200:
+            return status, headers, b""
+        headers["connection"] = ["close"]  # Тело до закрытия соединения
+        return status, headers, await self._reader.read()
+
+    def _store_cookies(self, header: str):
+        cookie = SimpleCookie()
+        cookie.load(header)
+        for name, morsel in cookie.items():
+            if morsel.value and morsel["max-age"] != "0":
+                self.cookies[name] = (morsel.value, morsel["path"] or "/")
+            else:
+                self.cookies.pop(name, None)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        self._reader = self._writer = None
+
+
+class LoadScenario:
+    """
+    Сценарий нагрузки (JSON, каталог loadtest/ в репозитории):
+    - stages - этапы [{"duration": с, "rate": новых сессий в секунду}], сессии приходят
+      пуассоновским потоком;
+    - max_sessions - наибольшее число одновременных сессий, сессии сверх него не начинаются
+      (считаются отклоненными);
+    - think_time - [от, до] пауза оператора между действиями, с;
+    - vary - относительный разброс базовых расходов ПГ в расчетах (чтобы ответы не брались из кэша);
+    - session - действия сессии по порядку: {"action", "repeat" (по умолчанию 1),
+      "probability" (по умолчанию 1)}; первое действие - register, login и остальные - после него.
+    """
+
+    ACTIONS = {
+        "register": ("POST", "/api/user/register/"),
+        "login": ("POST", "/api/user/login/"),
+        "refresh": ("POST", "/api/user/token/refresh/"),
+        "user_info": ("GET", "/api/user/info/"),
+        "default": ("GET", "/api/gas/default/"),
+        "calculate": ("POST", "/api/gas/calculate/"),
+        "history_list": ("GET", "/api/gas/history/"),
+        "history_post": ("POST", "/api/gas/history/"),
+        "history_delete": ("DELETE", "/api/gas/history/"),
+        "logout": ("POST", "/api/user/logout/"),
+    }
+
+    def __init__(self, data: Dict):
+        try:
+            self.name = str(data.get("name", "scenario"))
+            self.description = data.get("description", "")
+            self.stages = [(float(stage["duration"]), float(stage["rate"])) for stage in data["stages"]]
+            self.max_sessions = int(data.get("max_sessions", 100))
+            self.think_time = tuple(float(value) for value in data.get("think_time", [0.0, 0.0]))
+            self.vary = float(data.get("vary", 0.0))
+            self.session = [
+                (step["action"], int(step.get("repeat", 1)), float(step.get("probability", 1.0)))
+                for step in data["session"]
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            raise LoadTestError(f"Неверное описание сценария: {str(e)}")
+
+        if not self.stages or any(duration <= 0 or rate < 0 for duration, rate in self.stages):
+            raise LoadTestError("Этапы сценария: длительность больше нуля, частота не меньше нуля")
+        if self.max_sessions < 1:
+            raise LoadTestError("max_sessions должен быть не меньше 1")
+        if len(self.think_time) != 2 or not 0 <= self.think_time[0] <= self.think_time[1]:
+            raise LoadTestError("think_time - пара [от, до], 0 <= от <= до")
+        if not 0 <= self.vary < 1:
+            raise LoadTestError("vary должен быть в диапазоне [0, 1)")
+        unknown = sorted({action for action, _, _ in self.session} - set(self.ACTIONS))
+        if unknown:
+            raise LoadTestError(f"Неизвестные действия: {', '.join(unknown)}. Доступные: {', '.join(self.ACTIONS)}")
+        # Пользователь сессии создается регистрацией: вход возможен только после нее
+        if not self.session or self.session[0] != ("register", 1, 1.0):
+            raise LoadTestError("Сессия должна начинаться с register (один раз, probability 1)")
+        if any(action == "register" for action, _, _ in self.session[1:]):
+            raise LoadTestError("register допускается только первым действием сессии")
+
+    @classmethod
+    def from_file(cls, path: str) -> "LoadScenario":
+        try:
+            with open(path, encoding="utf-8") as file:
+                return cls(json.load(file))
+        except (OSError, ValueError) as e:
+            if isinstance(e, LoadTestError):
+                raise
+            raise LoadTestError(f"Не удалось прочитать сценарий {path}: {str(e)}")
+
+    @property
+    def duration(self) -> float:
+        return sum(duration for duration, _ in self.stages)
+
+
+class LoadTest:
+    """
+    Нагрузочный тест работающего сервера по сценарию LoadScenario.
+
+    Каждая сессия - оператор со своим пользователем (регистрируется с адресом loadtest+<запуск>-<номер>@example.com,
+    поэтому запускать тест нужно на отдельной базе), соединением и cookie. Сессии начинаются
+    пуассоновским потоком с частотой этапа, умноженной на scale. После последнего этапа начатые сессии
+    завершаются (не дольше drain секунд). Для каждого действия считаются число запросов, доля ошибок
+    (коды 4xx/5xx и сбои соединения), пропускная способность и p50/p95/p99 времени ответа.
+    Время измеряется клиентом в одном цикле asyncio: при перегрузке самого генератора оно растет,
+    поэтому генератор лучше запускать на отдельной машине или ядре.
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, scenario: LoadScenario, url: str, scale: float = 1.0, timeout: float = 30.0,
+                 drain: float = 60.0, seed: Optional[int] = None, data: Optional[Dict] = None):
+        address = urlsplit(url)
+        if address.scheme != "http" or not address.hostname:
+            raise LoadTestError(f"Нужен адрес вида http://host:port, получено {url}")
+        self.scenario = scenario
+        self.host = address.hostname
+        self.port = address.port or 80
+        self.scale = scale
+        self.timeout = timeout
+        self.drain = drain
+        self.random = random.Random(seed)
+        self.data = data  # Входные данные расчета до первого запроса default
+        self.run_id = uuid.uuid4().hex[:8]
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.sessions = {"started": 0, "completed": 0, "failed": 0, "rejected": 0, "unfinished": 0}
+
+    def run(self) -> Dict:
+        return asyncio.run(self._run())
+
+    async def _run(self) -> Dict:
+        active = set()
+        start = time.monotonic()
+        stage_end = start
+        for duration, rate in self.scenario.stages:
+            stage_end += duration
+            rate *= self.scale
+            while True:
+                delay = self.random.expovariate(rate) if rate > 0 else math.inf
+                if time.monotonic() + delay >= stage_end:
+                    await asyncio.sleep(max(0.0, stage_end - time.monotonic()))
+                    break
+                await asyncio.sleep(delay)
+                if len(active) >= self.scenario.max_sessions:
+                    self.sessions["rejected"] += 1
+                    continue
+                self.sessions["started"] += 1
+                task = asyncio.create_task(self._session(self.sessions["started"]))
+                active.add(task)
+                task.add_done_callback(active.discard)
+
+        if active:
+            _, pending = await asyncio.wait(set(active), timeout=self.drain)
+            for task in pending:
+                task.cancel()
+            self.sessions["unfinished"] = len(pending)
+            await asyncio.gather(*pending, return_exceptions=True)
+        elapsed = time.monotonic() - start
+        return self.report(elapsed)
+
+    async def _session(self, number: int):
+        client = HTTPClient(self.host, self.port, self.timeout)
+        state = {
+            "email": f"loadtest+{self.run_id}-{number}@example.com",
+            "password": f"Lt-{uuid.uuid4().hex}",
+            "access": None,
+            "data": self.data,
+            "result": None,
+            "calculate": None,
+            "history": [],
+        }
+        try:
+            for action, repeat, probability in self.scenario.session:
+                for _ in range(repeat):
+                    if self.random.random() >= probability:
+                        continue
+                    await getattr(self, f"_{action}")(client, state)
+                    if state["access"] is None:
+                        self.sessions["failed"] += 1
+                        return
+                    await asyncio.sleep(self.random.uniform(*self.scenario.think_time))
+            self.sessions["completed"] += 1
+        finally:
+            await client.close()
+
+    async def _call(self, action: str, client: HTTPClient, body: Optional[Dict] = None,
+                    token: Optional[str] = None, query: str = "") -> Tuple[int, Optional[object]]:
+        method, path = LoadScenario.ACTIONS[action]
+        start = time.perf_counter()
+        try:
+            status, data = await client.request(method, path + query, body, token)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+            status, data = 0, {"error": type(e).__name__}
+            await client.close()
+        latency = (time.perf_counter() - start) * 1000
+
+        self.samples.setdefault(action, []).append(latency)
+        statuses = self.statuses.setdefault(action, {})
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        if not 200 <= status < 400:
+            self.errors[action] = self.errors.get(action, 0) + 1
+        return status, data
+
+    async def _register(self, client: HTTPClient, state: Dict):
+        status, data = await self._call("register", client, {
+            "email": state["email"], "password": state["password"],
+            "first_name": "Нагрузка", "last_name": self.run_id,
+        })
+        state["access"] = data["access"] if status == 201 else None
+
+    async def _login(self, client: HTTPClient, state: Dict):
+        status, data = await self._call("login", client, {"email": state["email"], "password": state["password"]})
+        state["access"] = data["access"] if status == 200 else None
+
+    async def _refresh(self, client: HTTPClient, state: Dict):
+        status, data = await self._call("refresh", client)
+        if status == 200:
+            state["access"] = data["access"]
+
+    async def _user_info(self, client: HTTPClient, state: Dict):
+        await self._call("user_info", client, token=state["access"])
+
+    async def _default(self, client: HTTPClient, state: Dict):
+        status, data = await self._call("default", client)
+        if status == 200:
+            state["data"] = data
+
+    async def _calculate(self, client: HTTPClient, state: Dict):
+        if state["data"] is None:
+            await self._default(client, state)
+            if state["data"] is None:
+                return
+        data = dict(state["data"])
+        if self.scenario.vary:
+            low, high = data["V_pg_min"], data["V_pg_max"]
+            data["V_pg_0"] = [
+                min(max(value * (1 + self.random.uniform(-self.scenario.vary, self.scenario.vary)), low[j]), high[j])
+                for j, value in enumerate(data["V_pg_0"])
+            ]
+        status, result = await self._call("calculate", client, data)
+        if status == 200:
+            state["calculate"], state["result"] = data, result
+
+    async def _history_list(self, client: HTTPClient, state: Dict):
+        status, data = await self._call("history_list", client, token=state["access"])
+        if status == 200:
+            state["history"] = [item["id"] for item in data]
+
+    async def _history_post(self, client: HTTPClient, state: Dict):
+        if state["result"] is None:
+            return
+        await self._call("history_post", client, dict(state["result"], calculate=state["calculate"]), state["access"])
+
+    async def _history_delete(self, client: HTTPClient, state: Dict):
+        if not state["history"]:
+            return
+        history_id = state["history"].pop(self.random.randrange(len(state["history"])))
+        await self._call("history_delete", client, token=state["access"], query=f"?id={history_id}")
+
+    async def _logout(self, client: HTTPClient, state: Dict):
+        await self._call("logout", client, token=state["access"])
+
+    def report(self, elapsed: float) -> Dict:
+        endpoints = {action: self._summary(self.samples[action], self.errors.get(action, 0), self.statuses[action], elapsed)
+                     for action in LoadScenario.ACTIONS if action in self.samples}
+        samples = [latency for values in self.samples.values() for latency in values]
+        return {
+            "scenario": self.scenario.name,
+            "url": f"http://{self.host}:{self.port}",
+            "scale": self.scale,
+            "elapsed_s": round(elapsed, 3),
+            "sessions": self.sessions,
+            "endpoints": endpoints,
+            "total": self._summary(samples, sum(self.errors.values()), {}, elapsed) if samples else None,
+        }
+
+    @classmethod
+    def _summary(cls, samples: List[float], errors: int, statuses: Dict[str, int], elapsed: float) -> Dict:
+        ordered = sorted(samples)
+        summary = {
+            "requests": len(ordered),
+            "errors": errors,
+            "error_rate": round(errors / len(ordered), 4),
+            "throughput": round(len(ordered) / elapsed, 3) if elapsed > 0 else None,
+        }
+        for percentile in cls.PERCENTILES:
+            # Ближайший ранг: значение, не меньше которого percentile% выборки
+            summary[f"p{percentile}_ms"] = round(ordered[max(0, math.ceil(percentile / 100 * len(ordered)) - 1)], 3)
+        summary["max_ms"] = round(ordered[-1], 3)
+        if statuses:
+            summary["statuses"] = statuses
+        return summary
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from gas.backends import SolverBackendRegistry
+from gas.benchmarks import PipelineBenchmark
+
+
+class Command(BaseCommand):
+    """
+    Замер этапов расчета (проверка, построение модели, решение каждым решателем, результаты,
+    ответ JSON, сохранение истории) на синтетических данных. Результат сохраняется в JSON
+    для сравнения командой benchmark_compare.
+    """
+
+    help = "Замер производительности этапов расчета"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=PipelineBenchmark.SIZES,
+                            help="Количество печей в синтетических задачах")
+        parser.add_argument("--repeats", type=int, default=5, help="Количество повторов замера")
+        parser.add_argument("--backends", nargs="+", default=None,
+                            help="Решатели (по умолчанию все доступные)")
+        parser.add_argument("--no-db", action="store_true",
+                            help="Не замерять сохранение истории (без временной базы данных)")
+        parser.add_argument("--output", default="benchmark.json", help="Файл результата JSON")
+
+    def handle(self, *args, **options):
+        for name in options["backends"] or []:
+            if not SolverBackendRegistry.is_available(name):
+                raise CommandError(f"Решатель {name} недоступен")
+
+        benchmark = PipelineBenchmark(
+            sizes=options["sizes"],
+            repeats=options["repeats"],
+            backends=options["backends"],
+            persist=not options["no_db"],
+            log=self.stdout.write,
+        )
+        report = benchmark.run()
+        for stage, reason in report["skipped"].items():
+            self.stdout.write(self.style.WARNING(f"Пропущено {stage}: {reason}"))
+
+        with open(options["output"], "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Результат сохранен: {options['output']}"))
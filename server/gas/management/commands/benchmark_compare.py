@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from gas.benchmarks import PipelineBenchmark
+
+
+class Command(BaseCommand):
+    """
+    Сравнение двух результатов команды benchmark по медианам этапов.
+    Завершается ошибкой, если есть регрессии сверх порога.
+    """
+
+    help = "Сравнение замеров производительности и поиск регрессий"
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline", help="Базовый результат benchmark (JSON)")
+        parser.add_argument("current", help="Новый результат benchmark (JSON)")
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="Допустимое замедление этапа, доля (0.2 - 20%%)")
+        parser.add_argument("--min-ms", type=float, default=0.05,
+                            help="Замедление меньше этого значения, мс, не считается регрессией")
+
+    def handle(self, *args, **options):
+        reports = []
+        for path in (options["baseline"], options["current"]):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    reports.append(json.load(file))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Не удалось прочитать {path}: {str(e)}")
+
+        report = PipelineBenchmark.compare(*reports, threshold=options["threshold"], min_ms=options["min_ms"])
+
+        for change in report["improvements"]:
+            self.stdout.write(self.style.SUCCESS(f"Быстрее:   {self.describe(change)}"))
+        for change in report["regressions"]:
+            self.stdout.write(self.style.ERROR(f"Медленнее: {self.describe(change)}"))
+        for entry in report["missing"]:
+            self.stdout.write(self.style.WARNING(f"Нет в новом замере: N={entry['N']} {self.label(entry)}"))
+        self.stdout.write(f"Без изменений: {report['unchanged']}, новых этапов: {len(report['new'])}")
+
+        if report["regressions"]:
+            raise CommandError(f"Регрессии производительности: {len(report['regressions'])}")
+
+    @staticmethod
+    def label(entry) -> str:
+        return f"{entry['stage']}:{entry['backend']}" if entry["backend"] else entry["stage"]
+
+    @classmethod
+    def describe(cls, change) -> str:
+        return (f"N={change['N']:<6} {cls.label(change):<14} {change['baseline_ms']:.3f} -> "
+                f"{change['current_ms']:.3f} мс (x{change['ratio']})")
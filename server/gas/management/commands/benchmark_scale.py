@@ -0,0 +1,77 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from gas.cache import CalculationCache
+from gas.services import SyntheticInputValues
+from gas.views import CalculateAPIView
+
+
+class Command(BaseCommand):
+    """
+    Проверка целевой пропускной способности расчета для больших групп печей.
+    Синтетический запрос проходит весь путь API (разбор тела, проверка, расчет, ответ в JSON)
+    в форматах application/json и application/x-ndjson. Кэш очищается перед каждым замером.
+    """
+
+    help = "Замер времени запрос-ответ /api/gas/calculate/ для тысяч печей"
+
+    # Цели по умолчанию: время запрос-ответ (мс) по количеству печей
+    TARGETS = {1000: 250, 10000: 1000}
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=sorted(self.TARGETS),
+                            help="Количество печей в синтетических запросах")
+        parser.add_argument("--target-ms", type=float, default=None,
+                            help="Единая цель по времени для всех размеров, мс")
+        parser.add_argument("--repeats", type=int, default=5, help="Количество повторов замера")
+        parser.add_argument("--chunk", type=int, default=1000, help="Печей в одной строке NDJSON")
+        parser.add_argument("--backend", default=None, help="Решатель (по умолчанию GAS_SOLVER_BACKEND)")
+
+    def handle(self, *args, **options):
+        view = CalculateAPIView.as_view()
+        factory = RequestFactory()
+        path = "/api/gas/calculate/" + (f"?backend={options['backend']}" if options["backend"] else "")
+        failed = []
+
+        for N in options["sizes"]:
+            data = SyntheticInputValues.get_values(N)
+            target = options["target_ms"] or self.TARGETS.get(N)
+
+            for content_type, body in (("application/json", json.dumps(data)),
+                                       ("application/x-ndjson", self.ndjson(data, options["chunk"]))):
+                timings = []
+                for _ in range(options["repeats"]):
+                    CalculationCache.clear()
+                    request = factory.post(path, body, content_type=content_type)
+                    start = time.perf_counter()
+                    response = view(request)
+                    response.render()
+                    timings.append((time.perf_counter() - start) * 1000)
+                    if response.status_code != 200:
+                        raise CommandError(f"N={N}: ответ {response.status_code} {response.content[:200]}")
+
+                median = statistics.median(timings)
+                line = (f"N={N:<7} {content_type:<22} медиана {median:9.1f} мс, "
+                        f"максимум {max(timings):9.1f} мс, тело {len(body) / 1e6:6.2f} МБ")
+                if target is None:
+                    self.stdout.write(line)
+                elif median <= target:
+                    self.stdout.write(self.style.SUCCESS(f"{line} (цель {target:g} мс)"))
+                else:
+                    self.stdout.write(self.style.ERROR(f"{line} (цель {target:g} мс)"))
+                    failed.append(f"N={N} {content_type}")
+
+        if failed:
+            raise CommandError(f"Цели не достигнуты: {', '.join(failed)}")
+
+    @staticmethod
+    def ndjson(data, chunk: int) -> bytes:
+        """Тело NDJSON: скалярные поля первой строкой, списки по печам - порциями"""
+        arrays = {key: value for key, value in data.items() if isinstance(value, list)}
+        lines = [{key: value for key, value in data.items() if key not in arrays}]
+        for start in range(0, data["N"], chunk):
+            lines.append({key: value[start:start + chunk] for key, value in arrays.items()})
+        return "\n".join(json.dumps(line) for line in lines).encode("utf-8")
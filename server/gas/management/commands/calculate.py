@@ -0,0 +1,41 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from gas.backends import SolverBackendRegistry
+from gas.serializers import CalculateCreateSerializer
+from gas.services import DefaultInputValues, GasDistributionService
+
+
+class Command(BaseCommand):
+    """
+    Расчет распределения из командной строки.
+    Входные данные - JSON-файл в формате API /api/gas/calculate/ (по умолчанию - заготовленные значения).
+    """
+
+    help = "Расчет оптимального распределения природного газа"
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", nargs="?", default=None, help="JSON-файл с входными данными ('-' - stdin)")
+        parser.add_argument("--backend", choices=SolverBackendRegistry.choices(), default=None,
+                            help="Решатель (по умолчанию GAS_SOLVER_BACKEND)")
+
+    def handle(self, *args, **options):
+        if options["input"] is None:
+            values = DefaultInputValues.get_default_values()
+        elif options["input"] == "-":
+            values = json.load(sys.stdin)
+        else:
+            with open(options["input"], encoding="utf-8") as file:
+                values = json.load(file)
+
+        serializer = CalculateCreateSerializer(data=values)
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors, ensure_ascii=False))
+
+        try:
+            result = GasDistributionService.calculate_distribution(serializer.validated_data, options["backend"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
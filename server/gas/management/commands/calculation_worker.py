@@ -0,0 +1,39 @@
+import os
+import socket
+
+from django.core.management.base import BaseCommand
+from gas.jobs import CalculationJobQueue
+
+
+class Command(BaseCommand):
+    """
+    Обработчик очереди асинхронных расчетов (CalculationJob).
+    Можно запускать несколько экземпляров на разных узлах: задания распределяются
+    через SELECT ... FOR UPDATE SKIP LOCKED без внешнего брокера.
+    """
+
+    help = "Обработка очереди асинхронных расчетов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default=None,
+                            help="Имя обработчика (по умолчанию <узел>:<pid>)")
+        parser.add_argument("--poll", type=float, default=1.0,
+                            help="Пауза при пустой очереди, с")
+        parser.add_argument("--once", action="store_true",
+                            help="Обработать доступные задания и завершиться")
+        parser.add_argument("--max-jobs", type=int, default=None,
+                            help="Завершиться после указанного числа заданий")
+
+    def handle(self, *args, **options):
+        name = options["name"] or f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Обработчик {name} запущен")
+
+        try:
+            processed = CalculationJobQueue.process(
+                name, once=options["once"], poll=options["poll"], max_jobs=options["max_jobs"]
+            )
+        except KeyboardInterrupt:
+            self.stdout.write(f"Обработчик {name} остановлен")
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Обработчик {name} завершен, выполнено заданий: {processed}"))
@@ -0,0 +1,70 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from gas.backends import SolverBackendRegistry, SolverCalibration
+from gas.furnaces import FurnaceArrays
+from gas.services import (GasDistributionService,
+                          MultiPeriodDistributionService, SyntheticInputValues)
+
+
+class Command(BaseCommand):
+    """
+    Локальная калибровка решателей для режима auto.
+    Замеряет время решения синтетических задач разного размера каждым доступным решателем
+    и сохраняет таблицу в GAS_SOLVER_CALIBRATION_FILE.
+    """
+
+    help = "Калибровка решателей: замер времени решения для режима auto"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[8, 20, 100, 1000, 10000],
+                            help="Количество печей в синтетических задачах")
+        parser.add_argument("--periods", nargs="+", type=int, default=[24, 168],
+                            help="Количество часов в синтетических многопериодных задачах")
+        parser.add_argument("--period-furnaces", type=int, default=20,
+                            help="Количество печей в многопериодных задачах")
+        parser.add_argument("--repeats", type=int, default=5, help="Количество повторов замера")
+        parser.add_argument("--backends", nargs="+", default=None,
+                            help="Решатели для калибровки (по умолчанию все доступные)")
+
+    def handle(self, *args, **options):
+        backends = options["backends"] or SolverBackendRegistry.available()
+        entries = []
+
+        for N in options["sizes"]:
+            program = GasDistributionService._build_linear_program(FurnaceArrays(SyntheticInputValues.get_values(N)))
+            entries += self.measure(program, backends, options["repeats"], f"N={N}")
+
+        N = options["period_furnaces"]
+        data = SyntheticInputValues.get_values(N)
+        for T in options["periods"]:
+            periods = SyntheticInputValues.get_periods(data, T)
+            furnaces = FurnaceArrays(data)
+            program = MultiPeriodDistributionService._build_multi_period_program(
+                furnaces, MultiPeriodDistributionService._periods(furnaces, periods), periods["ramp"]
+            )
+            entries += self.measure(program, backends, options["repeats"], f"N={N}xT={T}")
+
+        SolverCalibration.save(entries)
+        self.stdout.write(self.style.SUCCESS(f"Таблица калибровки сохранена: {SolverCalibration.path()}"))
+
+    def measure(self, program, backends, repeats, label):
+        """Медианное время решения задачи каждым подходящим решателем"""
+        entries = []
+        for name in backends:
+            backend = SolverBackendRegistry.get(name)
+            if not backend.supports(program):
+                continue
+
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                backend.solve(program)
+                timings.append(time.perf_counter() - start)
+
+            seconds = statistics.median(timings)
+            entries.append(dict(backend=name, variables=program.num_variables,
+                                rows=program.num_rows, seconds=seconds))
+            self.stdout.write(f"{label:<12} {name:<8} {seconds * 1000:10.3f} мс")
+        return entries
@@ -0,0 +1,69 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from gas.loadtest import LoadScenario, LoadTest, LoadTestError
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный тест работающего сервера по сценарию из каталога loadtest/ (или файлу JSON):
+    регистрация и вход, обновление токена, входные значения по умолчанию, расчет, история.
+    Для каждого метода выводятся число запросов, доля ошибок, пропускная способность и p50/p95/p99.
+    """
+
+    help = "Нагрузочный тест API по сценарию (асинхронные HTTP-запросы к работающему серверу)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenario", nargs="?", default="operators",
+                            help="Имя сценария из loadtest/ или путь к файлу JSON")
+        parser.add_argument("--url", default="http://127.0.0.1:7000", help="Адрес сервера")
+        parser.add_argument("--scale", type=float, default=1.0, help="Множитель частоты новых сессий всех этапов")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Время ожидания ответа, с")
+        parser.add_argument("--drain", type=float, default=60.0,
+                            help="Сколько ждать завершения начатых сессий после последнего этапа, с")
+        parser.add_argument("--seed", type=int, default=None, help="Начальное значение генератора случайных чисел")
+        parser.add_argument("--max-error-rate", type=float, default=None,
+                            help="Завершиться ошибкой, если общая доля ошибок больше этого значения")
+        parser.add_argument("--output", default=None, help="Сохранить отчет в JSON")
+
+    def handle(self, *args, **options):
+        path = options["scenario"]
+        if not os.path.exists(path):
+            path = os.path.join(settings.BASE_DIR, "loadtest", f"{options['scenario']}.json")
+
+        try:
+            scenario = LoadScenario.from_file(path)
+            test = LoadTest(scenario, options["url"], scale=options["scale"], timeout=options["timeout"],
+                            drain=options["drain"], seed=options["seed"])
+        except LoadTestError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Сценарий {scenario.name}: {scenario.duration:g} с, этапы "
+                          + ", ".join(f"{duration:g} с по {rate * options['scale']:g} сессий/с"
+                                      for duration, rate in scenario.stages))
+        report = test.run()
+
+        sessions = report["sessions"]
+        self.stdout.write(f"Сессий: начато {sessions['started']}, завершено {sessions['completed']}, "
+                          f"прервано {sessions['failed']}, не завершено {sessions['unfinished']}, "
+                          f"отклонено {sessions['rejected']} (max_sessions)")
+        self.stdout.write(f"{'Метод':<16}{'запросов':>9}{'ошибок':>9}{'запр/с':>9}"
+                          f"{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}")
+        for name, summary in list(report["endpoints"].items()) + [("всего", report["total"])]:
+            if summary is None:
+                continue
+            line = (f"{name:<16}{summary['requests']:>9}{summary['error_rate']:>9.1%}{summary['throughput']:>9.2f}"
+                    f"{summary['p50_ms']:>10.1f}{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}")
+            self.stdout.write(self.style.ERROR(line) if summary["errors"] else line)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+        total = report["total"]
+        if total is None:
+            raise CommandError("Не выполнено ни одного запроса")
+        if options["max_error_rate"] is not None and total["error_rate"] > options["max_error_rate"]:
+            raise CommandError(f"Доля ошибок {total['error_rate']:.1%} больше {options['max_error_rate']:.1%}")
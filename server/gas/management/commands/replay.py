@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from gas.backends import SolverBackendRegistry
+from gas.capture import TrafficCapture, TrafficReplay
+
+
+class Command(BaseCommand):
+    """
+    Повторный расчет запросов, записанных TrafficCaptureMiddleware (GAS_CAPTURE_RATE > 0),
+    текущей версией расчета. Выводит процентили времени расчета (и записанного времени ответа)
+    и запросы, результат которых отличается от записанного; при расхождениях завершается ошибкой.
+    """
+
+    help = "Повторный расчет записанных запросов /api/gas/calculate/ и сравнение результатов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*",
+                            help="Файлы записи NDJSON (по умолчанию файлы всех процессов рядом с GAS_CAPTURE_FILE с предыдущими)")
+        parser.add_argument("--concurrency", type=int, default=1, help="Число одновременных расчетов")
+        parser.add_argument("--backend", default=None,
+                            help="Решатель для всех запросов (по умолчанию - записанный в запросе)")
+        parser.add_argument("--tolerance", type=float, default=1e-6,
+                            help="Допустимое относительное отличие целевой функции и расхода ПГ")
+        parser.add_argument("--limit", type=int, default=None, help="Повторить только первые limit запросов")
+        parser.add_argument("--output", default=None, help="Сохранить отчет в JSON")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency должен быть не меньше 1")
+        if options["backend"] is not None and options["backend"] not in SolverBackendRegistry.choices():
+            raise CommandError(f"Неизвестный решатель {options['backend']}: {', '.join(SolverBackendRegistry.choices())}")
+
+        paths = options["paths"] or TrafficCapture.corpus()
+        if not paths:
+            raise CommandError("Нет записанных запросов: включите запись (GAS_CAPTURE_RATE) или укажите файлы")
+        try:
+            entries = list(TrafficCapture.read(paths))
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Не удалось прочитать запись: {str(e)}")
+        entries = entries[:options["limit"]] if options["limit"] is not None else entries
+        if not entries:
+            raise CommandError("Файлы записи пусты")
+
+        report = TrafficReplay(entries, options["concurrency"], options["backend"], options["tolerance"]).run()
+
+        self.stdout.write(f"Запросов: {report['requests']} (сравнивается {report['compared']}), "
+                          f"потоков: {report['concurrency']}, {report['throughput']} запросов/с")
+        for label, key in (("Расчет сейчас", "latency_ms"), ("Ответ при записи", "recorded_latency_ms")):
+            latency = report[key]
+            self.stdout.write(f"{label:<17} p50 {latency['p50']:9.2f} мс, p90 {latency['p90']:9.2f} мс, "
+                              f"p99 {latency['p99']:9.2f} мс, максимум {latency['max']:9.2f} мс")
+        for item in report["differences"]:
+            self.stdout.write(self.style.ERROR(
+                f"Запрос {item['index']} ({item['captured_at']}, N={item['N']}): {item['difference']}"
+            ))
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+        if report["differences"]:
+            raise CommandError(f"Результаты отличаются от записанных: {len(report['differences'])}")
+        self.stdout.write(self.style.SUCCESS("Все результаты совпадают с записанными"))
@@ -0,0 +1,41 @@
+import os
+from multiprocessing.connection import Listener
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from gas.pool import SolverPool, SolverPoolServer
+
+
+class Command(BaseCommand):
+    """
+    Запуск долгоживущего пула процессов-решателей.
+    Веб-процессы передают в него расчеты по адресу GAS_SOLVER_POOL_ADDRESS.
+    """
+
+    help = "Пул процессов-решателей с прогретым OR-Tools"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Число процессов (по умолчанию GAS_SOLVER_POOL_WORKERS или число ядер)")
+
+    def handle(self, *args, **options):
+        if not SolverPool.enabled():
+            raise CommandError("Не задан адрес пула решателей GAS_SOLVER_POOL_ADDRESS")
+
+        address = SolverPool.address()
+        if isinstance(address, str) and os.path.exists(address):
+            # Сокет, оставшийся после аварийного завершения
+            os.unlink(address)
+
+        server = SolverPoolServer(options["workers"])
+        server.warm()
+        self.stdout.write(f"Процессы-решатели запущены и прогреты: {server.workers}")
+
+        try:
+            with Listener(address, authkey=SolverPool.authkey()) as listener:
+                self.stdout.write(self.style.SUCCESS(f"Пул решателей принимает расчеты: {settings.GAS_SOLVER_POOL_ADDRESS}"))
+                server.serve(listener)
+        except KeyboardInterrupt:
+            self.stdout.write("Пул решателей остановлен")
+        finally:
+            server.shutdown()
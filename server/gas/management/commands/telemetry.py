@@ -0,0 +1,62 @@
+import json
+import queue
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from gas.backends import SolverBackendRegistry
+from gas.serializers import CalculateCreateSerializer
+from gas.services import DefaultInputValues
+from gas.telemetry import (TelemetryFileSource, TelemetryOptimizer,
+                           TelemetrySocketSource)
+
+
+class Command(BaseCommand):
+    """
+    Прием потока измерений печей и пересчет рекомендации при существенных изменениях.
+    Рекомендация доступна по GET /api/gas/calculate/telemetry/.
+    """
+
+    help = "Пересчет распределения по потоку измерений печей"
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument("--file", default=None, help="Файл NDJSON, дописываемый системой управления")
+        source.add_argument("--socket", default=None, help="Путь Unix-сокета или host:port для приема NDJSON")
+        parser.add_argument("--base", default=None,
+                            help="JSON-файл с входными данными в формате /api/gas/calculate/ (по умолчанию - заготовленные значения)")
+        parser.add_argument("--from-start", action="store_true",
+                            help="Читать файл с начала, а не только новые строки")
+        parser.add_argument("--backend", choices=SolverBackendRegistry.choices(), default=None,
+                            help="Решатель (по умолчанию GAS_TELEMETRY_BACKEND)")
+
+    def handle(self, *args, **options):
+        if options["base"] is None:
+            values = DefaultInputValues.get_default_values()
+        else:
+            with open(options["base"], encoding="utf-8") as file:
+                values = json.load(file)
+
+        serializer = CalculateCreateSerializer(data=values)
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors, ensure_ascii=False))
+
+        lines, stop = queue.Queue(), threading.Event()
+        if options["file"]:
+            source = TelemetryFileSource(options["file"], lines, stop, from_start=options["from_start"])
+        else:
+            try:
+                source = TelemetrySocketSource(options["socket"], lines)
+            except OSError as e:
+                raise CommandError(f"Не удалось открыть сокет {options['socket']}: {str(e)}")
+        source.start()
+        self.stdout.write(f"Прием измерений: {options['file'] or options['socket']}")
+
+        optimizer = TelemetryOptimizer(serializer.validated_data, options["backend"])
+        try:
+            optimizer.run(lines, stop)
+        except KeyboardInterrupt:
+            self.stdout.write(f"Прием измерений остановлен, пересчетов: {optimizer.version}")
+        finally:
+            stop.set()
+            if isinstance(source, TelemetrySocketSource):
+                source.shutdown()
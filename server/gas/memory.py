@@ -0,0 +1,180 @@
+import os
+import random
+import threading
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+
+class MemoryProfiler:
+    """
+    Выборочный замер памяти запросов через tracemalloc (gas.middleware.MemoryProfilerMiddleware).
+
+    Для доли GAS_MEMORY_RATE запросов на время обработки включается tracemalloc: запоминается
+    наибольший объем выделенной памяти Python (peak), объем выделенного за запрос и не освобожденного
+    к его концу (retained - кэши, шаблоны моделей, утечки) с местами выделения, и прирост RSS процесса.
+    Память решателей OR-Tools (C++) tracemalloc не видит, она заметна только по приросту RSS.
+
+    В процессе одновременно замеряется один запрос: остальные выбранные в это время запросы
+    пропускаются (skipped). Выделения других потоков за время замера учитываются в замеряемом
+    запросе, поэтому при многопоточном сервере значения - оценка сверху. Если tracemalloc уже включен
+    (PYTHONTRACEMALLOC), запросы не замеряются. Статистика своя у каждого процесса.
+    """
+
+    MAX_SITES = 1000  # Мест выделения в статистике процесса, при превышении остаются самые большие
+    SITES_PER_REQUEST = 50  # Мест выделения, учитываемых из одного запроса
+
+    _sampling = threading.Lock()
+    _lock = threading.Lock()
+    _endpoints: Dict[Tuple[str, str], list] = {}
+    _sites: Dict[Tuple[str, ...], list] = {}
+    _samples = 0
+    _skipped = 0
+    _rss = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return settings.GAS_MEMORY_RATE > 0
+
+    @staticmethod
+    def sampled() -> bool:
+        return random.random() < settings.GAS_MEMORY_RATE
+
+    @staticmethod
+    def rss() -> Optional[int]:
+        """Резидентная память процесса, байт (Linux), None - недоступно"""
+        try:
+            with open("/proc/self/statm") as file:
+                return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    @classmethod
+    def start(cls) -> bool:
+        """Начало замера; False - замер невозможен (идет замер другого запроса или tracemalloc уже включен)"""
+        if not cls._sampling.acquire(blocking=False):
+            with cls._lock:
+                cls._skipped += 1
+            return False
+        if tracemalloc.is_tracing():
+            cls._sampling.release()
+            with cls._lock:
+                cls._skipped += 1
+            return False
+        cls._rss = cls.rss()
+        tracemalloc.start(settings.GAS_MEMORY_FRAMES)
+        return True
+
+    @classmethod
+    def finish(cls, endpoint: str, method: str) -> Dict:
+        """Завершение замера, начатого start: показатели запроса и запись в статистику процесса"""
+        try:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+        finally:
+            tracemalloc.stop()
+            rss_before, rss_after = cls._rss, cls.rss()
+            cls._sampling.release()
+
+        statistics = snapshot.statistics("traceback")
+        sites = [
+            {"traceback": [str(frame) for frame in stat.traceback], "size": stat.size, "count": stat.count}
+            for stat in statistics[:cls.SITES_PER_REQUEST]
+        ]
+        sample = {
+            "peak": peak,
+            "retained": sum(stat.size for stat in statistics),
+            "rss_delta": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+            "sites": sites,
+        }
+        cls.observe(endpoint, method, sample)
+        return sample
+
+    @classmethod
+    def observe(cls, endpoint: str, method: str, sample: Dict):
+        over_budget = cls.over_budget(sample)
+        with cls._lock:
+            cls._samples += 1
+            series = cls._endpoints.get((endpoint, method))
+            if series is None:
+                # Замеров, сумма и максимум peak, сумма retained, сумма прироста RSS и число его замеров, сверх бюджета
+                series = cls._endpoints[(endpoint, method)] = [0, 0, 0, 0, 0, 0, 0]
+            series[0] += 1
+            series[1] += sample["peak"]
+            series[2] = max(series[2], sample["peak"])
+            series[3] += sample["retained"]
+            if sample["rss_delta"] is not None:
+                series[4] += sample["rss_delta"]
+                series[5] += 1
+            if over_budget:
+                series[6] += 1
+
+            for site in sample["sites"]:
+                key = tuple(site["traceback"])
+                totals = cls._sites.get(key)
+                if totals is None:
+                    # Объем, число блоков, запросов
+                    totals = cls._sites[key] = [0, 0, 0]
+                totals[0] += site["size"]
+                totals[1] += site["count"]
+                totals[2] += 1
+            if len(cls._sites) > cls.MAX_SITES:
+                largest = sorted(cls._sites.items(), key=lambda item: item[1][0], reverse=True)
+                cls._sites = dict(largest[:cls.MAX_SITES // 2])
+
+    @staticmethod
+    def over_budget(sample: Dict) -> bool:
+        return bool(settings.GAS_MEMORY_BUDGET) and sample["peak"] > settings.GAS_MEMORY_BUDGET
+
+    @classmethod
+    def stats(cls, limit: int = 20) -> Dict:
+        """Статистика процесса: показатели по методам API (по наибольшему peak) и limit мест выделения"""
+        with cls._lock:
+            endpoints = {key: list(series) for key, series in cls._endpoints.items()}
+            sites = sorted(cls._sites.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+            samples, skipped = cls._samples, cls._skipped
+
+        return {
+            "rate": settings.GAS_MEMORY_RATE,
+            "budget": settings.GAS_MEMORY_BUDGET or None,
+            "frames": settings.GAS_MEMORY_FRAMES,
+            "rss": cls.rss(),
+            "samples": samples,
+            "skipped": skipped,
+            "endpoints": [
+                {
+                    "endpoint": endpoint,
+                    "method": method,
+                    "samples": series[0],
+                    "peak_avg": round(series[1] / series[0]),
+                    "peak_max": series[2],
+                    "retained_avg": round(series[3] / series[0]),
+                    "rss_delta_avg": round(series[4] / series[5]) if series[5] else None,
+                    "over_budget": series[6],
+                }
+                for (endpoint, method), series in sorted(endpoints.items(), key=lambda item: item[1][2], reverse=True)
+            ],
+            "sites": [
+                {"traceback": list(key), "size": size, "count": count, "requests": requests}
+                for key, (size, count, requests) in sites
+            ],
+        }
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._endpoints = {}
+            cls._sites = {}
+            cls._samples = 0
+            cls._skipped = 0
+
+    @staticmethod
+    def summary(sites: List[Dict], limit: int = 3) -> str:
+        """Краткое описание мест выделения для журнала"""
+        return "; ".join(
+            f"{site['traceback'][-1]} - {site['size'] / 1024:.1f} КиБ" for site in sites[:limit] if site["traceback"]
+        )
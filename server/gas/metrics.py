@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from prometheus_client import (CollectorRegistry, Histogram,
+                               disable_created_metrics, generate_latest,
+                               multiprocess)
+
+disable_created_metrics()
+
+
+class Metrics:
+    """
+    Замер этапов обработки запроса: проверка входных данных (validate), построение модели (build),
+    решение (solve), подготовка результатов (prepare), запросы к базе данных (db) и формирование
+    ответа (render).
+
+    Длительности этапов текущего запроса собираются в данных потока (их начинает и завершает
+    gas.middleware.MetricsMiddleware) и попадают в гистограммы prometheus_client для GET /metrics,
+    а при GAS_SERVER_TIMING - в заголовок ответа Server-Timing. Вне запроса (команды, пакетные
+    процессы) этапы не замеряются. Отключается настройкой GAS_METRICS.
+
+    При нескольких процессах сервера (gunicorn, uwsgi) переменная окружения PROMETHEUS_MULTIPROC_DIR
+    задает общий каталог: каждый процесс пишет свои значения в файлы каталога, GET /metrics любого
+    процесса суммирует их по всем процессам. Без нее гистограммы свои у каждого процесса.
+    """
+
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    _local = threading.local()
+
+    registry = CollectorRegistry()
+    requests = Histogram(
+        "gas_request_duration_seconds", "Время обработки запроса, с", ("endpoint", "method", "status"),
+        buckets=BUCKETS, registry=registry
+    )
+    phases = Histogram(
+        "gas_request_phase_seconds", "Время этапа обработки запроса, с", ("endpoint", "method", "phase"),
+        buckets=BUCKETS, registry=registry
+    )
+
+    @staticmethod
+    def enabled() -> bool:
+        return settings.GAS_METRICS
+
+    @classmethod
+    def start(cls):
+        cls._local.timings = {}
+
+    @classmethod
+    def finish(cls) -> Dict[str, float]:
+        timings = getattr(cls._local, "timings", None) or {}
+        cls._local.timings = None
+        return timings
+
+    @classmethod
+    def add(cls, phase: str, seconds: float):
+        timings = getattr(cls._local, "timings", None)
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+    @classmethod
+    @contextmanager
+    def phase(cls, name: str):
+        if getattr(cls._local, "timings", None) is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.add(name, time.perf_counter() - start)
+
+    @classmethod
+    def timed(cls, name: str) -> Callable:
+        """Декоратор: замер функции как этапа name"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if getattr(cls._local, "timings", None) is None:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    cls.add(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    @classmethod
+    def validate(cls, serializer, raise_exception: bool = False) -> bool:
+        """serializer.is_valid с замером этапа validate"""
+        with cls.phase("validate"):
+            return serializer.is_valid(raise_exception=raise_exception)
+
+    @classmethod
+    def database(cls, execute, sql, params, many, context):
+        """Обертка запросов к базе данных (connection.execute_wrapper)"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            cls.add("db", time.perf_counter() - start)
+
+    @staticmethod
+    def server_timing_enabled() -> bool:
+        return settings.GAS_SERVER_TIMING
+
+    @classmethod
+    def observe(cls, endpoint: str, method: str, status: int, total: float, timings: Dict[str, float]):
+        cls.requests.labels(endpoint, method, str(status)).observe(total)
+        for phase, seconds in timings.items():
+            cls.phases.labels(endpoint, method, phase).observe(seconds)
+
+    @staticmethod
+    def server_timing(timings: Dict[str, float], total: Optional[float] = None) -> str:
+        """Значение заголовка Server-Timing: этапы и общее время, мс"""
+        items = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in timings.items()]
+        if total is not None:
+            items.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(items)
+
+    @classmethod
+    def render(cls) -> bytes:
+        """Гистограммы в текстовом формате Prometheus: по всем процессам при PROMETHEUS_MULTIPROC_DIR"""
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return generate_latest(registry)
+        return generate_latest(cls.registry)
+
+    @classmethod
+    def clear(cls):
+        cls.requests.clear()
+        cls.phases.clear()
@@ -0,0 +1,123 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.urls import reverse
+from gas.capture import TrafficCapture
+from gas.memory import MemoryProfiler
+from gas.metrics import Metrics
+
+from server.settings import BASE_LOGGER, ERROR_LOGGER
+
+
+class MetricsMiddleware:
+    """
+    Замер запросов к API: этапы обработки (gas.metrics.Metrics), запросы к базе данных
+    и формирование ответа. Пополняет гистограммы /metrics, при GAS_SERVER_TIMING добавляет
+    заголовок Server-Timing (длительности этапов видны любому клиенту, поэтому по умолчанию выключен).
+    При выключенной настройке GAS_METRICS запрос проходит без замеров.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not Metrics.enabled():
+            return self.get_response(request)
+
+        Metrics.start()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(Metrics.database):
+                response = self.get_response(request)
+        finally:
+            total = time.perf_counter() - start
+            timings = Metrics.finish()
+
+        match = getattr(request, "resolver_match", None)
+        endpoint = match.view_name if match is not None else "unresolved"
+        Metrics.observe(endpoint, request.method, response.status_code, total, timings)
+        request.phase_timings = timings  # Для записи запросов (TrafficCaptureMiddleware)
+        if Metrics.server_timing_enabled():
+            response["Server-Timing"] = Metrics.server_timing(timings, total)
+        return response
+
+    def process_template_response(self, request, response):
+        """Ответы DRF формируются после представления: замер через обратный вызов после рендеринга"""
+        if Metrics.enabled() and hasattr(response, "add_post_render_callback"):
+            start = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: Metrics.add("render", time.perf_counter() - start))
+        return response
+
+
+class TrafficCaptureMiddleware:
+    """
+    Запись выборки запросов POST /api/gas/calculate/ для повторного расчета (manage.py replay).
+    Подключается только при GAS_CAPTURE_RATE > 0; стоит перед MetricsMiddleware, чтобы
+    в запись попали длительности этапов (request.phase_timings). Ошибка записи
+    не влияет на ответ.
+    """
+
+    def __init__(self, get_response):
+        if not TrafficCapture.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._path = None
+
+    def __call__(self, request):
+        if self._path is None:
+            self._path = reverse("gas:calculate")
+        if request.method != "POST" or request.path_info != self._path or not TrafficCapture.sampled():
+            return self.get_response(request)
+        if int(request.META.get("CONTENT_LENGTH") or 0) > TrafficCapture.max_body():
+            return self.get_response(request)
+
+        body = request.body  # Тело читается до представления, DRF разбирает его копию
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        try:
+            entry = TrafficCapture.entry(request, body, response, duration)
+            if entry is not None:
+                TrafficCapture.record(entry)
+        except Exception as e:
+            ERROR_LOGGER.error(f"Ошибка записи запроса расчета: {str(e)}")
+        return response
+
+
+class MemoryProfilerMiddleware:
+    """
+    Выборочный замер памяти запросов (gas.memory.MemoryProfiler). Подключается только
+    при GAS_MEMORY_RATE > 0. Запросы, наибольший объем памяти которых больше GAS_MEMORY_BUDGET,
+    записываются в журнал с основными местами выделения. Ошибка замера не влияет на ответ.
+    """
+
+    def __init__(self, get_response):
+        if not MemoryProfiler.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not MemoryProfiler.sampled() or not MemoryProfiler.start():
+            return self.get_response(request)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            match = getattr(request, "resolver_match", None)
+            endpoint = match.view_name if match is not None else "unresolved"
+            try:
+                sample = MemoryProfiler.finish(endpoint, request.method)
+            except Exception as e:
+                sample = None
+                ERROR_LOGGER.error(f"Ошибка замера памяти запроса: {str(e)}")
+
+        if sample is not None and MemoryProfiler.over_budget(sample):
+            BASE_LOGGER.warning(
+                f"Память запроса {request.method} {request.path} больше бюджета: "
+                f"{sample['peak'] / 1024 ** 2:.1f} МиБ (GAS_MEMORY_BUDGET {settings.GAS_MEMORY_BUDGET / 1024 ** 2:.1f} МиБ), "
+                f"не освобождено {sample['retained'] / 1024 ** 2:.1f} МиБ. {MemoryProfiler.summary(sample['sites'])}"
+            )
+        return response
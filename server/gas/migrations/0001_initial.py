@@ -0,0 +1,87 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:19
+
+import django.contrib.postgres.fields
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Calculate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('C_k', models.FloatField(verbose_name='Стоимость кокса, руб/(кг кокса)')),
+                ('C_pg', models.FloatField(verbose_name='Стоимость природного газа, руб/(м3 ПГ)')),
+                ('V_pg_total', models.FloatField(verbose_name='Лимит расхода природного газа по цеху, м3/ч')),
+                ('K_total', models.FloatField(verbose_name='Запасы кокса по цеху, т/ч')),
+                ('P_total', models.FloatField(verbose_name='Требуемая производительность по чугуну, т/ч')),
+                ('N', models.IntegerField(verbose_name='Количество печей (не более GAS_MAX_FURNACES)')),
+                ('V_pg_0', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Базовый расход ПГ по печам, м3/ч')),
+                ('V_pg_min', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Минимальный расход ПГ по печам, м3/ч')),
+                ('V_pg_max', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Максимальный расход ПГ по печам, м3/ч')),
+                ('K_0', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Базовый расход кокса по печам, т/ч')),
+                ('e', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Эквивалент замены кокса, кг/(м3 ПГ)')),
+                ('P_0', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Базовая производительность по печам, т/ч')),
+                ('S_0', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Базовое содержание серы, %')),
+                ('S_min', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Минимально допустимое содержание серы, %')),
+                ('S_max', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Максимально допустимое содержание серы, %')),
+                ('delta_P_pg', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Влияние ПГ на производство, т/(м3/ч)')),
+                ('delta_P_k', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Влияние кокса на производство, т/(кг/ч)')),
+                ('delta_S_pg', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Влияние ПГ на серу, %/(м3/ч)')),
+                ('delta_S_k', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Влияние кокса на серу, %/(кг/ч)')),
+                ('delta_S_p', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), size=None, verbose_name='Влияние производительности на серу, %/(т/ч)')),
+                ('periods', models.JSONField(blank=True, help_text='Только величины, заданные по часам: T, C_pg, C_k, V_pg_total, K_total, P_total, V_pg_min, V_pg_max, ramp', null=True, verbose_name='Почасовые параметры многопериодного расчета')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CalculationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Ожидает'), ('RUNNING', 'Выполняется'), ('DONE', 'Выполнено'), ('FAILED', 'Ошибка'), ('EXPIRED', 'Истек срок ожидания')], default='PENDING', max_length=16, verbose_name='Статус')),
+                ('data', models.JSONField(verbose_name='Проверенные входные данные')),
+                ('backend', models.CharField(blank=True, max_length=16, null=True, verbose_name='Решатель')),
+                ('sensitivity', models.BooleanField(default=False, verbose_name='Анализ чувствительности')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Результат расчета')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Ошибка')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Число попыток')),
+                ('max_attempts', models.PositiveIntegerField(verbose_name='Максимум попыток')),
+                ('worker', models.CharField(blank=True, max_length=128, null=True, verbose_name='Обработчик')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата и время постановки в очередь')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доступно для обработки с')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало последней попытки')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата и время завершения')),
+                ('expires_at', models.DateTimeField(verbose_name='Срок ожидания в очереди')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='History',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата и время создания расчета')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата и время последнего обновления')),
+                ('objective', models.FloatField(verbose_name='Целевая функция руб/ч')),
+                ('gas_distribution', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), help_text='Распределение ПГ (м3/ч)', size=None, verbose_name='Распределение ПГ (м3/ч)')),
+                ('total_gas_consumption', models.FloatField(verbose_name='Общий расход ПГ м3/ч')),
+                ('total_coke_consumption', models.FloatField(verbose_name='Общий расход кокса т/ч')),
+                ('total_iron_production', models.FloatField(verbose_name='Общее производство чугуна т/ч')),
+                ('sulfur_content', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), help_text='Содержание серы (%)', size=None, verbose_name='Содержание серы (%)')),
+                ('status', models.CharField(verbose_name='Статус')),
+                ('sensitivity', models.JSONField(blank=True, null=True, verbose_name='Анализ чувствительности')),
+                ('gas_schedule', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), blank=True, help_text='Многопериодный расчет: T x N значений по часам, построчно', null=True, size=None, verbose_name='Почасовое распределение ПГ (м3/ч)')),
+                ('backend', models.CharField(blank=True, max_length=16, null=True, verbose_name='Решатель')),
+                ('wall_time_ms', models.FloatField(blank=True, null=True, verbose_name='Время расчета, мс')),
+                ('solve_time_ms', models.FloatField(blank=True, null=True, verbose_name='Время решателя, мс')),
+                ('iterations', models.PositiveIntegerField(blank=True, null=True, verbose_name='Число итераций решателя')),
+                ('variables', models.PositiveIntegerField(blank=True, null=True, verbose_name='Число переменных модели')),
+                ('constraints', models.PositiveIntegerField(blank=True, null=True, verbose_name='Число ограничений модели')),
+                ('cache_hit', models.BooleanField(blank=True, null=True, verbose_name='Результат из кэша')),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('gas', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calculationjob',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calculation_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddField(
+            model_name='history',
+            name='calculate',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calculate', to='gas.calculate', verbose_name='Входные данные'),
+        ),
+        migrations.AddField(
+            model_name='history',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='calculationjob',
+            index=models.Index(fields=['status', 'available_at'], name='gas_job_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calculationjob',
+            index=models.Index(fields=['user', 'status'], name='gas_job_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['backend', 'created_at'], name='gas_history_backend_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.utils import timezone
 from user.models import User
 
 
@@ -14,7 +15,7 @@ class Calculate(models.Model):
     V_pg_total = models.FloatField(verbose_name="Лимит расхода природного газа по цеху, м3/ч")
     K_total = models.FloatField(verbose_name="Запасы кокса по цеху, т/ч")
     P_total = models.FloatField(verbose_name="Требуемая производительность по чугуну, т/ч")
-    N = models.IntegerField(verbose_name="Количество печей (1-20)")
+    N = models.IntegerField(verbose_name="Количество печей (не более GAS_MAX_FURNACES)")
     V_pg_0 = ArrayField(
         verbose_name="Базовый расход ПГ по печам, м3/ч",
         base_field=models.FloatField()
@@ -71,6 +72,12 @@ class Calculate(models.Model):
         verbose_name="Влияние производительности на серу, %/(т/ч)",
         base_field=models.FloatField()
     )
+    periods = models.JSONField(
+        verbose_name="Почасовые параметры многопериодного расчета",
+        null=True,
+        blank=True,
+        help_text="Только величины, заданные по часам: T, C_pg, C_k, V_pg_total, K_total, P_total, V_pg_min, V_pg_max, ramp"
+    )
 
     def __str__(self):
         return f"Входные данные №{self.pk}."
@@ -98,7 +105,67 @@ class History(models.Model):
         help_text="Содержание серы (%)"
     )
     status = models.CharField(verbose_name="Статус")
+    sensitivity = models.JSONField(verbose_name="Анализ чувствительности", null=True, blank=True)
+    gas_schedule = ArrayField(
+        verbose_name="Почасовое распределение ПГ (м3/ч)",
+        base_field=models.FloatField(),
+        null=True,
+        blank=True,
+        help_text="Многопериодный расчет: T x N значений по часам, построчно"
+    )
+    # Показатели расчета (для анализа производительности)
+    backend = models.CharField(verbose_name="Решатель", max_length=16, null=True, blank=True)
+    wall_time_ms = models.FloatField(verbose_name="Время расчета, мс", null=True, blank=True)
+    solve_time_ms = models.FloatField(verbose_name="Время решателя, мс", null=True, blank=True)
+    iterations = models.PositiveIntegerField(verbose_name="Число итераций решателя", null=True, blank=True)
+    variables = models.PositiveIntegerField(verbose_name="Число переменных модели", null=True, blank=True)
+    constraints = models.PositiveIntegerField(verbose_name="Число ограничений модели", null=True, blank=True)
+    cache_hit = models.BooleanField(verbose_name="Результат из кэша", null=True, blank=True)
     user = models.ForeignKey(to=User, on_delete=models.CASCADE, verbose_name="Пользователь", related_name="user")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["backend", "created_at"], name="gas_history_backend_idx"),
+        ]
+
+    def __str__(self):
+        return f"История №{self.pk}."
+
+class CalculationJob(models.Model):
+    """
+    Модель задания асинхронного расчета.
+    Таблица служит очередью: обработчики (manage.py calculation_worker) забирают задания
+    через SELECT ... FOR UPDATE SKIP LOCKED, поэтому очередь могут разбирать несколько узлов.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Ожидает"
+        RUNNING = "RUNNING", "Выполняется"
+        DONE = "DONE", "Выполнено"
+        FAILED = "FAILED", "Ошибка"
+        EXPIRED = "EXPIRED", "Истек срок ожидания"
+
+    user = models.ForeignKey(to=User, on_delete=models.CASCADE, verbose_name="Пользователь", related_name="calculation_jobs")
+    status = models.CharField(verbose_name="Статус", max_length=16, choices=Status.choices, default=Status.PENDING)
+    data = models.JSONField(verbose_name="Проверенные входные данные")
+    backend = models.CharField(verbose_name="Решатель", max_length=16, null=True, blank=True)
+    sensitivity = models.BooleanField(verbose_name="Анализ чувствительности", default=False)
+    result = models.JSONField(verbose_name="Результат расчета", null=True, blank=True)
+    error = models.TextField(verbose_name="Ошибка", null=True, blank=True)
+    attempts = models.PositiveIntegerField(verbose_name="Число попыток", default=0)
+    max_attempts = models.PositiveIntegerField(verbose_name="Максимум попыток")
+    worker = models.CharField(verbose_name="Обработчик", max_length=128, null=True, blank=True)
+    created_at = models.DateTimeField(verbose_name="Дата и время постановки в очередь", auto_now_add=True)
+    available_at = models.DateTimeField(verbose_name="Доступно для обработки с", default=timezone.now)
+    started_at = models.DateTimeField(verbose_name="Начало последней попытки", null=True, blank=True)
+    finished_at = models.DateTimeField(verbose_name="Дата и время завершения", null=True, blank=True)
+    expires_at = models.DateTimeField(verbose_name="Срок ожидания в очереди")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="gas_job_queue_idx"),
+            models.Index(fields=["user", "status"], name="gas_job_user_idx"),
+        ]
+
     def __str__(self):
-        return f"История №{self.pk}."
\ No newline at end of file
+        return f"Задание расчета №{self.pk}."
@@ -0,0 +1,45 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Потоковый ввод больших групп печей (application/x-ndjson).
+
+    Каждая строка тела - JSON-объект. Скалярные поля передаются один раз (обычно в первой строке),
+    списки по печам - порциями в следующих строках и склеиваются в порядке строк:
+        {"N": 10000, "C_k": 0.9, ..., "V_pg_total": 900000}
+        {"V_pg_0": [...первые 1000...], "K_0": [...], ...}
+        {"V_pg_0": [...следующие 1000...], "K_0": [...], ...}
+    Тело читается построчно, без промежуточной строки на весь запрос.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        data = {}
+
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                chunk = json.loads(line.decode(encoding))
+            except ValueError as e:
+                raise ParseError(f"Строка {number}: ошибка разбора JSON - {str(e)}")
+            if not isinstance(chunk, dict):
+                raise ParseError(f"Строка {number}: ожидается JSON-объект")
+
+            for key, value in chunk.items():
+                if isinstance(value, list) and isinstance(data.get(key), list):
+                    data[key].extend(value)
+                else:
+                    data[key] = value
+
+        return data
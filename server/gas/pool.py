@@ -0,0 +1,171 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Client, Listener
+from typing import Dict, Optional
+
+from django.conf import settings
+from gas.deadline import (CalculationCancelledError, Deadline,
+                          DeadlineExceededError)
+
+from server.settings import ERROR_LOGGER
+
+
+def _init_worker():
+    """Инициализация процесса пула: Django, импорт OR-Tools и прогрев решателей (и шаблонов моделей clp)"""
+    from gas.batch import _init_worker as init_django
+
+    init_django()
+
+    from gas.backends import SolverBackendRegistry
+    from gas.furnaces import FurnaceArrays
+    from gas.services import DefaultInputValues, GasDistributionService
+
+    program = GasDistributionService._build_linear_program(FurnaceArrays(DefaultInputValues.get_default_values()))
+    for name in SolverBackendRegistry.available():
+        SolverBackendRegistry.get(name).solve(program)
+
+
+def _solve_request(data: Dict, backend: Optional[str], sensitivity: bool, seconds: Optional[float]) -> Dict:
+    """Расчет в процессе пула. Ошибка возвращается вместе с типом, чтобы выбросить ее у клиента"""
+    from gas.services import GasDistributionService
+
+    try:
+        deadline = Deadline(seconds) if seconds is not None else None
+        return {"result": GasDistributionService.calculate_distribution(data, backend, sensitivity, deadline)}
+    except ValueError as e:
+        return {"error": str(e), "kind": type(e).__name__}
+
+
+class SolverPool:
+    """
+    Долгоживущий пул процессов-решателей (manage.py solver_pool).
+
+    Процессы пула один раз импортируют OR-Tools и прогревают все решатели, поэтому расчет
+    не платит за импорт и первую инициализацию решателя. Решатели pywraplp (clp) к тому же держат
+    шаблоны моделей по структуре задачи (ORToolsBackend.template); решателям ModelBuilder
+    (glop, pdlp, scip, а значит и auto) шаблоны не нужны - модель заполняется массивами.
+    Веб-процессы передают расчеты по локальному каналу (Unix-сокет или localhost:порт из
+    GAS_SOLVER_POOL_ADDRESS) и сами OR-Tools не загружают. Если пул недоступен,
+    расчет выполняется в текущем процессе.
+    Срок расчета передается в пул оставшимся временем. При отмене веб-процесс сразу
+    закрывает соединение, а расчет в пуле завершается по сроку.
+    """
+
+    _local = threading.local()
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(settings.GAS_SOLVER_POOL_ADDRESS)
+
+    @staticmethod
+    def address():
+        """Адрес канала: путь Unix-сокета или host:port"""
+        address = settings.GAS_SOLVER_POOL_ADDRESS
+        if not address.startswith("/") and ":" in address:
+            host, port = address.rsplit(":", 1)
+            return host, int(port)
+        return address
+
+    @staticmethod
+    def authkey() -> bytes:
+        """Ключ аутентификации канала, выводится из SECRET_KEY"""
+        return hashlib.sha256(f"gas-solver-pool:{settings.SECRET_KEY}".encode("utf-8")).digest()
+
+    @classmethod
+    def connection(cls):
+        """Соединение с пулом, одно на поток веб-процесса"""
+        connection = getattr(cls._local, "connection", None)
+        if connection is None:
+            connection = cls._local.connection = Client(cls.address(), authkey=cls.authkey())
+        return connection
+
+    @classmethod
+    def disconnect(cls):
+        connection = getattr(cls._local, "connection", None)
+        cls._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def errors() -> Dict:
+        """Типы ошибок расчета, передаваемые из пула по имени"""
+        from gas.services import InfeasibleCalculationError
+
+        return {error.__name__: error for error in (
+            InfeasibleCalculationError, DeadlineExceededError, CalculationCancelledError
+        )}
+
+    @classmethod
+    def calculate(cls, data: Dict, backend: Optional[str] = None, sensitivity: bool = False,
+                  deadline: Optional[Deadline] = None) -> Dict:
+        """Расчет в пуле с переходом на расчет в текущем процессе при недоступности пула"""
+        from gas.services import GasDistributionService
+
+        try:
+            connection = cls.connection()
+            connection.send((dict(data), backend, sensitivity, deadline.remaining() if deadline else None))
+            while deadline is not None and not connection.poll(deadline.POLL_INTERVAL):
+                if deadline.cancelled:
+                    cls.disconnect()
+                    raise deadline.error()
+            response = connection.recv()
+        except (OSError, EOFError) as e:
+            ERROR_LOGGER.error(f"Пул решателей недоступен, расчет в текущем процессе: {str(e)}")
+            cls.disconnect()
+            return GasDistributionService.calculate_distribution(data, backend, sensitivity, deadline)
+
+        if "error" in response:
+            raise cls.errors().get(response["kind"], ValueError)(response["error"])
+        return response["result"]
+
+
+class SolverPoolServer:
+    """
+    Сервер пула: принимает соединения веб-процессов и передает расчеты процессам-решателям.
+    Каждое соединение обслуживается своим потоком, запросы в соединении выполняются по очереди.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.GAS_SOLVER_POOL_WORKERS or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def warm(self):
+        """Запуск процессов до приема соединений: прогрев выполняет инициализатор каждого процесса"""
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def serve(self, listener: Listener):
+        while True:
+            try:
+                connection = listener.accept()
+            except OSError:
+                break
+            except multiprocessing.AuthenticationError as e:
+                ERROR_LOGGER.error(f"Пул решателей: отклонено соединение - {str(e)}")
+                continue
+            threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+
+    def handle(self, connection):
+        try:
+            while True:
+                data, backend, sensitivity, seconds = connection.recv()
+                connection.send(self.executor.submit(_solve_request, data, backend, sensitivity, seconds).result())
+        except (EOFError, OSError):
+            pass
+        except Exception as e:
+            ERROR_LOGGER.error(f"Ошибка пула решателей: {str(e)}", exc_info=True)
+        finally:
+            connection.close()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
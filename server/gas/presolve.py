@@ -0,0 +1,201 @@
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+from gas.engine import LinearProgram, LPSolution
+
+
+class Presolve:
+    """
+    Предварительная обработка линейной задачи перед решателем.
+
+    Повторяется, пока что-то меняется (не более MAX_PASSES проходов):
+    - ужесточение границ переменных по строкам (следствия ограничений цеха);
+    - снятие избыточных границ строк, которые выполняются при любых значениях в границах переменных;
+    - фиксация доминируемых переменных: если уменьшение (увеличение) переменной не ухудшает
+      целевую функцию и не может нарушить ни одну строку, она фиксируется на нижней (верхней) границе.
+    Затем фиксированные переменные (в том числе печи, у которых границы по сере стянулись в точку)
+    исключаются, пустые строки удаляются, строки и столбцы масштабируются степенями двойки
+    (геометрическое масштабирование), чтобы коэффициенты были близки к единице.
+
+    program - приведенная задача для решателя, restore() переводит ее решение в исходные переменные.
+    Если задача решена без решателя (все переменные фиксированы) или несовместность доказана,
+    результат сразу доступен в solution.
+    """
+
+    MAX_PASSES = 8
+    SCALE_PASSES = 4
+    TOL = 1e-9  # Относительный допуск сравнения границ
+    FEASIBILITY_TOL = 1e-6  # Допуск, с которым пересечение границ считается несовместностью
+
+    def __init__(self, program: LinearProgram):
+        self.original = program
+        self.program: Optional[LinearProgram] = None
+        self.solution: Optional[LPSolution] = None
+
+        # Структура матрицы не меняется: коэффициенты в формате COO без явно хранимых нулей
+        rows = program.rows.tocoo()
+        nonzero = rows.data != 0
+        self._row, self._col, self._a = rows.row[nonzero], rows.col[nonzero], rows.data[nonzero]
+        self._positive = self._a > 0
+
+        # Рабочие границы меняются на месте
+        self.lower, self.upper = program.lower.copy(), program.upper.copy()
+        self.row_lower, self.row_upper = program.row_lower.copy(), program.row_upper.copy()
+
+        for _ in range(self.MAX_PASSES):
+            changed = self._tighten_bounds()
+            changed |= self._drop_redundant_bounds()
+            changed |= self._fix_dominated()
+            if not changed:
+                break
+
+        if not self._is_consistent():
+            self.solution = LPSolution("INFEASIBLE")
+            return
+
+        self._reduce()
+
+    @classmethod
+    def _tol(cls, value):
+        return cls.TOL * (1.0 + np.abs(np.where(np.isfinite(value), value, 0.0)))
+
+    def _activity_bounds(self):
+        """Наименьшая и наибольшая активность строк при текущих границах (см. LinearProgram.activity_bounds)"""
+        lower, upper = self.lower[self._col], self.upper[self._col]
+        low = self._a * np.where(self._positive, lower, upper)
+        high = self._a * np.where(self._positive, upper, lower)
+        size = self.row_lower.shape[0]
+        return np.bincount(self._row, low, size), np.bincount(self._row, high, size)
+
+    def _tighten_bounds(self) -> bool:
+        """Границы переменных, следующие из каждой строки при крайних значениях остальных переменных"""
+        minimum, maximum = self._activity_bounds()
+        row, a, positive = self._row, self._a, self._positive
+        lower, upper = self.lower[self._col], self.upper[self._col]
+
+        with np.errstate(invalid="ignore"):
+            # Активность строки без вклада переменной: наименьшая и наибольшая
+            rest_min = minimum[row] - a * np.where(positive, lower, upper)
+            rest_max = maximum[row] - a * np.where(positive, upper, lower)
+            from_upper = (self.row_upper[row] - rest_min) / a
+            from_lower = (self.row_lower[row] - rest_max) / a
+
+        # Бесконечные остатки (inf - inf) границ не дают
+        new_upper = np.where(positive, from_upper, from_lower)
+        new_lower = np.where(positive, from_lower, from_upper)
+        new_upper[np.isnan(new_upper)] = np.inf
+        new_lower[np.isnan(new_lower)] = -np.inf
+
+        implied_upper = np.full(self.upper.shape[0], np.inf)
+        implied_lower = np.full(self.lower.shape[0], -np.inf)
+        np.minimum.at(implied_upper, self._col, new_upper)
+        np.maximum.at(implied_lower, self._col, new_lower)
+
+        tighter_upper = implied_upper < self.upper - self._tol(self.upper)
+        tighter_lower = implied_lower > self.lower + self._tol(self.lower)
+        self.upper[tighter_upper] = implied_upper[tighter_upper]
+        self.lower[tighter_lower] = implied_lower[tighter_lower]
+        return bool(tighter_upper.any() or tighter_lower.any())
+
+    def _drop_redundant_bounds(self) -> bool:
+        """Снятие границ строк, которые не могут быть нарушены"""
+        minimum, maximum = self._activity_bounds()
+        lower = np.isfinite(self.row_lower) & (minimum >= self.row_lower - self._tol(self.row_lower))
+        upper = np.isfinite(self.row_upper) & (maximum <= self.row_upper + self._tol(self.row_upper))
+        self.row_lower[lower] = -np.inf
+        self.row_upper[upper] = np.inf
+        return bool(lower.any() or upper.any())
+
+    def _fix_dominated(self) -> bool:
+        """
+        Фиксация переменных по знаку целевого коэффициента (dual fixing): переменная без
+        ограничений, мешающих ее уменьшению, при неположительном вкладе в целевую функцию
+        фиксируется на нижней границе, и наоборот.
+        """
+        row, col, positive = self._row, self._col, self._positive
+        finite_lower, finite_upper = np.isfinite(self.row_lower)[row], np.isfinite(self.row_upper)[row]
+        size = self.lower.shape[0]
+
+        # Строки, которые может нарушить уменьшение (down) или увеличение (up) переменной
+        down = np.where(positive, finite_lower, finite_upper)
+        up = np.where(positive, finite_upper, finite_lower)
+        down_locks = np.bincount(col[down], minlength=size)
+        up_locks = np.bincount(col[up], minlength=size)
+
+        gain = self.original.objective if self.original.maximize else -self.original.objective
+        free = self.lower < self.upper
+        to_lower = free & (gain <= 0) & (down_locks == 0) & np.isfinite(self.lower)
+        to_upper = free & ~to_lower & (gain >= 0) & (up_locks == 0) & np.isfinite(self.upper)
+
+        self.upper[to_lower] = self.lower[to_lower]
+        self.lower[to_upper] = self.upper[to_upper]
+        return bool(to_lower.any() or to_upper.any())
+
+    def _is_consistent(self) -> bool:
+        """Границы переменных не пересекаются, каждая строка достижима"""
+        tol = self.FEASIBILITY_TOL
+        if np.any(self.lower > self.upper + tol * (1.0 + np.abs(self.upper))):
+            return False
+        minimum, maximum = self._activity_bounds()
+        with np.errstate(invalid="ignore"):
+            return not (np.any(minimum > self.row_upper + tol * (1.0 + np.abs(self.row_upper)))
+                        or np.any(maximum < self.row_lower - tol * (1.0 + np.abs(self.row_lower))))
+
+    def _reduce(self):
+        """Исключение фиксированных переменных и пустых строк, масштабирование"""
+        program = self.original
+        fixed = self.upper - self.lower <= self._tol(self.lower)
+        with np.errstate(invalid="ignore"):
+            self.values = np.where(fixed, 0.5 * (self.lower + self.upper), 0.0)
+        self.keep = np.flatnonzero(~fixed)
+        self.offset = float(program.objective[fixed] @ self.values[fixed])
+        if self.keep.size == 0:
+            self.solution = LPSolution("OPTIMAL", values=self.values, objective=self.offset, iterations=0)
+            return
+
+        # Вклад фиксированных переменных переносится в границы строк
+        shift = np.bincount(self._row, self._a * self.values[self._col], self.row_lower.shape[0])
+        bounded = np.isfinite(self.row_lower) | np.isfinite(self.row_upper)
+        used_rows = np.bincount(self._row[~fixed[self._col]], minlength=self.row_lower.shape[0]) > 0
+        used = np.flatnonzero(bounded & used_rows)
+
+        rows = program.rows[used][:, self.keep]
+        rows.eliminate_zeros()
+        row_scale, self.scale = self._scaling(rows)
+        self.program = LinearProgram(
+            objective=program.objective[self.keep] * self.scale,
+            lower=self.lower[self.keep] / self.scale,
+            upper=self.upper[self.keep] / self.scale,
+            rows=sparse.diags(row_scale) @ rows @ sparse.diags(self.scale),
+            row_lower=(self.row_lower[used] - shift[used]) * row_scale,
+            row_upper=(self.row_upper[used] - shift[used]) * row_scale,
+            maximize=program.maximize,
+        )
+
+    @classmethod
+    def _scaling(cls, rows: sparse.csr_matrix):
+        """
+        Множители строк и столбцов (степени двойки, масштабирование без ошибок округления):
+        несколько проходов выравнивают среднее геометрическое модулей коэффициентов к единице.
+        """
+        rows = rows.tocoo()
+        log_a = np.log2(np.abs(rows.data))
+        row_count = np.maximum(np.bincount(rows.row, minlength=rows.shape[0]), 1)
+        col_count = np.maximum(np.bincount(rows.col, minlength=rows.shape[1]), 1)
+
+        log_row, log_col = np.zeros(rows.shape[0]), np.zeros(rows.shape[1])
+        for _ in range(cls.SCALE_PASSES):
+            log_row = -np.bincount(rows.row, log_a + log_col[rows.col], rows.shape[0]) / row_count
+            log_col = -np.bincount(rows.col, log_a + log_row[rows.row], rows.shape[1]) / col_count
+
+        return np.exp2(np.round(log_row)), np.exp2(np.round(log_col))
+
+    def restore(self, solution: LPSolution) -> LPSolution:
+        """Решение приведенной задачи в исходных переменных"""
+        values = None
+        if solution.values is not None:
+            values = self.values.copy()
+            values[self.keep] = np.asarray(solution.values, dtype=np.float64) * self.scale
+        objective = solution.objective + self.offset if solution.objective is not None else None
+        return LPSolution(solution.status, values=values, objective=objective, iterations=solution.iterations)
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.db.models import Aggregate, Avg, Count, FloatField, Q
+from django.utils import timezone
+from gas.models import History
+
+
+class Percentile(Aggregate):
+    """Процентиль PostgreSQL (percentile_cont) с линейной интерполяцией"""
+
+    function = "PERCENTILE_CONT"
+    name = "Percentile"
+    output_field = FloatField()
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+
+    def __init__(self, expression, percentile: float, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+class SolverStatsReport:
+    """
+    Отчет о производительности расчетов по истории: процентили времени решателя и общего
+    времени расчета, среднее число итераций по количеству печей N и решателю.
+    Процентили считаются только по рассчитанным результатам: ответы из кэша
+    (cache_hit) учитываются в доле попаданий, но не во времени. Записи без показателей
+    (сохраненные до их появления) в отчет не входят.
+    """
+
+    PERCENTILES = (0.5, 0.9, 0.99)
+
+    @classmethod
+    def build(cls, user=None, days: Optional[int] = None) -> Dict:
+        """user - отчет по расчетам пользователя (None - по всем), days - только за последние days дней"""
+        queryset = History.objects.filter(backend__isnull=False)
+        if user is not None:
+            queryset = queryset.filter(user=user)
+        if days is not None:
+            queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=days))
+
+        totals = queryset.aggregate(
+            calculations=Count("id"),
+            cache_hits=Count("id", filter=Q(cache_hit=True)),
+        )
+        aggregates = {"count": Count("id"), "iterations": Avg("iterations"), "variables": Avg("variables")}
+        for percentile in cls.PERCENTILES:
+            label = f"p{percentile * 100:g}"
+            aggregates[f"solve_time_ms_{label}"] = Percentile("solve_time_ms", percentile)
+            aggregates[f"wall_time_ms_{label}"] = Percentile("wall_time_ms", percentile)
+
+        groups = (
+            queryset.exclude(cache_hit=True)
+            .values("calculate__N", "backend")
+            .annotate(**aggregates)
+            .order_by("calculate__N", "backend")
+        )
+        return {
+            "scope": "user" if user is not None else "all",
+            "days": days,
+            "calculations": totals["calculations"],
+            "cache_hit_rate": (
+                round(totals["cache_hits"] / totals["calculations"], 4) if totals["calculations"] else None
+            ),
+            "groups": [cls._group(group) for group in groups],
+        }
+
+    @staticmethod
+    def _group(group: Dict) -> Dict:
+        N = group.pop("calculate__N")
+        return {
+            "N": N,
+            **{
+                key: round(value, 3) if isinstance(value, float) else value
+                for key, value in group.items()
+            },
+        }
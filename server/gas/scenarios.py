@@ -0,0 +1,337 @@
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from gas.batch import _init_worker
+from gas.furnaces import FurnaceArrays
+
+
+class ScenarioFileError(ValueError):
+    """Ошибка в файле сценариев или результатов"""
+
+
+def _pyarrow():
+    """Модули pyarrow для Parquet (необязательная зависимость)"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ScenarioFileError("Для файлов Parquet нужен пакет pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def _solve_scenarios(items: List[Tuple], backend: Optional[str]) -> List[Tuple]:
+    """
+    Проверка и расчет порции сценариев в рабочем процессе. Ошибка сценария возвращается вместе с результатами.
+    Сериализатор один на порцию: построение полей ModelSerializer дороже проверки небольшого сценария.
+    """
+    from gas.serializers import CalculateCreateSerializer
+    from gas.services import GasDistributionService
+    from rest_framework.exceptions import ValidationError
+
+    serializer = CalculateCreateSerializer()
+    results = []
+    for scenario, data in items:
+        try:
+            validated_data = serializer.run_validation(data)
+        except ValidationError as e:
+            results.append((scenario, {"error": json.dumps(e.detail, ensure_ascii=False)}))
+            continue
+        try:
+            results.append((scenario, {"result": GasDistributionService.calculate_distribution(validated_data, backend)}))
+        except ValueError as e:
+            results.append((scenario, {"error": str(e)}))
+    return results
+
+
+class ScenarioReader:
+    """
+    Чтение сценариев по мере расчета (файл целиком в память не загружается).
+
+    NDJSON (.ndjson, .jsonl) - один сценарий на строку в формате /api/gas/calculate/,
+    необязательное поле "scenario" - идентификатор (по умолчанию номер строки).
+    CSV и Parquet - одна строка на печь: строки подряд с одинаковым "scenario" образуют сценарий,
+    поля печей (V_pg_0, K_0, ...) берутся из каждой строки, общие поля (C_k, V_pg_total, ...) -
+    из первой строки сценария, N - по числу строк, если не задано.
+    """
+
+    FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".parquet": "parquet"}
+    PARQUET_BATCH = 65536  # Строк в одной порции чтения Parquet
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = file_format(path)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        if self.format == "ndjson":
+            return self._read_ndjson()
+        if self.format == "csv":
+            return self._group(self._read_csv())
+        return self._group(self._read_parquet())
+
+    def _read_ndjson(self):
+        with open(self.path, encoding="utf-8") as file:
+            for number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError as e:
+                    raise ScenarioFileError(f"{self.path}, строка {number}: ошибка разбора JSON - {str(e)}")
+                if not isinstance(data, dict):
+                    raise ScenarioFileError(f"{self.path}, строка {number}: ожидается JSON-объект")
+                yield data.pop("scenario", number), data
+
+    def _read_csv(self):
+        with open(self.path, encoding="utf-8", newline="") as file:
+            reader = csv.DictReader(file)
+            if "scenario" not in (reader.fieldnames or []):
+                raise ScenarioFileError(f"{self.path}: нет столбца scenario")
+            for row in reader:
+                yield {key: value for key, value in row.items() if value not in ("", None)}
+
+    def _read_parquet(self):
+        _, pq = _pyarrow()
+        parquet = pq.ParquetFile(self.path)
+        if "scenario" not in parquet.schema_arrow.names:
+            raise ScenarioFileError(f"{self.path}: нет столбца scenario")
+        for batch in parquet.iter_batches(batch_size=self.PARQUET_BATCH):
+            for row in batch.to_pylist():
+                yield {key: value for key, value in row.items() if value is not None}
+
+    def _group(self, rows: Iterable[Dict]):
+        """Сборка сценариев из строк по печам (строки одного сценария идут подряд)"""
+        scenario, group = None, []
+        for row in rows:
+            if group and row["scenario"] != scenario:
+                yield scenario, self._scenario(group)
+                group = []
+            scenario = row["scenario"]
+            group.append(row)
+        if group:
+            yield scenario, self._scenario(group)
+
+    @staticmethod
+    def _scenario(rows: List[Dict]) -> Dict:
+        first = rows[0]
+        data = {field: first[field] for field in FurnaceArrays.SCALAR_FIELDS if field in first}
+        data["N"] = first.get("N", len(rows))
+        for field in FurnaceArrays.FURNACE_FIELDS:
+            if field in first:
+                data[field] = [row.get(field) for row in rows]
+        return data
+
+
+class ScenarioWriter:
+    """
+    Запись результатов в формате по расширению файла. Результаты дописываются порциями,
+    position() - позиция после последней записанной порции (для продолжения после сбоя).
+
+    NDJSON - строка {"scenario", "result"} или {"scenario", "error"} на сценарий.
+    CSV и Parquet - строка на печь: scenario, furnace, gas, sulfur и итоги сценария;
+    для сценария с ошибкой - одна строка с error. Parquet - каталог файлов part-NNNNNN.parquet,
+    каждый файл записывается целиком (через временный файл).
+    """
+
+    COLUMNS = [
+        "scenario", "furnace", "gas", "sulfur", "objective", "total_gas_consumption",
+        "total_coke_consumption", "total_iron_production", "status", "error",
+    ]
+
+    def __init__(self, path: str, position: int = 0):
+        self.path = path
+        self.format = file_format(path)
+        self._position = position
+
+        if self.format == "parquet":
+            self._pa, self._pq = _pyarrow()
+            os.makedirs(path, exist_ok=True)
+            # Файлы, записанные после последней сохраненной позиции
+            for name in os.listdir(path):
+                if name.startswith("part-") and int(name[5:11]) >= position:
+                    os.remove(os.path.join(path, name))
+            return
+
+        mode = "r+b" if position and os.path.exists(path) else "wb"
+        self._file = open(path, mode)
+        self._file.truncate(position)
+        self._file.seek(position)
+        if self.format == "csv" and position == 0:
+            self._write_text(self._csv_lines([self.COLUMNS]))
+
+    def position(self) -> int:
+        return self._position
+
+    def write(self, results: List[Tuple]):
+        if self.format == "ndjson":
+            self._write_text("".join(
+                json.dumps(dict(scenario=scenario, **response), ensure_ascii=False) + "\n"
+                for scenario, response in results
+            ))
+        elif self.format == "csv":
+            self._write_text(self._csv_lines(self._rows(results)))
+        else:
+            self._write_parquet(self._rows(results))
+
+    def _write_text(self, text: str):
+        self._file.write(text.encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._position = self._file.tell()
+
+    def _write_parquet(self, rows: List[List]):
+        table = self._pa.table({column: [row[k] for row in rows] for k, column in enumerate(self.COLUMNS)})
+        name = os.path.join(self.path, f"part-{self._position:06d}.parquet")
+        self._pq.write_table(table, name + ".tmp")
+        os.replace(name + ".tmp", name)
+        self._position += 1
+
+    @classmethod
+    def _rows(cls, results: List[Tuple]) -> List[List]:
+        rows = []
+        for scenario, response in results:
+            if "error" in response:
+                rows.append([str(scenario), None, None, None, None, None, None, None, None, response["error"]])
+                continue
+            result = response["result"]
+            totals = [result[field] for field in cls.COLUMNS[4:9]]
+            for furnace, (gas, sulfur) in enumerate(zip(result["gas_distribution"], result["sulfur_content"]), start=1):
+                rows.append([str(scenario), furnace, gas, sulfur, *totals, None])
+        return rows
+
+    @staticmethod
+    def _csv_lines(rows: List[List]) -> str:
+        class Buffer(list):
+            write = list.append
+
+        buffer = Buffer()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return "".join(buffer)
+
+    def close(self):
+        if self.format != "parquet":
+            self._file.close()
+
+
+def file_format(path: str) -> str:
+    extension = os.path.splitext(path.rstrip("/"))[1].lower()
+    if extension not in ScenarioReader.FORMATS:
+        raise ScenarioFileError(f"Неизвестный формат файла {path}: ожидается .csv, .ndjson, .jsonl или .parquet")
+    return ScenarioReader.FORMATS[extension]
+
+
+class ScenarioBatchRunner:
+    """
+    Расчет файла сценариев без HTTP (main.py): сценарии читаются потоком, порциями по chunk
+    передаются в workers процессов (не больше IN_FLIGHT порций на процесс одновременно),
+    результаты записываются в порядке входного файла сразу по готовности.
+
+    После каждой записанной порции в файл <результаты>.progress сохраняется число рассчитанных сценариев
+    и позиция в файле результатов. С resume расчет продолжается с этого места: недописанный
+    хвост результатов отбрасывается, уже рассчитанные сценарии пропускаются.
+    """
+
+    IN_FLIGHT = 4
+    REPORT_INTERVAL = 1.0  # Период вывода прогресса, с
+
+    def __init__(self, source: str, target: str, workers: Optional[int] = None, chunk: int = 64,
+                 backend: Optional[str] = None, resume: bool = False, report=sys.stderr):
+        self.source = source
+        self.target = target
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk = chunk
+        self.backend = backend
+        self.resume = resume
+        self.report = report
+        self.progress_path = target.rstrip("/") + ".progress"
+
+    def load_progress(self) -> Dict:
+        if not self.resume or not os.path.exists(self.progress_path):
+            return {"scenarios": 0, "errors": 0, "position": 0}
+        with open(self.progress_path, encoding="utf-8") as file:
+            progress = json.load(file)
+        if progress.get("source") != os.path.abspath(self.source):
+            raise ScenarioFileError(f"{self.progress_path} относится к другому файлу сценариев: {progress.get('source')}")
+        return progress
+
+    def save_progress(self, progress: Dict):
+        temporary = self.progress_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(dict(progress, source=os.path.abspath(self.source)), file)
+        os.replace(temporary, self.progress_path)
+
+    def run(self) -> Dict:
+        progress = self.load_progress()
+        skipped = progress["scenarios"]
+        scenarios = islice(iter(ScenarioReader(self.source)), skipped, None)
+        chunks = iter(lambda: list(islice(scenarios, self.chunk)), [])
+        writer = ScenarioWriter(self.target, progress["position"])
+
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+
+        start = reported = time.monotonic()
+        pending = deque()
+        try:
+            while True:
+                # Порции передаются заранее, чтобы процессы не простаивали во время записи
+                while len(pending) < self.workers * self.IN_FLIGHT:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    if executor is None:
+                        pending.append(_solve_scenarios(chunk, self.backend))
+                    else:
+                        pending.append(executor.submit(_solve_scenarios, chunk, self.backend))
+                if not pending:
+                    break
+
+                results = pending.popleft()
+                if executor is not None:
+                    results = results.result()
+                writer.write(results)
+                progress["scenarios"] += len(results)
+                progress["errors"] += sum("error" in response for _, response in results)
+                progress["position"] = writer.position()
+                self.save_progress(progress)
+
+                now = time.monotonic()
+                if now - reported >= self.REPORT_INTERVAL:
+                    self._report(progress, skipped, now - start)
+                    reported = now
+        finally:
+            writer.close()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        elapsed = time.monotonic() - start
+        self._report(progress, skipped, elapsed, final=True)
+        return {
+            "scenarios": progress["scenarios"],
+            "errors": progress["errors"],
+            "resumed_from": skipped,
+            "seconds": round(elapsed, 3),
+        }
+
+    def _report(self, progress: Dict, skipped: int, elapsed: float, final: bool = False):
+        if self.report is None:
+            return
+        rate = (progress["scenarios"] - skipped) / elapsed if elapsed > 0 else 0.0
+        line = f"Рассчитано сценариев: {progress['scenarios']} | {rate:.1f} сценариев/с | ошибок: {progress['errors']}"
+        if self.report.isatty():
+            self.report.write("\r" + line + ("\n" if final else ""))
+        else:
+            self.report.write(line + "\n")
+        self.report.flush()
@@ -1,8 +1,54 @@
-from gas.models import Calculate, History
+import numpy as np
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from gas.models import Calculate, CalculationJob, History
+from gas.signing import SolverStatsSignature
 from rest_framework import serializers
 
 
-class CalculateBaseSerializer(serializers.ModelSerializer):
+class FloatArrayField(serializers.ListField):
+    """
+    Список вещественных чисел (поле ArrayField модели), проверяемый одной операцией NumPy
+    вместо поэлементной проверки дочерним полем. Для тысяч печей это основная часть времени валидации.
+    Если векторная проверка находит ошибку (или данные не числовые), список проверяется поэлементно,
+    поэтому ошибки те же, что у ListField с дочерним FloatField.
+    """
+
+    def run_child_validation(self, data):
+        if not isinstance(self.child, serializers.FloatField):
+            return super().run_child_validation(data)
+
+        try:
+            values = np.asarray(data)
+        except (TypeError, ValueError):
+            return super().run_child_validation(data)
+        # Строки, None, вложенные списки и целые вне диапазона float проверяет дочернее поле
+        if values.ndim != 1 or values.dtype.kind not in "biuf":
+            return super().run_child_validation(data)
+
+        values = values.astype(np.float64)
+        invalid = ~np.isfinite(values)
+        if self.child.min_value is not None:
+            invalid |= values < self.child.min_value
+        if self.child.max_value is not None:
+            invalid |= values > self.child.max_value
+        if invalid.any():
+            return super().run_child_validation(data)
+        return values.tolist()
+
+
+class ArrayModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer, в котором поля ArrayField проверяются векторно (FloatArrayField).
+    """
+
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        ArrayField: FloatArrayField,
+    }
+
+
+class CalculateBaseSerializer(ArrayModelSerializer):
     """
     Базовый сериализатор для модели Calculate (Входных данных).
     Сериализатор для расчета оптимального распределения природного газа между доменными печами.
@@ -34,8 +80,8 @@ class CalculateBaseSerializer(serializers.ModelSerializer):
             },
             "N": {
                 "min_value": 1,
-                "max_value": 20,
-                "help_text": "Количество печей (1-20)"
+                "max_value": settings.GAS_MAX_FURNACES,
+                "help_text": f"Количество печей (1-{settings.GAS_MAX_FURNACES})"
             },
             "V_pg_0": {
                 "min_length": 1,
@@ -111,29 +157,37 @@ class CalculateBaseSerializer(serializers.ModelSerializer):
                     f"Поле {field} должно содержать ровно {n} значений (по числу печей)"
                 )
 
-        # Проверка минимальных/максимальных значений ПГ
-        for i in range(n):
-            if data["V_pg_min"][i] > data["V_pg_max"][i]:
-                raise serializers.ValidationError(
-                    f"Минимальный расход ПГ не может превышать максимальный (печь {i + 1})"
-                )
+        # Проверки по печам выполняются векторно, в сообщении - первая печь с ошибкой
+        def first(mask):
+            index = np.flatnonzero(mask)
+            return int(index[0]) + 1 if index.size else None
 
-            if not (data["V_pg_min"][i] <= data["V_pg_0"][i] <= data["V_pg_max"][i]):
-                raise serializers.ValidationError(
-                    f"Базовый расход ПГ для печи {i + 1} выходит за допустимые границы"
-                )
+        V_pg_0, V_pg_min, V_pg_max = (np.asarray(data[field]) for field in ("V_pg_0", "V_pg_min", "V_pg_max"))
+        S_0, S_min, S_max = (np.asarray(data[field]) for field in ("S_0", "S_min", "S_max"))
 
-        # Проверка содержания серы
-        for i in range(n):
-            if data["S_min"][i] > data["S_max"][i]:
-                raise serializers.ValidationError(
-                    f"Минимальное содержание серы не может превышать максимальное (печь {i + 1})"
-                )
+        # Проверка минимальных/максимальных значений ПГ
+        furnace = first(V_pg_min > V_pg_max)
+        if furnace:
+            raise serializers.ValidationError(
+                f"Минимальный расход ПГ не может превышать максимальный (печь {furnace})"
+            )
+        furnace = first((V_pg_0 < V_pg_min) | (V_pg_0 > V_pg_max))
+        if furnace:
+            raise serializers.ValidationError(
+                f"Базовый расход ПГ для печи {furnace} выходит за допустимые границы"
+            )
 
-            if not (data["S_min"][i] <= data["S_0"][i] <= data["S_max"][i]):
-                raise serializers.ValidationError(
-                    f"Базовое содержание серы для печи {i + 1} выходит за допустимые границы"
-                )
+        # Проверка содержания серы
+        furnace = first(S_min > S_max)
+        if furnace:
+            raise serializers.ValidationError(
+                f"Минимальное содержание серы не может превышать максимальное (печь {furnace})"
+            )
+        furnace = first((S_0 < S_min) | (S_0 > S_max))
+        if furnace:
+            raise serializers.ValidationError(
+                f"Базовое содержание серы для печи {furnace} выходит за допустимые границы"
+            )
 
         return data
 
@@ -156,7 +210,255 @@ class CalculateCreateSerializer(CalculateBaseSerializer):
                                                         "V_pg_min", "V_pg_max", "K_0", "e", "P_0", "S_0", "S_min", "S_max", 
                                                         "delta_P_pg", "delta_P_k", "delta_S_pg", "delta_S_k", "delta_S_p"]
 
-class HistoryBaseSerializer(serializers.ModelSerializer):
+class CalculatePeriodsSerializer(serializers.Serializer):
+    """
+    Сериализатор почасовых параметров многопериодного расчета.
+    Незаданные величины берутся из основных входных данных.
+    """
+
+    T = serializers.IntegerField(min_value=1, max_value=settings.GAS_MULTIPERIOD_MAX_PERIODS, help_text="Количество часов")
+    C_pg = FloatArrayField(child=serializers.FloatField(min_value=0), required=False, help_text="Стоимость ПГ по часам, руб/(м3 ПГ)")
+    C_k = FloatArrayField(child=serializers.FloatField(min_value=0), required=False, help_text="Стоимость кокса по часам, руб/(кг кокса)")
+    V_pg_total = FloatArrayField(child=serializers.FloatField(min_value=0), required=False, help_text="Лимит расхода ПГ по цеху по часам, м3/ч")
+    K_total = FloatArrayField(child=serializers.FloatField(min_value=0), required=False, help_text="Запасы кокса по цеху по часам, т/ч")
+    P_total = FloatArrayField(child=serializers.FloatField(min_value=0), required=False, help_text="Требуемая производительность по часам, т/ч")
+    V_pg_min = serializers.ListField(child=FloatArrayField(child=serializers.FloatField()), required=False, help_text="Минимальный расход ПГ по часам и печам (T x N), м3/ч")
+    V_pg_max = serializers.ListField(child=FloatArrayField(child=serializers.FloatField()), required=False, help_text="Максимальный расход ПГ по часам и печам (T x N), м3/ч")
+    ramp = FloatArrayField(child=serializers.FloatField(min_value=0), required=False, help_text="Допустимое изменение расхода ПГ печи за час, м3/ч")
+
+    def validate(self, data):
+        T = data["T"]
+        for field in ["C_pg", "C_k", "V_pg_total", "K_total", "P_total"]:
+            if field in data and len(data[field]) != T:
+                raise serializers.ValidationError(f"Поле {field} должно содержать ровно {T} значений (по числу часов)")
+        for field in ["V_pg_min", "V_pg_max"]:
+            if field in data and len(data[field]) != T:
+                raise serializers.ValidationError(f"Поле {field} должно содержать ровно {T} строк (по числу часов)")
+        return data
+
+class CalculateBatchSerializer(serializers.Serializer):
+    """
+    Сериализатор пакета сценариев расчета.
+    Каждый сценарий проверяется отдельно сериализатором CalculateCreateSerializer.
+    """
+
+    scenarios = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        max_length=settings.GAS_BATCH_MAX_SCENARIOS,
+        help_text="Список сценариев (входные данные расчета)"
+    )
+
+class CalculateSweepSerializer(serializers.Serializer):
+    """
+    Сериализатор параметров параметрического расчета по цене.
+    """
+
+    parameter = serializers.ChoiceField(
+        choices=["C_pg", "C_k"],
+        help_text="Изменяемая цена: C_pg - природный газ, C_k - кокс"
+    )
+    start = serializers.FloatField(min_value=0, help_text="Начало диапазона цены")
+    end = serializers.FloatField(min_value=0, help_text="Конец диапазона цены")
+
+    def validate(self, data):
+        if data["start"] >= data["end"]:
+            raise serializers.ValidationError("Начало диапазона должно быть меньше конца")
+        return data
+
+class CalculateEstimateSerializer(serializers.Serializer):
+    """
+    Сериализатор запроса оценки результата по анализу чувствительности.
+    Источник - сохраненный расчет из истории или результат расчета с анализом чувствительности.
+    """
+
+    CHANGES = ["V_pg_total", "K_total", "P_total", "C_pg", "C_k"]
+
+    history = serializers.IntegerField(required=False, help_text="ID расчета в истории")
+    result = serializers.JSONField(required=False, help_text="Результат расчета с параметром sensitivity=true")
+    changes = serializers.DictField(
+        child=serializers.FloatField(),
+        allow_empty=False,
+        help_text="Изменения параметров, например {\"K_total\": -10}. Допустимы: V_pg_total, K_total, P_total, C_pg, C_k"
+    )
+
+    def validate_changes(self, value):
+        unknown = [name for name in value if name not in self.CHANGES]
+        if unknown:
+            raise serializers.ValidationError(f"Недопустимые параметры: {', '.join(unknown)}")
+        return value
+
+    def validate(self, data):
+        if ("history" in data) == ("result" in data):
+            raise serializers.ValidationError("Укажите либо history, либо result")
+        return data
+
+class CoefficientUncertaintySerializer(serializers.Serializer):
+    """
+    Сериализатор неопределенности коэффициента влияния.
+    """
+
+    std = serializers.FloatField(
+        min_value=0, required=False, default=0.0,
+        help_text="Стандартное отклонение (normal) или полуширина (uniform), общее для всех печей"
+    )
+    std_by_furnace = FloatArrayField(
+        child=serializers.FloatField(min_value=0), required=False, min_length=1,
+        help_text="Разброс по печам (вместо std)"
+    )
+    relative = serializers.BooleanField(default=True, help_text="Разброс в долях модуля коэффициента")
+    distribution = serializers.ChoiceField(choices=["normal", "uniform"], default="normal", help_text="Распределение")
+
+class CalculateRobustnessSerializer(serializers.Serializer):
+    """
+    Сериализатор запроса оценки устойчивости распределения методом Монте-Карло.
+    """
+
+    FIELDS = ["delta_P_pg", "delta_P_k", "delta_S_pg", "delta_S_k", "delta_S_p", "e"]
+
+    calculate = CalculateCreateSerializer(help_text="Входные данные расчета")
+    gas_distribution = FloatArrayField(
+        child=serializers.FloatField(), min_length=1,
+        help_text="Проверяемое распределение ПГ (м3/ч)"
+    )
+    uncertainty = serializers.DictField(
+        child=CoefficientUncertaintySerializer(),
+        help_text="Неопределенность коэффициентов: delta_P_pg, delta_P_k, delta_S_pg, delta_S_k, delta_S_p, e"
+    )
+    samples = serializers.IntegerField(
+        min_value=1, max_value=settings.GAS_ROBUSTNESS_MAX_SAMPLES, default=100_000,
+        help_text="Число выборок коэффициентов"
+    )
+    seed = serializers.IntegerField(min_value=0, required=False, help_text="Начальное значение генератора")
+
+    def validate_uncertainty(self, value):
+        unknown = [name for name in value if name not in self.FIELDS]
+        if unknown:
+            raise serializers.ValidationError(f"Недопустимые поля: {', '.join(unknown)}")
+        return value
+
+    def validate(self, data):
+        n = data["calculate"]["N"]
+        if len(data["gas_distribution"]) != n:
+            raise serializers.ValidationError(
+                f"Поле gas_distribution должно содержать ровно {n} значений (по числу печей)"
+            )
+        # Время расчета пропорционально числу выборок, умноженному на число печей
+        if data["samples"] * n > settings.GAS_ROBUSTNESS_MAX_ELEMENTS:
+            raise serializers.ValidationError(
+                f"Слишком большой расчет: samples x N = {data['samples'] * n} больше "
+                f"{settings.GAS_ROBUSTNESS_MAX_ELEMENTS}. Уменьшите samples до {settings.GAS_ROBUSTNESS_MAX_ELEMENTS // n}"
+            )
+        return data
+
+class CalculateMultiPeriodSerializer(CalculateCreateSerializer):
+    """
+    Сериализатор модели Calculate для многопериодного расчета.
+    Основные поля задают печи и значения по умолчанию, periods - почасовые величины.
+    """
+
+    periods = CalculatePeriodsSerializer(required=False, allow_null=True)
+
+    class Meta(CalculateCreateSerializer.Meta):
+        fields = CalculateCreateSerializer.Meta.fields + ["periods"]
+
+    def validate(self, data):
+        data = super().validate(data)
+        periods, n = data.get("periods"), data["N"]
+        if not periods:
+            return data
+
+        if "ramp" in periods and len(periods["ramp"]) != n:
+            raise serializers.ValidationError(f"Поле ramp должно содержать ровно {n} значений (по числу печей)")
+        for field in ["V_pg_min", "V_pg_max"]:
+            if any(len(row) != n for row in periods.get(field, [])):
+                raise serializers.ValidationError(f"Каждая строка поля {field} должна содержать ровно {n} значений (по числу печей)")
+        return data
+
+class CalculateDiscreteOptionsSerializer(serializers.Serializer):
+    """
+    Сериализатор параметров дискретного расчета.
+    """
+
+    step = serializers.FloatField(min_value=0, required=False, default=0.0, help_text="Шаг уставки расхода ПГ для всех печей, м3/ч (0 - без шага)")
+    steps = FloatArrayField(child=serializers.FloatField(min_value=0), required=False, help_text="Шаг уставки по печам, м3/ч (заменяет step)")
+    switchable = serializers.ListField(child=serializers.BooleanField(), required=False, help_text="Печи, которые можно отключить (по печам)")
+    gap = serializers.FloatField(min_value=0, max_value=1, required=False, help_text="Допустимый относительный разрыв оптимальности (по умолчанию GAS_MIP_GAP)")
+    time_limit = serializers.FloatField(min_value=0.01, required=False, help_text="Лимит времени, с (по умолчанию GAS_MIP_TIME_LIMIT)")
+
+class CalculateDiscreteSerializer(CalculateCreateSerializer):
+    """
+    Сериализатор модели Calculate для дискретного расчета (уставки с шагом, отключаемые печи).
+    """
+
+    discrete = CalculateDiscreteOptionsSerializer()
+
+    class Meta(CalculateCreateSerializer.Meta):
+        fields = CalculateCreateSerializer.Meta.fields + ["discrete"]
+
+    def validate(self, data):
+        data = super().validate(data)
+        discrete, n = data["discrete"], data["N"]
+        for field in ["steps", "switchable"]:
+            if field in discrete and len(discrete[field]) != n:
+                raise serializers.ValidationError(f"Поле {field} должно содержать ровно {n} значений (по числу печей)")
+        return data
+
+class ResponseCurveSerializer(serializers.Serializer):
+    """
+    Сериализатор нелинейной характеристики печи, заданной точками.
+    """
+
+    furnace = serializers.IntegerField(min_value=1, help_text="Номер печи (с 1)")
+    V_pg = FloatArrayField(child=serializers.FloatField(min_value=0), min_length=2, help_text="Расход ПГ в точках кривой, м3/ч (по возрастанию)")
+    P = FloatArrayField(child=serializers.FloatField(min_value=0), min_length=2, help_text="Производство чугуна в точках кривой, т/ч")
+    S = FloatArrayField(child=serializers.FloatField(min_value=0), min_length=2, required=False, help_text="Содержание серы в точках кривой, %")
+
+    def validate(self, data):
+        n = len(data["V_pg"])
+        for field in ["P", "S"]:
+            if field in data and len(data[field]) != n:
+                raise serializers.ValidationError(f"Поле {field} должно содержать ровно {n} значений (по числу точек V_pg)")
+
+        gas, production = np.asarray(data["V_pg"]), np.asarray(data["P"])
+        if np.any(np.diff(gas) <= 0):
+            raise serializers.ValidationError("Значения V_pg должны строго возрастать")
+        slopes = np.diff(production) / np.diff(gas)
+        if np.any(np.diff(slopes) > 1e-9 * (1.0 + np.abs(slopes[:-1]))):
+            raise serializers.ValidationError(
+                f"Кривая производства печи {data['furnace']} должна быть вогнутой: "
+                "прирост производства на единицу ПГ не должен увеличиваться"
+            )
+        return data
+
+class CalculateResponseOptionsSerializer(serializers.Serializer):
+    """
+    Сериализатор параметров расчета по нелинейным характеристикам печей.
+    """
+
+    curves = ResponseCurveSerializer(many=True, help_text="Характеристики печей (печи без кривой рассчитываются по линейной модели)")
+    tolerance = serializers.FloatField(min_value=0, required=False, help_text="Допустимое отклонение от кривой производства, т/ч (по умолчанию GAS_RESPONSE_TOL)")
+
+class CalculateNonlinearSerializer(CalculateCreateSerializer):
+    """
+    Сериализатор модели Calculate для расчета по нелинейным характеристикам печей.
+    """
+
+    response = CalculateResponseOptionsSerializer()
+
+    class Meta(CalculateCreateSerializer.Meta):
+        fields = CalculateCreateSerializer.Meta.fields + ["response"]
+
+    def validate(self, data):
+        data = super().validate(data)
+        furnaces = [curve["furnace"] for curve in data["response"]["curves"]]
+        if any(furnace > data["N"] for furnace in furnaces):
+            raise serializers.ValidationError(f"Номер печи в curves должен быть от 1 до {data['N']}")
+        if len(set(furnaces)) != len(furnaces):
+            raise serializers.ValidationError("Для каждой печи допускается одна кривая")
+        return data
+
+class HistoryBaseSerializer(ArrayModelSerializer):
     """
     Базовый сериализатор для модели History.
     Сериализатор для хранения оптимального расчета распределения природного газа между доменными печами
@@ -194,6 +496,35 @@ class HistoryBaseSerializer(serializers.ModelSerializer):
                 "min_length": 1,
                 "help_text": "Статус",
             },
+            "sensitivity": {
+                "help_text": "Анализ чувствительности: двойственные оценки ограничений, приведенные стоимости и диапазоны устойчивости",
+            },
+            "gas_schedule": {
+                "help_text": "Почасовое распределение ПГ (T x N, построчно), м3/ч",
+            },
+            "backend": {
+                "help_text": "Решатель, которым получен результат (presolve - решено предварительной обработкой)",
+            },
+            "wall_time_ms": {
+                "min_value": 0,
+                "help_text": "Время расчета, мс",
+            },
+            "solve_time_ms": {
+                "min_value": 0,
+                "help_text": "Время решателя, мс",
+            },
+            "iterations": {
+                "help_text": "Число итераций решателя",
+            },
+            "variables": {
+                "help_text": "Число переменных модели",
+            },
+            "constraints": {
+                "help_text": "Число ограничений модели",
+            },
+            "cache_hit": {
+                "help_text": "Результат взят из кэша (показатели решателя - исходного расчета)",
+            },
         }
         read_only_fields = ["created_at", "updated_at"]
 
@@ -224,8 +555,11 @@ class HistoryDetailSerializer(HistoryBaseSerializer):
     Сериализатор модели History для детального просмотра расчетов.
     """
 
+    stats_token = serializers.CharField(required=False, help_text="Подпись показателей расчета для сохранения в истории")
+
     class Meta(HistoryBaseSerializer.Meta):
-        fields = HistoryBaseSerializer.Meta.fields + ["objective", "gas_distribution", "total_gas_consumption", "total_coke_consumption", "total_iron_production", "sulfur_content", "status"]
+        fields = HistoryBaseSerializer.Meta.fields + ["objective", "gas_distribution", "total_gas_consumption", "total_coke_consumption", "total_iron_production", "sulfur_content", "status", "sensitivity", "gas_schedule",
+                  "backend", "wall_time_ms", "solve_time_ms", "iterations", "variables", "constraints", "cache_hit", "stats_token"]
 
 class HistoryCreateSerializer(HistoryBaseSerializer):
     """
@@ -233,9 +567,53 @@ class HistoryCreateSerializer(HistoryBaseSerializer):
     Автоматически привязывает расчет к текущему пользователю.
     """
 
-    calculate = CalculateCreateSerializer()
+    calculate = CalculateMultiPeriodSerializer()
     user = serializers.PrimaryKeyRelatedField(read_only=True)
+    stats_token = serializers.CharField(
+        write_only=True, required=False,
+        help_text="Подпись показателей из ответа расчета: показатели сохраняются только по ней"
+    )
 
     class Meta(HistoryBaseSerializer.Meta):
         fields = HistoryBaseSerializer.Meta.fields + ["id", "created_at", "calculate", "objective", "gas_distribution", "total_gas_consumption", "total_coke_consumption",
-                  "total_iron_production", "sulfur_content", "status", "user"]
+                  "total_iron_production", "sulfur_content", "status", "sensitivity", "gas_schedule",
+                  "backend", "wall_time_ms", "solve_time_ms", "iterations", "variables", "constraints", "cache_hit", "user", "stats_token"]
+        read_only_fields = HistoryBaseSerializer.Meta.read_only_fields + SolverStatsSignature.FIELDS
+
+    def validate(self, data):
+        token = data.pop("stats_token", None)
+        if token is not None:
+            try:
+                data.update(SolverStatsSignature.verify(token, data["objective"], data["calculate"]["N"]))
+            except ValueError as e:
+                raise serializers.ValidationError({"stats_token": str(e)})
+        return data
+
+class HistoryStatsSerializer(serializers.Serializer):
+    """
+    Сериализатор параметров отчета о производительности расчетов.
+    """
+
+    scope = serializers.ChoiceField(
+        choices=["user", "all"],
+        default="user",
+        help_text="user - расчеты текущего пользователя, all - все расчеты (только администратор)"
+    )
+    days = serializers.IntegerField(min_value=1, max_value=36500, required=False, help_text="Только расчеты за последние days дней")
+
+class MemoryStatsSerializer(serializers.Serializer):
+    """
+    Сериализатор параметров статистики замера памяти запросов.
+    """
+
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20, help_text="Число мест выделения памяти")
+
+class CalculationJobSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор модели CalculationJob для вывода статуса и результата задания.
+    """
+
+    class Meta:
+        model = CalculationJob
+        fields = ["id", "status", "attempts", "max_attempts", "created_at", "started_at", "finished_at", "expires_at", "result", "error"]
+        read_only_fields = fields
@@ -1,179 +1,1054 @@
-from typing import Dict, List
+import math
+import random
+import time
+from typing import Dict, List, Optional, Sequence
 
-from ortools.linear_solver import pywraplp
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+from gas.backends import MixedIntegerBackend, SolverBackendRegistry
+from gas.deadline import (CalculationCancelledError, Deadline,
+                          DeadlineExceededError)
+from gas.engine import (INFINITY, BoundedSimplexEngine, EngineError,
+                        LinearProgram, LPSolution, SensitivityAnalysis)
+from gas.furnaces import FurnaceArrays, ResponseCurve
+from gas.metrics import Metrics
+from gas.presolve import Presolve
+from gas.signing import SolverStatsSignature
 
-from server.settings import ERROR_LOGGER
+from server.settings import BASE_LOGGER, ERROR_LOGGER
+
+
+class InfeasibleCalculationError(ValueError):
+    """
+    Для входных данных не существует оптимального решения (ограничения несовместны).
+    """
+
+
+class OutOfRangeError(ValueError):
+    """
+    Изменение параметров выходит за диапазон, в котором оптимальный базис не меняется.
+    """
 
 
 class GasDistributionService:
     """
     Сервис для оптимизации распределения природного газа между доменными печами
-    с использованием линейного программирования (Google OR-Tools).
+    с использованием линейного программирования.
+    Решатель выбирается через реестр gas.backends (встроенный симплекс-метод, GLOP, PDLP, SCIP, CLP).
     """
 
     C_p = 1.0  # Условно-постоянный коэффициент
 
+    # Ограничения цеха: строка модели и ее граница, задаваемая параметром
+    CONSTRAINTS = {
+        "V_pg_total": (0, "upper"),
+        "K_total": (1, "upper"),
+        "P_total": (2, "lower"),
+    }
+    PRICES = ["C_pg", "C_k"]
+    # Крайнее достижимое значение величины цеха для сообщений проверки совместности и единица измерения
+    CONSTRAINT_LABELS = {
+        "V_pg_total": ("минимально возможный расход ПГ", "м3/ч"),
+        "K_total": ("минимально возможный расход кокса", "т/ч"),
+        "P_total": ("максимально возможное производство чугуна", "т/ч"),
+    }
+    SCREEN_TOL = 1e-9  # Относительный допуск проверки совместности
+    SCREEN_MAX_FURNACES = 5  # Сколько печей с пустым диапазоном перечислять в ошибке
+
     @classmethod
-    def calculate_distribution(cls, data: Dict) -> Dict:
+    def calculate_distribution(cls, data: Dict, backend: Optional[str] = None, sensitivity: bool = False,
+                               deadline: Optional[Deadline] = None) -> Dict:
         """
         Основной метод расчета оптимального распределения.
+        backend - имя решателя или "auto", по умолчанию берется из настройки GAS_SOLVER_BACKEND.
+        sensitivity - добавить к результату анализ чувствительности (считается встроенным
+        симплекс-методом, так как требует оптимального базиса, см. _solve_sensitivity).
+        deadline - срок расчета; если он истек, а решатель нашел допустимое решение,
+        возвращается это решение со статусом FEASIBLE_TIMEOUT.
         """
+        started = time.perf_counter()
         try:
-            # Инициализация решателя
-            solver = cls._init_solver()
-            N = data["N"]
+            furnaces = FurnaceArrays(data)
+
+            # Построение модели, проверка совместности и решение
+            program = cls._build_linear_program(furnaces)
+            cls._screen_feasibility(furnaces, program)
+            if sensitivity:
+                solution = cls._solve_sensitivity(program, backend, deadline)
+            else:
+                solution = cls._solve(program, backend, deadline)
+            cls._check_solution(program, solution, deadline)
+
+            # Формирование результатов
+            result = cls._prepare_results(furnaces, solution.values, solution.objective, cls._result_status(solution))
+            if solution.sensitivity is not None:
+                result["sensitivity"] = cls._prepare_sensitivity(furnaces, program, solution.sensitivity)
+            result.update(cls._solver_stats(program, solution, started))
+            return SolverStatsSignature.sign(result)
+
+        except (InfeasibleCalculationError, DeadlineExceededError, CalculationCancelledError) as e:
+            ERROR_LOGGER.error(f"Ошибка расчета распределения: {str(e)}")
+            raise type(e)(f"Ошибка при расчете: {str(e)}")
+        except Exception as e:
+            ERROR_LOGGER.error(f"Ошибка расчета распределения: {str(e)}")
+            raise ValueError(f"Ошибка при расчете: {str(e)}")
 
-            # Создание переменных решения
-            V_pg = cls._create_decision_variables(solver, data, N)
+    @classmethod
+    def sweep_distribution(cls, data: Dict, parameter: str, start: float, end: float) -> Dict:
+        """
+        Параметрический расчет по цене (C_pg или C_k) на отрезке [start, end].
+        Возвращает точки излома кривой целевой функции и распределение на каждом отрезке
+        между ними. Решается встроенным симплекс-методом с переходом от базиса к базису,
+        без повторного расчета по сетке значений.
+        """
+        try:
+            furnaces = FurnaceArrays(dict(data, **{parameter: start}))
+            program = cls._build_linear_program(furnaces)
+            cls._screen_feasibility(furnaces, program)
+            gradient = furnaces.objective_gradient(parameter)
 
-            # Настройка целевой функции
-            cls._setup_objective_function(solver, data, V_pg, N)
+            solution = BoundedSimplexEngine.sweep(program, gradient, end - start)
+            if solution.status != "OPTIMAL":
+                raise InfeasibleCalculationError("Оптимальное решение не найдено. Проверьте ограничения.")
 
-            # Добавление ограничений
-            cls._add_constraints(solver, data, V_pg, N)
+            # Соседние отрезки с одинаковым распределением объединяются
+            segments = []
+            for t_from, t_to, values in solution.segments:
+                if segments and np.allclose(segments[-1][2], values, rtol=0.0, atol=1e-6):
+                    segments[-1][1] = t_to
+                else:
+                    segments.append([t_from, t_to, values])
 
-            # Решение задачи
-            if not solver.Solve() == pywraplp.Solver.OPTIMAL:
-                raise ValueError("Оптимальное решение не найдено. Проверьте ограничения.")
+            results = []
+            for t_from, t_to, values in segments:
+                objective = program.objective + t_from * gradient
+                result = cls._prepare_results(furnaces, values, objective @ values)
+                result.update({
+                    "from": round(start + t_from, 6),
+                    "to": round(start + t_to, 6),
+                    "objective_to": round(float((objective + (t_to - t_from) * gradient) @ values), 2),
+                })
+                results.append(result)
 
-            # Формирование результатов
-            return cls._prepare_results(data, V_pg, N, solver.Objective().Value())
+            return {
+                "parameter": parameter,
+                "breakpoints": [result["from"] for result in results[1:]],
+                "segments": results,
+            }
 
+        except InfeasibleCalculationError as e:
+            ERROR_LOGGER.error(f"Ошибка параметрического расчета: {str(e)}")
+            raise InfeasibleCalculationError(f"Ошибка при расчете: {str(e)}")
         except Exception as e:
-            ERROR_LOGGER.error(f"Ошибка расчета распределения: {str(e)}")
+            ERROR_LOGGER.error(f"Ошибка параметрического расчета: {str(e)}")
             raise ValueError(f"Ошибка при расчете: {str(e)}")
 
+    @classmethod
+    def _screen_feasibility(cls, furnaces: FurnaceArrays, program: LinearProgram):
+        """
+        Проверка совместности до вызова решателя. Очевидно несовместные данные отклоняются
+        с указанием нарушенного ограничения и величины нарушения:
+        - пустой диапазон расхода ПГ печи (V_pg_min/V_pg_max вместе с границами по сере);
+        - ограничение цеха, недостижимое даже при крайних расходах всех печей.
+        Проверка необходимая, но не достаточная: совместность нескольких ограничений вместе
+        определяет решатель.
+        """
+        def tol(value):
+            return cls.SCREEN_TOL * (1.0 + np.abs(value))
+
+        gap = program.lower - program.upper
+        empty = np.flatnonzero(gap > tol(program.upper))
+        if empty.size:
+            messages = []
+            for j in empty[:cls.SCREEN_MAX_FURNACES]:
+                lower_source = "V_pg_min" if program.lower[j] <= furnaces.V_pg_min[j] else "по содержанию серы"
+                upper_source = "V_pg_max" if program.upper[j] >= furnaces.V_pg_max[j] else "по содержанию серы"
+                messages.append(
+                    f"печь {j + 1}: нижняя граница расхода ПГ {program.lower[j]:.2f} ({lower_source}) "
+                    f"больше верхней {program.upper[j]:.2f} ({upper_source}) на {gap[j]:.2f} м3/ч"
+                )
+            if empty.size > cls.SCREEN_MAX_FURNACES:
+                messages.append(f"всего печей с пустым диапазоном: {empty.size}")
+            raise InfeasibleCalculationError("Ограничения несовместны: " + "; ".join(messages))
+
+        minimum, maximum = program.activity_bounds()
+        for name, (row, side) in cls.CONSTRAINTS.items():
+            label, unit = cls.CONSTRAINT_LABELS[name]
+            limit = getattr(furnaces, name)
+            # Граница строки модели отличается от параметра цеха на постоянное слагаемое
+            if side == "upper":
+                value = minimum[row] + limit - program.row_upper[row]
+                excess, comparison = value - limit, "больше"
+            else:
+                value = maximum[row] + limit - program.row_lower[row]
+                excess, comparison = limit - value, "меньше"
+            if excess > tol(limit):
+                raise InfeasibleCalculationError(
+                    f"Ограничения несовместны: {label} {value:.2f} {unit} "
+                    f"{comparison} {name} = {limit:.2f} на {excess:.2f} {unit}"
+                )
+
     @staticmethod
-    def _init_solver():
-        """Инициализация решателя SCIP"""
-        solver = pywraplp.Solver.CreateSolver("SCIP")
-        if not solver:
-            raise ValueError("Не удалось инициализировать решатель SCIP")
-        return solver
+    @Metrics.timed("solve")
+    def _solve(program: LinearProgram, backend: Optional[str] = None, deadline: Optional[Deadline] = None) -> LPSolution:
+        """
+        Решение модели выбранным решателем с переходом на запасной при сбое встроенного движка.
+        При GAS_PRESOLVE решателю передается приведенная задача (gas.presolve), решение
+        переводится обратно в исходные переменные. В решении отмечаются решатель и время
+        решения вместе с предварительной обработкой.
+        """
+        start = time.perf_counter()
+        presolve = Presolve(program) if settings.GAS_PRESOLVE else None
+        if presolve is not None and presolve.solution is not None:
+            solution, name = presolve.solution, "presolve"
+        else:
+            reduced = presolve.program if presolve is not None else program
+            solver = SolverBackendRegistry.select(backend, reduced)
+            name = solver.name
+            try:
+                solution = solver.solve(reduced, deadline)
+            except EngineError as e:
+                name = settings.GAS_SOLVER_FALLBACK
+                BASE_LOGGER.warning(f"Решатель {solver.name} не решил задачу ({str(e)}), используется {name}")
+                solution = SolverBackendRegistry.get(name).solve(reduced, deadline)
+            if presolve is not None:
+                solution = presolve.restore(solution)
+
+        solution.backend = name
+        solution.solve_time = time.perf_counter() - start
+        return solution
+
+    @staticmethod
+    @Metrics.timed("solve")
+    def _solve_sensitivity(program: LinearProgram, backend: Optional[str] = None,
+                           deadline: Optional[Deadline] = None) -> LPSolution:
+        """
+        Решение с анализом чувствительности встроенным симплекс-методом. Другой явно заданный
+        решатель и задача больше, чем рассчитан встроенный движок (SimplexEngineBackend.supports), -
+        ошибка. Если движок не решил задачу, она решается запасным решателем без анализа.
+        """
+        if backend and backend.lower() not in (SolverBackendRegistry.AUTO, "simplex"):
+            raise ValueError(
+                f"Анализ чувствительности считается встроенным симплекс-методом, "
+                f"решатель {backend} с ним не используется (укажите auto или simplex)"
+            )
+        engine = SolverBackendRegistry.get("simplex")
+        if not engine.supports(program):
+            raise ValueError(
+                f"Анализ чувствительности доступен для задач не более {engine.MAX_VARIABLES} переменных "
+                f"и {engine.MAX_ROWS} ограничений ({program.num_variables} переменных, {program.num_rows} ограничений)"
+            )
+
+        start = time.perf_counter()
+        try:
+            solution = BoundedSimplexEngine.solve(program, sensitivity=True, stop=deadline.stopped if deadline else None)
+            solution.backend = engine.name
+        except EngineError as e:
+            name = settings.GAS_SOLVER_FALLBACK
+            BASE_LOGGER.warning(f"Анализ чувствительности не выполнен ({str(e)}), задача решается {name} без анализа")
+            solution = SolverBackendRegistry.get(name).solve(program, deadline)
+            solution.backend = name
+        solution.solve_time = time.perf_counter() - start
+        return solution
 
     @staticmethod
-    def _create_decision_variables(solver, data: Dict, N: int) -> List:
-        """Создание переменных решения для каждой печи"""
-        return [
-            solver.NumVar(
-                float(data["V_pg_min"][i]),
-                float(data["V_pg_max"][i]),
-                f"V_pg_{i}"
-            ) for i in range(N)
-        ]
+    def _check_solution(program: LinearProgram, solution: LPSolution, deadline: Optional[Deadline] = None):
+        """
+        Проверка статуса решения. Допустимое, но не оптимальное решение принимается только
+        при прерывании по сроку и только после проверки ограничений (некоторые решатели
+        при остановке по времени возвращают статус FEASIBLE для недопустимой точки);
+        прерывание без решения или отмена расчета - ошибка срока или отмены.
+        """
+        if solution.status == "OPTIMAL":
+            return
+        if deadline is not None and deadline.stopped():
+            feasible = solution.status == "FEASIBLE" and solution.values is not None
+            if not deadline.cancelled and feasible and program.is_feasible(solution.values):
+                return
+            raise deadline.error()
+        raise InfeasibleCalculationError("Оптимальное решение не найдено. Проверьте ограничения.")
+
+    @staticmethod
+    def _solver_stats(program: LinearProgram, solution: LPSolution, started: float,
+                      previous: Sequence[LPSolution] = ()) -> Dict:
+        """
+        Показатели расчета для истории: решатель, общее время расчета и время решателя (мс),
+        число итераций, размер модели. cache_hit заменяет CalculationCache при ответе из кэша.
+        К результату с показателями добавляется их подпись (gas.signing.SolverStatsSignature).
+        previous - предыдущие решения того же расчета (релаксация, прошлые раунды): время и итерации
+        суммируются. Если хотя бы один решатель не сообщает число итераций, оно не записывается (None).
+        """
+        solutions = [*previous, solution]
+        solve_times = [item.solve_time for item in solutions]
+        iterations = [item.iterations for item in solutions]
+        return {
+            "backend": solution.backend,
+            "wall_time_ms": round((time.perf_counter() - started) * 1000, 3),
+            "solve_time_ms": round(sum(solve_times) * 1000, 3) if None not in solve_times else None,
+            "iterations": int(sum(iterations)) if None not in iterations else None,
+            "variables": int(program.objective.size),
+            "constraints": int(program.rows.shape[0]),
+            "cache_hit": False,
+        }
+
+    @staticmethod
+    def _result_status(solution: LPSolution) -> str:
+        """Статус результата: OPTIMAL или FEASIBLE_TIMEOUT для решения, прерванного по сроку"""
+        return "OPTIMAL" if solution.status == "OPTIMAL" else "FEASIBLE_TIMEOUT"
 
     @classmethod
-    def _setup_objective_function(cls, solver, data: Dict, V_pg: List, N: int):
-        """Настройка целевой функции для максимизации эффективности"""
-        objective = solver.Objective()
-        for i in range(N):
-            # Расчет коэффициента для целевой функции
-            term1 = 0.5 * (data["e"][i] * data["C_k"] - data["C_pg"])
-            term2 = 0.5 * cls.C_p * (data["delta_P_pg"][i] - data["e"][i] * data["delta_P_k"][i])
-            objective.SetCoefficient(V_pg[i], term1 + term2)
-        objective.SetMaximization()
+    @Metrics.timed("build")
+    def _build_linear_program(cls, furnaces: FurnaceArrays) -> LinearProgram:
+        """Построение модели: целевая функция, границы печей и ограничения по газу, коксу и чугуну"""
+        lower, upper = furnaces.sulfur_bounds()
+
+        return LinearProgram(
+            objective=furnaces.objective_coefficients(cls.C_p),
+            lower=lower,
+            upper=upper,
+            rows=np.vstack([
+                np.ones(furnaces.N),  # 1. Общий расход ПГ
+                -0.001 * furnaces.e,  # 2. Расход кокса
+                furnaces.delta_P,  # 3. Производство чугуна
+            ]),
+            row_lower=[
+                0.0,
+                -INFINITY,
+                furnaces.P_total - furnaces.P_0.sum() + furnaces.V_pg_0 @ furnaces.delta_P,
+            ],
+            row_upper=[
+                furnaces.V_pg_total,
+                furnaces.K_total - furnaces.K_0.sum() + 0.001 * (furnaces.V_pg_0 @ furnaces.e),
+                INFINITY,
+            ],
+        )
+
+    @staticmethod
+    @Metrics.timed("prepare")
+    def _prepare_results(furnaces: FurnaceArrays, gas_values: np.ndarray, objective_value: float,
+                         status: str = "OPTIMAL") -> Dict:
+        """Подготовка итоговых результатов расчета"""
+        gas_values = np.asarray(gas_values, dtype=np.float64)
+
+        return {
+            "objective": round(float(objective_value), 2),
+            "gas_distribution": np.round(gas_values, 2).tolist(),
+            "total_gas_consumption": round(float(gas_values.sum()), 2),
+            "total_coke_consumption": round(float(furnaces.coke_consumption(gas_values).sum()), 2),
+            "total_iron_production": round(float(furnaces.iron_production(gas_values).sum()), 2),
+            "sulfur_content": np.round(furnaces.sulfur_content(gas_values), 6).tolist(),
+            "status": status
+        }
+
+    @classmethod
+    @Metrics.timed("prepare")
+    def _prepare_sensitivity(cls, furnaces: FurnaceArrays, program: LinearProgram,
+                             analysis: SensitivityAnalysis) -> Dict:
+        """
+        Двойственные оценки ограничений цеха, приведенные стоимости печей и диапазоны,
+        в которых оптимальный базис не меняется. Бесконечные границы диапазонов - None.
+        """
+        def bounds(low, high, offset=0.0, digits=6):
+            return [
+                round(float(value + offset), digits) if np.isfinite(value) else None
+                for value in (low, high)
+            ]
+
+        duals = analysis.row_duals()
+
+        # Границы строк модели отличаются от параметров цеха на постоянное слагаемое
+        offsets = {
+            "V_pg_total": furnaces.V_pg_total - program.row_upper[0],
+            "K_total": furnaces.K_total - program.row_upper[1],
+            "P_total": furnaces.P_total - program.row_lower[2],
+        }
+        constraints = {}
+        for name, (row, side) in cls.CONSTRAINTS.items():
+            constraints[name] = {
+                "value": getattr(furnaces, name),
+                "shadow_price": round(float(duals[row]), 6) if analysis.is_active(row, side) else 0.0,
+                "range": bounds(*analysis.bound_range(row, side), offset=offsets[name]),
+                "gas_derivatives": np.round(analysis.value_derivatives(row, side), 9).tolist(),
+            }
+
+        prices = {}
+        for name in cls.PRICES:
+            gradient = furnaces.objective_gradient(name)
+            low, high = analysis.cost_range(gradient)
+            prices[name] = {
+                "value": getattr(furnaces, name),
+                "range": bounds(low, high, offset=getattr(furnaces, name)),
+                "gradient": gradient.tolist(),
+            }
+
+        return {
+            "constraints": constraints,
+            "prices": prices,
+            "reduced_costs": np.round(analysis.reduced_costs(), 6).tolist(),
+            "objective_ranges": [bounds(low, high) for low, high in analysis.objective_ranges()],
+        }
+
+class MultiPeriodDistributionService(GasDistributionService):
+    """
+    Многопериодный (почасовой) расчет распределения ПГ одной линейной задачей.
+
+    Переменные - расход ПГ печи j в час t. Цены, лимиты цеха и границы расхода печей
+    могут задаваться по часам, изменение расхода печи между соседними часами ограничено
+    скоростью перехода (ramp). Матрица ограничений собирается в разреженном виде:
+    блочно-диагональная часть по часам (газ, кокс, чугун) и строки переходов между часами.
+    """
+
+    PERIOD_FIELDS = ["C_pg", "C_k", "V_pg_total", "K_total", "P_total"]
+    SCHEDULE_FIELDS = ["V_pg_min", "V_pg_max"]
 
     @classmethod
-    def _add_constraints(cls, solver, data: Dict, V_pg: List, N: int):
-        """Добавление всех ограничений в модель"""
-        # 1. Ограничение по общему расходу ПГ
-        cls._add_gas_constraint(solver, data, V_pg, N)
+    def calculate_distribution(cls, data: Dict, backend: Optional[str] = None,
+                               deadline: Optional[Deadline] = None) -> Dict:
+        """
+        data - входные данные расчета и "periods": {"T", почасовые C_pg, C_k, V_pg_total,
+        K_total, P_total (по T значений), V_pg_min, V_pg_max (T x N), ramp (N значений)}.
+        Незаданные почасовые величины берутся из основных входных данных.
+        """
+        started = time.perf_counter()
+        try:
+            furnaces = FurnaceArrays(data)
+            periods = cls._periods(furnaces, data["periods"])
 
-        # 2. Ограничение по расходу кокса
-        cls._add_coke_constraint(solver, data, V_pg, N)
+            program = cls._build_multi_period_program(furnaces, periods, data["periods"].get("ramp"))
+            solution = cls._solve(program, backend, deadline)
+            cls._check_solution(program, solution, deadline)
 
-        # 3. Ограничение по производству чугуна
-        cls._add_production_constraint(solver, data, V_pg, N)
+            schedule = np.asarray(solution.values).reshape(-1, furnaces.N)
+            result = cls._prepare_schedule_results(periods, schedule, cls._result_status(solution))
+            result.update(cls._solver_stats(program, solution, started))
+            return SolverStatsSignature.sign(result)
 
-        # 4. Ограничения по содержанию серы
-        cls._add_sulfur_constraints(solver, data, V_pg, N)
+        except (InfeasibleCalculationError, DeadlineExceededError, CalculationCancelledError) as e:
+            ERROR_LOGGER.error(f"Ошибка многопериодного расчета: {str(e)}")
+            raise type(e)(f"Ошибка при расчете: {str(e)}")
+        except Exception as e:
+            ERROR_LOGGER.error(f"Ошибка многопериодного расчета: {str(e)}")
+            raise ValueError(f"Ошибка при расчете: {str(e)}")
+
+    @classmethod
+    def _periods(cls, furnaces: FurnaceArrays, periods: Dict) -> FurnaceArrays:
+        """Параметры по часам: скаляры цеха - столбцы (T, 1), границы печей - массивы (T, N)"""
+        T = int(periods["T"])
+        fields = {}
+        for field in cls.PERIOD_FIELDS:
+            values = periods.get(field)
+            values = np.full(T, getattr(furnaces, field)) if values is None else np.asarray(values, dtype=np.float64)
+            fields[field] = values.reshape(T, 1)
+        for field in cls.SCHEDULE_FIELDS:
+            values = periods.get(field)
+            fields[field] = np.broadcast_to(getattr(furnaces, field) if values is None else values, (T, furnaces.N))
+        return furnaces.replace(**fields)
+
+    @classmethod
+    @Metrics.timed("build")
+    def _build_multi_period_program(cls, furnaces: FurnaceArrays, periods: FurnaceArrays,
+                                    ramp: Optional[List[float]]) -> LinearProgram:
+        """Разреженная модель на T часов. Порядок переменных: час, затем печь"""
+        T, N = periods.C_pg.shape[0], furnaces.N
+        lower, upper = periods.sulfur_bounds()
+        lower, upper = lower.copy(), upper.copy()
+
+        # Строки каждого часа совпадают с однопериодной моделью
+        block = sparse.csr_matrix(np.vstack([np.ones(N), -0.001 * furnaces.e, furnaces.delta_P]))
+        rows = [sparse.kron(sparse.identity(T, format="csr"), block, format="csr")]
+        row_lower = np.column_stack([
+            np.zeros(T),
+            np.full(T, -INFINITY),
+            periods.P_total[:, 0] - furnaces.P_0.sum() + furnaces.V_pg_0 @ furnaces.delta_P,
+        ]).ravel()
+        row_upper = np.column_stack([
+            periods.V_pg_total[:, 0],
+            periods.K_total[:, 0] - furnaces.K_0.sum() + 0.001 * (furnaces.V_pg_0 @ furnaces.e),
+            np.full(T, INFINITY),
+        ]).ravel()
+
+        # Скорость перехода: |x[t, j] - x[t-1, j]| <= ramp[j], первый час - от базового расхода
+        if ramp is not None:
+            ramp = np.asarray(ramp, dtype=np.float64)
+            lower[0] = np.maximum(lower[0], furnaces.V_pg_0 - ramp)
+            upper[0] = np.minimum(upper[0], furnaces.V_pg_0 + ramp)
+
+            limited = np.flatnonzero(np.isfinite(ramp))
+            if T > 1 and limited.size:
+                difference = sparse.diags([-np.ones(T - 1), np.ones(T - 1)], [0, 1], shape=(T - 1, T))
+                select = sparse.identity(N, format="csr")[limited]
+                rows.append(sparse.kron(difference, select, format="csr"))
+                row_lower = np.concatenate([row_lower, np.tile(-ramp[limited], T - 1)])
+                row_upper = np.concatenate([row_upper, np.tile(ramp[limited], T - 1)])
+
+        return LinearProgram(
+            objective=periods.objective_coefficients(cls.C_p).ravel(),
+            lower=lower.ravel(),
+            upper=upper.ravel(),
+            rows=sparse.vstack(rows, format="csr"),
+            row_lower=row_lower,
+            row_upper=row_upper,
+        )
 
     @staticmethod
-    def _add_gas_constraint(solver, data: Dict, V_pg: List, N: int):
-        """Ограничение по общему расходу природного газа"""
-        constraint = solver.Constraint(0, float(data["V_pg_total"]))
-        for i in range(N):
-            constraint.SetCoefficient(V_pg[i], 1)
+    @Metrics.timed("prepare")
+    def _prepare_schedule_results(periods: FurnaceArrays, schedule: np.ndarray, status: str = "OPTIMAL") -> Dict:
+        """
+        Результаты по часам. Поля однопериодного результата содержат средние за час значения
+        (для сохранения в истории), полный график хранится одним плоским массивом gas_schedule.
+        """
+        objective = (periods.objective_coefficients(GasDistributionService.C_p) * schedule).sum(axis=1)
+        gas = schedule.sum(axis=1)
+        coke = periods.total_coke_consumption(schedule)
+        iron = periods.total_iron_production(schedule)
+        sulfur = periods.sulfur_content(schedule)
+
+        return {
+            "objective": round(float(objective.sum()), 2),
+            "gas_distribution": np.round(schedule.mean(axis=0), 2).tolist(),
+            "total_gas_consumption": round(float(gas.mean()), 2),
+            "total_coke_consumption": round(float(coke.mean()), 2),
+            "total_iron_production": round(float(iron.mean()), 2),
+            "sulfur_content": np.round(sulfur.mean(axis=0), 6).tolist(),
+            "status": status,
+            "gas_schedule": np.round(schedule, 2).ravel().tolist(),
+            "periods": {
+                "objective": np.round(objective, 2).tolist(),
+                "total_gas_consumption": np.round(gas, 2).tolist(),
+                "total_coke_consumption": np.round(coke, 2).tolist(),
+                "total_iron_production": np.round(iron, 2).tolist(),
+            },
+        }
+
+
+class DiscreteDistributionService(GasDistributionService):
+    """
+    Дискретный режим расчета (смешанная целочисленная задача, SCIP).
+
+    Уставки расхода ПГ задаются с шагом регулятора (step - для всех печей, steps - по печам,
+    0 - без шага), печи из switchable можно отключить полностью (полунепрерывный расход:
+    0 или значение в границах печи). Отключенная печь по сере не проверяется: линейная
+    модель серы справедлива только в рабочем диапазоне расхода.
+
+    Сначала решается линейная релаксация, ее решение округляется до ближайших уставок
+    и передается SCIP как начальное. Расчет останавливается при относительном разрыве
+    оптимальности gap (по умолчанию GAS_MIP_GAP) или через time_limit секунд
+    (по умолчанию GAS_MIP_TIME_LIMIT), разрыв возвращается в результате.
+    """
+
+    STEP_TOL = 1e-9  # Допуск при проверке кратности границ шагу
+
+    @classmethod
+    def calculate_distribution(cls, data: Dict, deadline: Optional[Deadline] = None) -> Dict:
+        started = time.perf_counter()
+        try:
+            furnaces = FurnaceArrays(data)
+            options = data.get("discrete") or {}
+            steps, switchable = cls._options(furnaces, options)
+
+            program = cls._build_linear_program(furnaces)
+            lower, upper = cls._setpoint_bounds(program, steps, switchable)
+            scale = np.where(steps > 0, steps, 1.0)
+
+            # Линейная релаксация: отключаемая печь может работать от нуля
+            relaxed = LinearProgram(
+                program.objective, np.where(switchable, np.minimum(program.lower, 0.0), program.lower),
+                program.upper, program.rows, program.row_lower, program.row_upper,
+            )
+            cls._screen_feasibility(furnaces, relaxed)
+            relaxation = cls._solve(relaxed, deadline=deadline)
+            cls._check_solution(relaxed, relaxation, deadline)
+
+            mip, integer = cls._build_mixed_integer_program(program, steps, switchable, lower, upper)
+            hint = cls._round_relaxation(relaxation.values, mip, program, steps, switchable, lower, upper)
+            hint_feasible = mip.is_feasible(hint)
+
+            with Metrics.phase("solve"):
+                start = time.perf_counter()
+                solution = MixedIntegerBackend.solve(
+                    mip, integer, hint=hint,
+                    gap=options.get("gap", settings.GAS_MIP_GAP),
+                    time_limit=options.get("time_limit", settings.GAS_MIP_TIME_LIMIT),
+                    deadline=deadline,
+                )
+                solution.backend, solution.solve_time = MixedIntegerBackend.solver_id.lower(), time.perf_counter() - start
+            cls._check_mixed_integer_solution(solution, deadline)
+
+            gas = scale * solution.values[:furnaces.N]
+            running = solution.values[furnaces.N:] > 0.5
+            result = cls._prepare_results(furnaces, gas, solution.objective, cls._result_status(solution))
+            result["discrete"] = {
+                "gap": round(abs(solution.bound - solution.objective) / max(abs(solution.objective), 1e-9), 6),
+                "bound": round(float(solution.bound), 2),
+                "relaxation_objective": round(float(relaxation.objective), 2),
+                "warm_start_objective": round(float(mip.objective @ hint), 2) if hint_feasible else None,
+                "switched_off": (np.flatnonzero(switchable)[~running] + 1).tolist(),
+            }
+            # Время и итерации решателя - релаксация и целочисленная задача
+            result.update(cls._solver_stats(mip, solution, started, previous=[relaxation]))
+            return SolverStatsSignature.sign(result)
+
+        except (InfeasibleCalculationError, DeadlineExceededError, CalculationCancelledError) as e:
+            ERROR_LOGGER.error(f"Ошибка дискретного расчета: {str(e)}")
+            raise type(e)(f"Ошибка при расчете: {str(e)}")
+        except Exception as e:
+            ERROR_LOGGER.error(f"Ошибка дискретного расчета: {str(e)}")
+            raise ValueError(f"Ошибка при расчете: {str(e)}")
 
     @staticmethod
-    def _add_coke_constraint(solver, data: Dict, V_pg: List, N: int):
-        """Ограничение по общему расходу кокса"""
-        constraint = solver.Constraint(-solver.infinity(), float(data["K_total"]))
-        sum_K_0 = sum(data["K_0"])
-        sum_V_pg_0_e = sum(data["V_pg_0"][i] * data["e"][i] * 0.001 for i in range(N))
+    def _options(furnaces: FurnaceArrays, options: Dict):
+        """Шаг уставки по печам (0 - без шага) и маска отключаемых печей"""
+        steps = np.asarray(options.get("steps") or [options.get("step") or 0.0] * furnaces.N, dtype=np.float64)
+        switchable = np.asarray(options.get("switchable") or [False] * furnaces.N, dtype=bool)
+        return steps, switchable
 
-        for i in range(N):
-            constraint.SetCoefficient(V_pg[i], -0.001 * data["e"][i])
+    @classmethod
+    def _setpoint_bounds(cls, program: LinearProgram, steps: np.ndarray, switchable: np.ndarray):
+        """
+        Границы переменных целочисленной задачи в единицах шага (номер уставки) для работающей печи.
+        Печь без допустимой уставки в своих границах может быть только отключена.
+        """
+        stepped = steps > 0
+        scale = np.where(stepped, steps, 1.0)
+        lower = np.where(stepped, np.ceil(program.lower / scale - cls.STEP_TOL), program.lower)
+        upper = np.where(stepped, np.floor(program.upper / scale + cls.STEP_TOL), program.upper)
 
-        constraint.SetUb(data["K_total"] - sum_K_0 + sum_V_pg_0_e)
+        empty = np.flatnonzero((lower > upper) & ~switchable)
+        if empty.size:
+            j = empty[0]
+            raise InfeasibleCalculationError(
+                f"Ограничения несовместны: печь {j + 1}: в диапазоне расхода ПГ "
+                f"[{program.lower[j]:.2f}, {program.upper[j]:.2f}] нет уставки, кратной шагу {steps[j]:g} м3/ч"
+            )
+        return lower, upper
 
     @staticmethod
-    def _add_production_constraint(solver, data: Dict, V_pg: List, N: int):
-        """Ограничение по минимальному производству чугуна"""
-        constraint = solver.Constraint(float(data["P_total"]), solver.infinity())
-        sum_P_0 = sum(data["P_0"])
-        sum_V_pg_0_coeff = sum(
-            data["V_pg_0"][i] * (data["delta_P_pg"][i] - data["e"][i] * data["delta_P_k"][i])
-            for i in range(N)
+    @Metrics.timed("build")
+    def _build_mixed_integer_program(program: LinearProgram, steps: np.ndarray, switchable: np.ndarray,
+                                     lower: np.ndarray, upper: np.ndarray):
+        """
+        Переменные: номер уставки (или расход для печей без шага) по печам, затем признак
+        работы для каждой отключаемой печи: lower·y <= z <= upper·y.
+        """
+        n = program.num_variables
+        scale = np.where(steps > 0, steps, 1.0)
+        on = np.flatnonzero(switchable)
+        m = on.size
+        # Печь без допустимой уставки остается отключенной
+        empty = lower > upper
+        upper = np.where(empty, 0.0, upper)
+
+        select = sparse.identity(n, format="csr")[on]
+        rows = sparse.vstack([
+            sparse.hstack([program.rows @ sparse.diags(scale), sparse.csr_matrix((program.num_rows, m))]),
+            sparse.hstack([select, -sparse.diags(upper[on])]),  # z <= upper·y
+            sparse.hstack([select, -sparse.diags(lower[on])]),  # z >= lower·y
+        ], format="csr")
+
+        mip = LinearProgram(
+            objective=np.concatenate([program.objective * scale, np.zeros(m)]),
+            lower=np.concatenate([np.where(switchable, 0.0, lower), np.zeros(m)]),
+            upper=np.concatenate([upper, np.where(empty[on], 0.0, 1.0)]),
+            rows=rows,
+            row_lower=np.concatenate([program.row_lower, np.full(m, -INFINITY), np.zeros(m)]),
+            row_upper=np.concatenate([program.row_upper, np.zeros(m), np.full(m, INFINITY)]),
         )
+        integer = np.concatenate([steps > 0, np.ones(m, dtype=bool)])
+        return mip, integer
 
-        for i in range(N):
-            coeff = data["delta_P_pg"][i] - data["e"][i] * data["delta_P_k"][i]
-            constraint.SetCoefficient(V_pg[i], coeff)
+    @staticmethod
+    def _round_relaxation(values: np.ndarray, mip: LinearProgram, program: LinearProgram, steps: np.ndarray,
+                          switchable: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+        """
+        Начальное решение из релаксации: отключаемая печь с расходом меньше половины нижней
+        границы отключается, уставки остальных округляются к ближайшей, вниз и вверх;
+        выбирается лучший допустимый вариант (если допустимых нет - округление к ближайшей).
+        """
+        stepped = steps > 0
+        running = ~switchable | ((values >= 0.5 * program.lower) & (lower <= upper))
+        ratio = values / np.where(stepped, steps, 1.0)
+
+        candidates = []
+        for rounding in (np.round, np.floor, np.ceil):
+            setpoints = np.where(stepped, rounding(ratio), values)
+            setpoints = np.where(running, np.clip(setpoints, lower, np.maximum(lower, upper)), 0.0)
+            candidates.append(np.concatenate([setpoints, running[switchable].astype(np.float64)]))
 
-        constraint.SetLb(data["P_total"] - sum_P_0 + sum_V_pg_0_coeff)
+        feasible = [hint for hint in candidates if mip.is_feasible(hint)]
+        if not feasible:
+            return candidates[0]
+        sign = 1.0 if mip.maximize else -1.0
+        return max(feasible, key=lambda hint: sign * (mip.objective @ hint))
 
     @staticmethod
-    def _add_sulfur_constraints(solver, data: Dict, V_pg: List, N: int):
-        """Ограничения по содержанию серы в чугуне"""
-        for i in range(N):
-            coeff = (
-                    data["delta_S_pg"][i] - data["e"][i] * data["delta_S_k"][i] +
-                    (data["delta_P_pg"][i] - data["e"][i] * data["delta_P_k"][i]) * data["delta_S_p"][i]
+    def _check_mixed_integer_solution(solution: LPSolution, deadline: Optional[Deadline] = None):
+        if solution.status in ("OPTIMAL", "FEASIBLE"):
+            return
+        if deadline is not None and deadline.stopped():
+            raise deadline.error()
+        if solution.status == "NOT_SOLVED":
+            raise InfeasibleCalculationError("Допустимые дискретные уставки не найдены за отведенное время")
+        raise InfeasibleCalculationError("Дискретные уставки несовместны с ограничениями цеха. Проверьте шаг и ограничения.")
+
+
+class NonlinearDistributionService(GasDistributionService):
+    """
+    Расчет с нелинейными характеристиками печей, заданными точками (gas.furnaces.ResponseCurve):
+    производство чугуна и содержание серы в зависимости от расхода ПГ.
+
+    Кривая производства приближается кусочно-линейной функцией: расход печи - сумма долей
+    по участкам между точками излома, у каждой доли свой прирост производства. Кривая вогнутая,
+    поэтому участки заполняются по порядку и задача остается линейной. Начальные точки излома -
+    границы печи и базовый расход; после каждого решения участок, содержащий оптимальный расход,
+    делится в точке наибольшего отклонения кривой от хорды, пока отклонение больше tolerance
+    (по умолчанию GAS_RESPONSE_TOL). Так модель уточняется только около оптимума и остается
+    намного меньше модели со всеми точками кривых.
+
+    Кривая серы задает границы расхода печи точно (участки, где содержание серы в [S_min, S_max]).
+    Печи без кривых рассчитываются по линейной модели.
+    """
+
+    @classmethod
+    def calculate_distribution(cls, data: Dict, backend: Optional[str] = None,
+                               deadline: Optional[Deadline] = None) -> Dict:
+        started = time.perf_counter()
+        try:
+            furnaces = FurnaceArrays(data)
+            options = data["response"]
+            curves = {
+                item["furnace"] - 1: ResponseCurve(item["V_pg"], item["P"], item.get("S"))
+                for item in options["curves"]
+            }
+            tolerance = options.get("tolerance", settings.GAS_RESPONSE_TOL)
+
+            lower, upper = cls._furnace_bounds(furnaces, curves)
+            breakpoints = {
+                j: np.unique([lower[j], min(max(furnaces.V_pg_0[j], lower[j]), upper[j]), upper[j]])
+                for j in curves
+            }
+
+            solutions = []
+            for rounds in range(1, settings.GAS_RESPONSE_MAX_ROUNDS + 1):
+                program, segments = cls._build_segment_program(furnaces, curves, breakpoints, lower, upper)
+                if rounds == 1:
+                    cls._screen_feasibility(furnaces, program)
+                solution = cls._solve(program, backend, deadline)
+                cls._check_solution(program, solution, deadline)
+                solutions.append(solution)
+
+                gas = lower + np.bincount(segments, solution.values, furnaces.N)
+                error = cls._refine(curves, breakpoints, gas, tolerance)
+                if error <= tolerance or solution.status != "OPTIMAL":
+                    break
+
+            result = cls._prepare_results(furnaces, gas, 0.0, cls._result_status(solution))
+            production = furnaces.iron_production(gas)
+            sulfur = furnaces.sulfur_content(gas)
+            for j, curve in curves.items():
+                production[j] = curve.production(gas[j])
+                if curve.S is not None:
+                    sulfur[j] = curve.sulfur(gas[j])
+
+            # Целевая функция линейной модели с поправкой на отклонение кривых производства от линейной
+            objective = furnaces.objective_coefficients(cls.C_p) @ gas
+            objective += 0.5 * cls.C_p * (production - furnaces.iron_production(gas)).sum()
+            result.update({
+                "objective": round(float(objective), 2),
+                "total_iron_production": round(float(production.sum()), 2),
+                "sulfur_content": np.round(sulfur, 6).tolist(),
+                "response": {
+                    "rounds": rounds,
+                    "breakpoints": int(sum(points.size for points in breakpoints.values())),
+                    "samples": int(sum(curve.V_pg.size for curve in curves.values())),
+                    "max_error": round(error, 6),
+                },
+            })
+            result.update(cls._solver_stats(program, solution, started, previous=solutions[:-1]))
+            return SolverStatsSignature.sign(result)
+
+        except (InfeasibleCalculationError, DeadlineExceededError, CalculationCancelledError) as e:
+            ERROR_LOGGER.error(f"Ошибка расчета по нелинейным характеристикам: {str(e)}")
+            raise type(e)(f"Ошибка при расчете: {str(e)}")
+        except Exception as e:
+            ERROR_LOGGER.error(f"Ошибка расчета по нелинейным характеристикам: {str(e)}")
+            raise ValueError(f"Ошибка при расчете: {str(e)}")
+
+    @staticmethod
+    def _furnace_bounds(furnaces: FurnaceArrays, curves: Dict[int, ResponseCurve]):
+        """
+        Границы расхода печей: V_pg_min/V_pg_max, область определения кривой и границы по сере
+        (по кривой серы, если она задана, иначе по линейной модели)
+        """
+        lower, upper = furnaces.sulfur_bounds()
+        for j, curve in curves.items():
+            low, high = max(furnaces.V_pg_min[j], curve.V_pg[0]), min(furnaces.V_pg_max[j], curve.V_pg[-1])
+            if curve.S is None:
+                low, high = max(low, lower[j]), min(high, upper[j])
+            else:
+                interval = curve.sulfur_interval(furnaces.S_min[j], furnaces.S_max[j], furnaces.V_pg_0[j])
+                if interval is None:
+                    raise InfeasibleCalculationError(
+                        f"Ограничения несовместны: печь {j + 1}: по кривой серы нет расхода ПГ, "
+                        f"при котором содержание серы в [{furnaces.S_min[j]:g}, {furnaces.S_max[j]:g}]"
+                    )
+                low, high = max(low, interval[0]), min(high, interval[1])
+            lower[j], upper[j] = low, high
+
+        empty = np.flatnonzero(lower > upper)
+        if empty.size:
+            j = empty[0]
+            raise InfeasibleCalculationError(
+                f"Ограничения несовместны: печь {j + 1}: нижняя граница расхода ПГ {lower[j]:.2f} "
+                f"больше верхней {upper[j]:.2f} на {lower[j] - upper[j]:.2f} м3/ч"
             )
+        return lower, upper
 
-            if abs(coeff) < 1e-10:  # Практически нулевой коэффициент
-                continue
+    @classmethod
+    @Metrics.timed("build")
+    def _build_segment_program(cls, furnaces: FurnaceArrays, curves: Dict[int, ResponseCurve],
+                               breakpoints: Dict[int, np.ndarray], lower: np.ndarray, upper: np.ndarray):
+        """
+        Модель по участкам: переменная - доля расхода печи на участке сверх нижней границы.
+        Печь без кривой - один участок с линейным приростом производства.
+        Возвращает модель и номер печи для каждой переменной.
+        """
+        linear = np.setdiff1d(np.arange(furnaces.N), list(curves))
+        segments = [linear]
+        lengths = [upper[linear] - lower[linear]]
+        slopes = [furnaces.delta_P[linear]]
+        production = furnaces.iron_production(lower)
+        for j, points in breakpoints.items():
+            values = curves[j].production(points)
+            segments.append(np.full(points.size - 1, j))
+            lengths.append(np.diff(points))
+            slopes.append(np.diff(values) / np.diff(points))
+            production[j] = values[0]
 
-            # Вычисление границ
-            delta_min = (data["S_min"][i] - data["S_0"][i]) / coeff
-            delta_max = (data["S_max"][i] - data["S_0"][i]) / coeff
+        # Переменные упорядочены по печам: участки каждой печи идут подряд
+        segments, lengths, slopes = (np.concatenate(parts) for parts in (segments, lengths, slopes))
+        order = np.argsort(segments, kind="stable")
+        segments, lengths, slopes = segments[order], lengths[order], slopes[order]
+        e = furnaces.e[segments]
 
-            # Установка границ с учетом базового значения
-            lower = data["V_pg_0"][i] + min(delta_min, delta_max)
-            upper = data["V_pg_0"][i] + max(delta_min, delta_max)
+        program = LinearProgram(
+            objective=0.5 * (e * furnaces.C_k - furnaces.C_pg) + 0.5 * cls.C_p * slopes,
+            lower=np.zeros(segments.size),
+            upper=lengths,
+            rows=np.vstack([np.ones(segments.size), -0.001 * e, slopes]),
+            row_lower=[-lower.sum(), -INFINITY, furnaces.P_total - production.sum()],
+            row_upper=[
+                furnaces.V_pg_total - lower.sum(),
+                furnaces.K_total - furnaces.K_0.sum() + 0.001 * (furnaces.V_pg_0 @ furnaces.e)
+                + 0.001 * (furnaces.e @ lower),
+                INFINITY,
+            ],
+        )
+        return program, segments
 
-            # Обновление границ переменной
-            V_pg[i].SetLb(max(float(data["V_pg_min"][i]), lower))
-            V_pg[i].SetUb(min(float(data["V_pg_max"][i]), upper))
+    @staticmethod
+    def _refine(curves: Dict[int, ResponseCurve], breakpoints: Dict[int, np.ndarray], gas: np.ndarray,
+                tolerance: float) -> float:
+        """
+        Уточнение точек излома около решения: участки, содержащие расход печи, делятся в точке
+        наибольшего отклонения кривой от хорды, если оно больше tolerance.
+        Возвращает наибольшее отклонение на этих участках до уточнения.
+        """
+        max_error = 0.0
+        for j, curve in curves.items():
+            points = breakpoints[j]
+            x = gas[j]
+            tol = 1e-9 * (1.0 + abs(x))
+            added = []
+            for k in np.flatnonzero((points[:-1] <= x + tol) & (points[1:] >= x - tol)):
+                error, point = curve.chord_error(points[k], points[k + 1])
+                max_error = max(max_error, error)
+                if error > tolerance:
+                    added.append(point)
+            if added:
+                breakpoints[j] = np.unique(np.concatenate([points, added]))
+        return max_error
+
+
+class SensitivityEstimateService:
+    """
+    Оценка результата при изменении ограничений цеха и цен без вызова решателя,
+    по анализу чувствительности ранее выполненного расчета.
+    Оценка точна, пока изменения не выводят из диапазонов устойчивости базиса.
+    Для одновременных изменений применяется правило 100%: сумма долей использованных
+    диапазонов не превышает единицы (отдельно для ограничений и для цен).
+    """
+
+    TOL = 1e-9
+
+    @classmethod
+    def estimate(cls, result: Dict, changes: Dict[str, float]) -> Dict:
+        sensitivity = result.get("sensitivity")
+        if not sensitivity:
+            raise ValueError("В расчете нет анализа чувствительности")
+
+        constraints, prices = sensitivity["constraints"], sensitivity["prices"]
+        for group in (constraints, prices):
+            names = [name for name in changes if name in group]
+            if cls._range_usage(group, changes, names) > 1.0 + cls.TOL:
+                raise OutOfRangeError(
+                    f"Изменение {', '.join(names)} выходит за диапазон устойчивости оптимального решения, "
+                    "требуется полный расчет"
+                )
+
+        gas = np.asarray(result["gas_distribution"], dtype=np.float64)
+        objective = float(result["objective"])
+        for name, delta in changes.items():
+            if name in constraints:
+                gas = gas + delta * np.asarray(constraints[name]["gas_derivatives"])
+                objective += delta * constraints[name]["shadow_price"]
+        for name, delta in changes.items():
+            if name in prices:
+                objective += delta * float(np.asarray(prices[name]["gradient"]) @ gas)
+
+        return {
+            "objective": round(objective, 2),
+            "gas_distribution": np.round(gas, 2).tolist(),
+            "total_gas_consumption": round(float(gas.sum()), 2),
+            "status": "ESTIMATE"
+        }
 
     @staticmethod
-    def _prepare_results(data: Dict, V_pg: List, N: int, objective_value: float) -> Dict:
-        """Подготовка итоговых результатов расчета"""
-        gas_values = [V_pg[i].solution_value() for i in range(N)]
+    def _range_usage(group: Dict, changes: Dict[str, float], names: List[str]) -> float:
+        """Сумма долей диапазонов, использованных изменениями"""
+        usage = 0.0
+        for name in names:
+            delta = changes[name]
+            if delta == 0:
+                continue
+            low, high = group[name]["range"]
+            limit = high if delta > 0 else low
+            if limit is None:
+                continue
+            allowed = abs(limit - group[name]["value"])
+            usage += abs(delta) / allowed if allowed > 0 else np.inf
+        return usage
+
+class RobustnessService:
+    """
+    Оценка устойчивости рассчитанного распределения ПГ методом Монте-Карло.
+
+    Коэффициенты влияния - регрессионные оценки, поэтому распределение проверяется
+    на множестве выборок коэффициентов. Выборки обрабатываются порциями массивов (S, N):
+    формулы FurnaceArrays применяются ко всем выборкам порции одной операцией NumPy,
+    по печам накапливаются моменты и частоты нарушений, по цеху - значения для квантилей.
+    """
+
+    UNCERTAIN_FIELDS = ["delta_P_pg", "delta_P_k", "delta_S_pg", "delta_S_k", "delta_S_p", "e"]
+    CHUNK_ELEMENTS = 262_144  # Элементов (выборок x печей) в одной порции
+    QUANTILES = {"p5": 5, "p50": 50, "p95": 95}
+
+    @classmethod
+    def evaluate(cls, data: Dict, gas_distribution: List[float], uncertainty: Dict[str, Dict],
+                 samples: int = 100_000, seed: Optional[int] = None, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        data - входные данные расчета, gas_distribution - проверяемое распределение ПГ.
+        uncertainty - неопределенность коэффициентов: {поле: {"std", "std_by_furnace",
+        "relative", "distribution"}}; std - стандартное отклонение нормального распределения
+        или полуширина равномерного, relative - в долях модуля коэффициента.
+        deadline - срок расчета, проверяется перед каждой порцией выборок.
+        """
+        furnaces = FurnaceArrays(data)
+        gas = np.asarray(gas_distribution, dtype=np.float64)
+        if gas.shape != (furnaces.N,):
+            raise ValueError(f"Распределение ПГ должно содержать ровно {furnaces.N} значений (по числу печей)")
+
+        spreads = {field: cls._spread(furnaces, field, spec) for field, spec in uncertainty.items()}
+        rng = np.random.default_rng(seed)
+        chunk = max(1, cls.CHUNK_ELEMENTS // furnaces.N)
+
+        iron = np.empty(samples)
+        coke = np.empty(samples)
+        sulfur_sum = np.zeros(furnaces.N)
+        sulfur_sq = np.zeros(furnaces.N)
+        sulfur_min = np.full(furnaces.N, np.inf)
+        sulfur_max = np.full(furnaces.N, -np.inf)
+        sulfur_violations = np.zeros(furnaces.N)
+        any_violations = 0
+
+        for start in range(0, samples, chunk):
+            if deadline is not None and deadline.stopped():
+                raise deadline.error()
+            size = min(chunk, samples - start)
+            fields = {}
+            for field, (spread, distribution) in spreads.items():
+                if distribution == "uniform":
+                    noise = rng.uniform(-1.0, 1.0, (size, furnaces.N))
+                else:
+                    noise = rng.standard_normal((size, furnaces.N))
+                fields[field] = getattr(furnaces, field) + spread * noise
+            sampled = furnaces.replace(**fields)
+
+            # Показатели цеха и печей для всех выборок порции
+            chunk_iron = np.broadcast_to(sampled.total_iron_production(gas), (size,))
+            chunk_coke = np.broadcast_to(sampled.total_coke_consumption(gas), (size,))
+            sulfur = np.broadcast_to(sampled.sulfur_content(gas), (size, furnaces.N))
+
+            iron[start:start + size] = chunk_iron
+            coke[start:start + size] = chunk_coke
+            sulfur_sum += sulfur.sum(axis=0)
+            sulfur_sq += np.einsum("ij,ij->j", sulfur, sulfur)
+            sulfur_min = np.minimum(sulfur_min, sulfur.min(axis=0))
+            sulfur_max = np.maximum(sulfur_max, sulfur.max(axis=0))
+
+            violated = (sulfur < furnaces.S_min) | (sulfur > furnaces.S_max)
+            sulfur_violations += violated.sum(axis=0)
+            any_violations += int(np.count_nonzero(
+                violated.any(axis=1) | (chunk_iron < furnaces.P_total) | (chunk_coke > furnaces.K_total)
+            ))
+
+        sulfur_mean = sulfur_sum / samples
+        sulfur_std = np.sqrt(np.maximum(sulfur_sq / samples - np.square(sulfur_mean), 0.0))
 
         return {
-            "objective": round(objective_value, 2),
-            "gas_distribution": [round(v, 2) for v in gas_values],
-            "total_gas_consumption": round(sum(gas_values), 2),
-            "total_coke_consumption": round(sum(
-                data["K_0"][i] + 0.001 * (data["V_pg_0"][i] - gas_values[i]) * data["e"][i]
-                for i in range(N)
-            ), 2),
-            "total_iron_production": round(sum(
-                (gas_values[i] - data["V_pg_0"][i]) * data["delta_P_pg"][i] -
-                data["e"][i] * (gas_values[i] - data["V_pg_0"][i]) * data["delta_P_k"][i] +
-                data["P_0"][i]
-                for i in range(N)
-            ), 2),
-            "sulfur_content": [
-                round(data["S_0"][i] + (gas_values[i] - data["V_pg_0"][i]) *
-                      (data["delta_S_pg"][i] - data["e"][i] * data["delta_S_k"][i]), 6)
-                for i in range(N)
-            ],
-            "status": "OPTIMAL"
+            "samples": samples,
+            "iron_production": cls._summary(iron, violated=iron < furnaces.P_total),
+            "coke_consumption": cls._summary(coke, violated=coke > furnaces.K_total),
+            "sulfur_content": {
+                "mean": np.round(sulfur_mean, 6).tolist(),
+                "std": np.round(sulfur_std, 6).tolist(),
+                "min": np.round(sulfur_min, 6).tolist(),
+                "max": np.round(sulfur_max, 6).tolist(),
+                "violation_probability": np.round(sulfur_violations / samples, 6).tolist(),
+            },
+            "any_violation_probability": round(any_violations / samples, 6),
         }
 
+    @classmethod
+    def _spread(cls, furnaces: FurnaceArrays, field: str, spec: Dict):
+        """Разброс коэффициента по печам и вид распределения"""
+        if field not in cls.UNCERTAIN_FIELDS:
+            raise ValueError(f"Неопределенность не поддерживается для поля {field}")
+
+        if spec.get("std_by_furnace") is not None:
+            spread = np.asarray(spec["std_by_furnace"], dtype=np.float64)
+            if spread.shape != (furnaces.N,):
+                raise ValueError(f"Поле {field}: std_by_furnace должно содержать ровно {furnaces.N} значений")
+        else:
+            spread = np.full(furnaces.N, float(spec.get("std", 0.0)))
+
+        if spec.get("relative", True):
+            spread = spread * np.abs(getattr(furnaces, field))
+        return spread, spec.get("distribution", "normal")
+
+    @classmethod
+    def _summary(cls, values: np.ndarray, violated: np.ndarray) -> Dict:
+        """Статистики выборки показателя цеха"""
+        quantiles = np.percentile(values, list(cls.QUANTILES.values()))
+        return dict(
+            mean=round(float(values.mean()), 4),
+            std=round(float(values.std()), 4),
+            min=round(float(values.min()), 4),
+            max=round(float(values.max()), 4),
+            **{name: round(float(value), 4) for name, value in zip(cls.QUANTILES, quantiles)},
+            violation_probability=round(float(np.count_nonzero(violated)) / values.size, 6),
+        )
+
 class MainParameters:
     """
     Класс для получения основных параметров.
@@ -249,4 +1124,56 @@ class DefaultInputValues:
             **BasicFurnaceParameters.values(cls.N),
             **SulfurParameters.values(cls.N),
             **InfluenceCoefficients.values(cls.N)
-        )
\ No newline at end of file
+        )
+
+class SyntheticInputValues:
+    """
+    Сервис для получения синтетических входных данных произвольного размера.
+    Печи повторяют заготовленные с детерминированным разбросом параметров,
+    лимиты цеха масштабируются по числу печей.
+    """
+
+    FURNACE_FIELDS = FurnaceArrays.FURNACE_FIELDS
+    JITTER_FIELDS = ["K_0", "e", "P_0", "delta_P_pg", "delta_P_k", "delta_S_pg", "delta_S_k"]
+
+    @classmethod
+    def get_values(cls, N: int, seed: int = 0) -> Dict:
+        rng = random.Random(seed)
+        base = DefaultInputValues.get_default_values()
+        scale = N / base["N"]
+
+        data = dict(
+            N=N,
+            C_k=base["C_k"],
+            C_pg=base["C_pg"],
+            V_pg_total=base["V_pg_total"] * scale,
+            K_total=base["K_total"] * scale,
+            P_total=base["P_total"] * scale,
+            **{field: [] for field in cls.FURNACE_FIELDS}
+        )
+
+        for i in range(N):
+            j = i % base["N"]
+            for field in cls.FURNACE_FIELDS:
+                value = base[field][j]
+                if field in cls.JITTER_FIELDS:
+                    value *= 1 + rng.uniform(-0.03, 0.03)
+                data[field].append(value)
+
+            # Базовый расход ПГ смещается в пределах границ печи
+            data["V_pg_0"][i] = min(max(data["V_pg_0"][i] * (1 + rng.uniform(-0.05, 0.05)),
+                                        data["V_pg_min"][i]), data["V_pg_max"][i])
+
+        return data
+
+    @classmethod
+    def get_periods(cls, data: Dict, T: int, seed: int = 0) -> Dict:
+        """Почасовые параметры: суточные колебания цены ПГ, лимиты цеха с разбросом и ограничение перехода"""
+        rng = random.Random(seed)
+        return dict(
+            T=T,
+            C_pg=[data["C_pg"] * (1 + 0.3 * math.sin(2 * math.pi * t / 24)) for t in range(T)],
+            V_pg_total=[data["V_pg_total"] * (1 - rng.uniform(0, 0.05)) for _ in range(T)],
+            K_total=[data["K_total"] * (1 + rng.uniform(-0.02, 0.02)) for _ in range(T)],
+            ramp=[1000.0] * data["N"],
+        )
@@ -0,0 +1,41 @@
+import math
+from typing import Dict
+
+from django.core import signing
+
+
+class SolverStatsSignature:
+    """
+    Подпись показателей расчета (решатель, время, итерации, размер модели, cache_hit).
+
+    Показатели возвращаются клиенту вместе с результатом и сохраняются в истории, когда клиент
+    отправляет результат в POST /api/gas/history/. Чтобы отчет о производительности строился
+    только по измеренным сервером значениям, к результату добавляется stats_token - показатели,
+    подписанные SECRET_KEY (django.core.signing) вместе с целевой функцией и количеством печей.
+    При сохранении показатели берутся только из проверенной подписи.
+    """
+
+    FIELDS = ["backend", "wall_time_ms", "solve_time_ms", "iterations", "variables", "constraints", "cache_hit"]
+    SALT = "gas.history.stats"
+
+    @classmethod
+    def sign(cls, result: Dict) -> Dict:
+        """Добавление stats_token к результату расчета с показателями"""
+        payload = {
+            "stats": {field: result.get(field) for field in cls.FIELDS},
+            "objective": result["objective"],
+            "N": len(result["gas_distribution"]),
+        }
+        result["stats_token"] = signing.dumps(payload, salt=cls.SALT, compress=True)
+        return result
+
+    @classmethod
+    def verify(cls, token: str, objective: float, N: int) -> Dict:
+        """Показатели из подписи; ValueError - подпись недействительна или относится к другому результату"""
+        try:
+            payload = signing.loads(token, salt=cls.SALT)
+        except signing.BadSignature:
+            raise ValueError("Недействительная подпись показателей расчета")
+        if payload["N"] != N or not math.isclose(payload["objective"], objective, rel_tol=1e-9, abs_tol=1e-6):
+            raise ValueError("Подпись показателей относится к другому расчету")
+        return payload["stats"]
@@ -0,0 +1,277 @@
+import json
+import os
+import queue
+import socketserver
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from gas.deadline import Deadline
+from gas.services import GasDistributionService
+
+from server.settings import BASE_LOGGER, ERROR_LOGGER
+
+
+class TelemetryOptimizer:
+    """
+    Пересчет распределения по потоку измерений печей (manage.py telemetry).
+
+    Измерения - JSON-объекты (NDJSON) с текущими значениями V_pg_0, K_0, P_0, S_0:
+        {"furnace": 3, "V_pg_0": 12150.0, "S_0": 0.0231}    - одна печь (номер с 1)
+        {"V_pg_0": [...], "K_0": [...]}                     - списки по всем печам
+    Расчет выполняется, только если входные данные отличаются от использованных в последнем расчете
+    больше чем на GAS_TELEMETRY_THRESHOLD (относительно), и не сразу: после существенного изменения
+    ожидается GAS_TELEMETRY_DEBOUNCE секунд без новых изменений, но не дольше GAS_TELEMETRY_MAX_DELAY.
+    Расчеты идут в одном потоке решателем GAS_TELEMETRY_BACKEND: шаблон модели clp сохраняется
+    между расчетами, поэтому следующий расчет начинается с базиса предыдущего.
+    Последняя рекомендация записывается в файл GAS_TELEMETRY_FILE (атомарной заменой), откуда ее читают
+    веб-процессы; при нескольких серверах файл должен быть на общем для них томе.
+    """
+
+    FIELDS = ["V_pg_0", "K_0", "P_0", "S_0"]
+    POLL_INTERVAL = 0.1  # Период проверки срока пересчета при отсутствии измерений, с
+    VALUE_FLOOR = 1e-9  # Нижняя граница знаменателя относительного изменения
+
+    def __init__(self, data: Dict, backend: Optional[str] = None):
+        self.data = dict(data)
+        self.N = int(data["N"])
+        self.backend = backend or settings.GAS_TELEMETRY_BACKEND
+        self.values = {field: np.array(data[field], dtype=np.float64) for field in self.FIELDS}
+        self.solved = None  # Входные данные последнего расчета
+        self.changed_at = None  # Первое существенное изменение после расчета
+        self.last_change_at = None
+        self.result = None
+        self.version = 0
+        self.measurements = 0
+
+    def apply(self, record: Dict, now: Optional[float] = None) -> bool:
+        """Учет измерения. Возвращает True, если входные данные существенно отличаются от последнего расчета"""
+        if not isinstance(record, dict):
+            raise ValueError("Измерение должно быть JSON-объектом")
+        unknown = set(record) - set(self.FIELDS) - {"furnace", "time"}
+        if unknown:
+            raise ValueError(f"Неизвестные поля измерения: {', '.join(sorted(unknown))}")
+
+        if "furnace" in record:
+            j = int(record["furnace"]) - 1
+            if not 0 <= j < self.N:
+                raise ValueError(f"Номер печи должен быть от 1 до {self.N}")
+            updates = {field: float(record[field]) for field in self.FIELDS if field in record}
+        else:
+            j = slice(None)
+            updates = {field: np.asarray(record[field], dtype=np.float64) for field in self.FIELDS if field in record}
+            for field, value in updates.items():
+                if value.shape != (self.N,):
+                    raise ValueError(f"Поле {field} должно содержать ровно {self.N} значений (по числу печей)")
+        for field, value in updates.items():
+            if not np.all(np.isfinite(value)):
+                raise ValueError(f"Поле {field} должно содержать только конечные числа")
+        for field, value in updates.items():
+            self.values[field][j] = value
+        self.measurements += 1
+
+        if not self.is_material():
+            return False
+        now = time.monotonic() if now is None else now
+        if self.changed_at is None:
+            self.changed_at = now
+        self.last_change_at = now
+        return True
+
+    def is_material(self) -> bool:
+        if self.solved is None:
+            return True
+        threshold = settings.GAS_TELEMETRY_THRESHOLD
+        for field in self.FIELDS:
+            base = self.solved[field]
+            change = np.abs(self.values[field] - base)
+            if np.any(change > threshold * np.maximum(np.abs(base), self.VALUE_FLOOR)):
+                return True
+        return False
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """Пора пересчитать: изменения затихли на GAS_TELEMETRY_DEBOUNCE или ждут дольше GAS_TELEMETRY_MAX_DELAY"""
+        if self.changed_at is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return (now - self.last_change_at >= settings.GAS_TELEMETRY_DEBOUNCE
+                or now - self.changed_at >= settings.GAS_TELEMETRY_MAX_DELAY)
+
+    def optimize(self) -> Dict:
+        """
+        Расчет по текущим значениям и публикация рекомендации. При ошибке расчета публикуется ошибка
+        вместе с последней рекомендацией; повторный расчет - после следующего существенного изменения.
+        """
+        snapshot = {field: values.copy() for field, values in self.values.items()}
+        data = dict(self.data, **{field: values.tolist() for field, values in snapshot.items()})
+
+        start = time.perf_counter()
+        error = None
+        try:
+            self.result = GasDistributionService.calculate_distribution(
+                data, self.backend, deadline=Deadline(settings.GAS_DEADLINE_DEFAULT)
+            )
+        except ValueError as e:
+            error = str(e)
+        elapsed = time.perf_counter() - start
+
+        self.solved = snapshot
+        self.changed_at = self.last_change_at = None
+        self.version += 1
+
+        recommendation = {
+            "version": self.version,
+            "updated_at": timezone.now().isoformat(),
+            "measurements": self.measurements,
+            "solve_time_ms": round(elapsed * 1000, 2),
+            "inputs": {field: np.round(values, 6).tolist() for field, values in snapshot.items()},
+            "result": self.result,
+        }
+        if error is not None:
+            recommendation["error"] = error
+            ERROR_LOGGER.error(f"Пересчет по измерениям №{self.version}: {error}")
+        else:
+            BASE_LOGGER.info(f"Пересчет по измерениям №{self.version}: {elapsed * 1000:.1f} мс")
+        self.publish(recommendation)
+        return recommendation
+
+    @staticmethod
+    def publish(recommendation: Dict):
+        """Запись во временный файл и замена: читатели видят только полностью записанную рекомендацию"""
+        path = settings.GAS_TELEMETRY_FILE
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".recommendation-", suffix=".json")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(recommendation, file, ensure_ascii=False)
+            os.chmod(temporary, 0o644)  # mkstemp создает файл только для владельца
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    @staticmethod
+    def latest() -> Optional[Dict]:
+        try:
+            with open(settings.GAS_TELEMETRY_FILE, encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def run(self, lines: queue.Queue, stop: threading.Event):
+        """
+        Цикл обработки: строки измерений из очереди (их кладут источники TelemetryFileSource,
+        TelemetrySocketSource), пересчет по сроку. Первая рекомендация рассчитывается сразу.
+        """
+        self.optimize()
+        while not stop.is_set():
+            try:
+                line = lines.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                line = None
+
+            if line is not None and line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    ERROR_LOGGER.error(f"Измерение пропущено: ошибка разбора JSON - {str(e)}")
+                else:
+                    try:
+                        self.apply(record)
+                    except (ValueError, TypeError) as e:
+                        ERROR_LOGGER.error(f"Измерение пропущено: {str(e)}")
+
+            if self.due():
+                self.optimize()
+
+
+class TelemetryFileSource(threading.Thread):
+    """
+    Чтение измерений из файла NDJSON по мере дозаписи (как tail -F).
+    Файл переоткрывается, если его заменили (ротация) или усекли.
+    """
+
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, path: str, lines: queue.Queue, stop: threading.Event, from_start: bool = False):
+        super().__init__(daemon=True)
+        self.path = path
+        self.lines = lines
+        self.stop = stop
+        self.from_start = from_start
+
+    def run(self):
+        stream = None
+        pending = ""
+        while not self.stop.is_set():
+            if stream is None:
+                try:
+                    stream = open(self.path, "r", encoding="utf-8")
+                except OSError:
+                    self.stop.wait(self.POLL_INTERVAL)
+                    continue
+                if not self.from_start:
+                    stream.seek(0, os.SEEK_END)
+                self.from_start = True  # Замененный файл читается с начала
+
+            chunk = stream.readline()
+            if chunk:
+                pending += chunk
+                if pending.endswith("\n"):
+                    self.lines.put(pending)
+                    pending = ""
+                continue
+
+            if self._replaced(stream):
+                stream.close()
+                stream, pending = None, ""
+                continue
+            self.stop.wait(self.POLL_INTERVAL)
+
+        if stream is not None:
+            stream.close()
+
+    def _replaced(self, stream) -> bool:
+        try:
+            current = os.stat(self.path)
+        except OSError:
+            return False
+        opened = os.fstat(stream.fileno())
+        return current.st_ino != opened.st_ino or current.st_size < stream.tell()
+
+
+class TelemetrySocketSource(threading.Thread):
+    """
+    Прием измерений по локальному сокету: путь Unix-сокета или host:port.
+    Каждое соединение передает строки NDJSON, соединения обслуживаются параллельно.
+    """
+
+    def __init__(self, address: str, lines: queue.Queue):
+        super().__init__(daemon=True)
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    lines.put(line.decode("utf-8", errors="replace"))
+
+        if not address.startswith("/") and ":" in address:
+            host, port = address.rsplit(":", 1)
+            self.server = socketserver.ThreadingTCPServer((host, int(port)), Handler)
+        else:
+            if os.path.exists(address):
+                # Сокет, оставшийся после аварийного завершения
+                os.unlink(address)
+            self.server = socketserver.ThreadingUnixStreamServer(address, Handler)
+        self.server.daemon_threads = True
+
+    def run(self):
+        self.server.serve_forever(poll_interval=0.2)
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
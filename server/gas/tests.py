@@ -1,3 +1,1310 @@
-from django.test import TestCase
+import asyncio
+import importlib.util
+import io
+import json
+import logging
+import os
+import random
+import re
+import socket
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from multiprocessing.connection import Listener
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+from urllib.parse import urlsplit
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import LiveServerTestCase, SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+from gas.backends import SolverBackend, SolverBackendRegistry
+from gas.batch import BatchCalculationService
+from gas.benchmarks import PipelineBenchmark
+from gas.cache import CalculationCache, MemoryCacheStore
+from gas.capture import TrafficCapture, TrafficReplay
+from gas.deadline import (CalculationCancelledError, Deadline,
+                          DeadlineExceededError)
+from gas.engine import (INFINITY, BoundedSimplexEngine, EngineError,
+                        LinearProgram)
+from gas.furnaces import FurnaceArrays
+from gas.jobs import CalculationJobQueue, JobLimitError
+from gas.loadtest import HTTPClient, LoadScenario, LoadTest, LoadTestError
+from gas.memory import MemoryProfiler
+from gas.metrics import Metrics
+from gas.models import CalculationJob
+from gas.parsers import NDJSONParser
+from gas.pool import SolverPool, SolverPoolServer
+from gas.presolve import Presolve
+from gas.scenarios import ScenarioWriter, _solve_scenarios
+from gas.serializers import (FloatArrayField, HistoryCreateSerializer,
+                             HistoryDetailSerializer, HistoryStatsSerializer)
+from gas.services import (DefaultInputValues, GasDistributionService,
+                          InfeasibleCalculationError,
+                          NonlinearDistributionService)
+from gas.telemetry import TelemetryOptimizer
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+from user.models import User
+
+
+def random_instance(rng: random.Random) -> dict:
+    """Случайные входные данные в диапазонах, близких к реальным."""
+    N = rng.randint(1, 20)
+    data = dict(
+        N=N,
+        C_k=rng.uniform(0.5, 3.0),
+        C_pg=rng.uniform(0.1, 2.0),
+        V_pg_total=rng.uniform(5000, 20000) * N,
+        K_total=rng.uniform(40, 80) * N,
+        P_total=rng.uniform(100, 160) * N,
+        V_pg_min=[rng.uniform(5000, 12000) for _ in range(N)],
+        K_0=[rng.uniform(45, 85) for _ in range(N)],
+        e=[rng.uniform(0.5, 0.9) for _ in range(N)],
+        P_0=[rng.uniform(120, 190) for _ in range(N)],
+        S_0=[rng.uniform(0.012, 0.018) for _ in range(N)],
+        S_min=[0.0] * N,
+        S_max=[0.025] * N,
+        delta_P_pg=[rng.uniform(-0.0008, 0.0) for _ in range(N)],
+        delta_P_k=[rng.uniform(-0.0036, -0.0028) for _ in range(N)],
+        delta_S_pg=[rng.uniform(-4e-6, -3e-6) for _ in range(N)],
+        delta_S_k=[rng.uniform(-3.2e-6, -2.8e-6) for _ in range(N)],
+        delta_S_p=[rng.choice([0.0, 0.0, rng.uniform(-1e-4, 1e-4)]) for _ in range(N)],
+    )
+    data["V_pg_max"] = [v + rng.uniform(0, 10000) for v in data["V_pg_min"]]
+    data["V_pg_0"] = [rng.uniform(a, b) for a, b in zip(data["V_pg_min"], data["V_pg_max"])]
+    return data
+
+
+class BoundedSimplexEngineTestCase(SimpleTestCase):
+    """
+    Сверка встроенного симплекс-метода с SCIP.
+    """
+
+    def test_default_values(self):
+        data = DefaultInputValues.get_default_values()
+        program = GasDistributionService._build_linear_program(FurnaceArrays(data))
+        engine = BoundedSimplexEngine.solve(program)
+        scip = SolverBackendRegistry.get("scip").solve(program)
+
+        self.assertEqual(engine.status, "OPTIMAL")
+        self.assertAlmostEqual(engine.objective, scip.objective, places=4)
+
+    def test_explicit_backend_must_support_program(self):
+        data = random_instance(random.Random(7))
+        data["N"] = 300
+        for key, value in list(data.items()):
+            if isinstance(value, list):
+                data[key] = (value * 300)[:300]
+        program = GasDistributionService._build_linear_program(FurnaceArrays(data))
+
+        with self.assertRaisesMessage(ValueError, "не подходит"):
+            SolverBackendRegistry.select("simplex", program)
+        self.assertNotEqual(SolverBackendRegistry.select("auto", program).name, "simplex")
+        with self.settings(GAS_SOLVER_BACKEND="simplex"):
+            self.assertNotEqual(SolverBackendRegistry.select(None, program).name, "simplex")
+
+    def test_backend_must_implement_solve(self):
+        class Incomplete(SolverBackend):
+            name = "incomplete"
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_random_instances_match_scip(self):
+        rng = random.Random(2024)
+        for _ in range(300):
+            data = random_instance(rng)
+            program = GasDistributionService._build_linear_program(FurnaceArrays(data))
+            engine = BoundedSimplexEngine.solve(program)
+            scip = SolverBackendRegistry.get("scip").solve(program)
+
+            self.assertEqual(engine.status, scip.status)
+            if scip.status == "OPTIMAL":
+                self.assertAlmostEqual(engine.objective, scip.objective, delta=1e-6 * (1 + abs(scip.objective)))
+
+
+class VectorizedModelTestCase(SimpleTestCase):
+    """
+    Векторное построение модели и подготовка результатов совпадают с прежним поэлементным расчетом.
+    """
+
+    @staticmethod
+    def reference_model(data):
+        """Поэлементное построение модели (до перехода на FurnaceArrays)"""
+        N, objective, lower, upper, coke_row, iron_row = data["N"], [], [], [], [], []
+        for i in range(N):
+            e = data["e"][i]
+            delta_P = data["delta_P_pg"][i] - e * data["delta_P_k"][i]
+            objective.append(0.5 * (e * data["C_k"] - data["C_pg"]) + 0.5 * GasDistributionService.C_p * delta_P)
+            coke_row.append(-0.001 * e)
+            iron_row.append(delta_P)
+
+            coeff = data["delta_S_pg"][i] - e * data["delta_S_k"][i] + delta_P * data["delta_S_p"][i]
+            if abs(coeff) < 1e-10:
+                lower.append(data["V_pg_min"][i])
+                upper.append(data["V_pg_max"][i])
+            else:
+                delta_min = (data["S_min"][i] - data["S_0"][i]) / coeff
+                delta_max = (data["S_max"][i] - data["S_0"][i]) / coeff
+                lower.append(max(data["V_pg_min"][i], data["V_pg_0"][i] + min(delta_min, delta_max)))
+                upper.append(min(data["V_pg_max"][i], data["V_pg_0"][i] + max(delta_min, delta_max)))
+
+        return dict(
+            objective=objective, lower=lower, upper=upper, rows=[[1.0] * N, coke_row, iron_row],
+            row_lower=[0.0, -INFINITY, data["P_total"] - sum(data["P_0"]) + sum(v * c for v, c in zip(data["V_pg_0"], iron_row))],
+            row_upper=[data["V_pg_total"], data["K_total"] - sum(data["K_0"]) + sum(v * e * 0.001 for v, e in zip(data["V_pg_0"], data["e"])), INFINITY],
+        )
+
+    @staticmethod
+    def reference_results(data, gas):
+        """Поэлементный расчет итогов (до перехода на FurnaceArrays)"""
+        N = data["N"]
+        return {
+            "total_gas_consumption": sum(gas),
+            "total_coke_consumption": sum(data["K_0"][i] + 0.001 * (data["V_pg_0"][i] - gas[i]) * data["e"][i] for i in range(N)),
+            "total_iron_production": sum(
+                (gas[i] - data["V_pg_0"][i]) * data["delta_P_pg"][i]
+                - data["e"][i] * (gas[i] - data["V_pg_0"][i]) * data["delta_P_k"][i] + data["P_0"][i]
+                for i in range(N)
+            ),
+            "sulfur_content": [
+                data["S_0"][i] + (gas[i] - data["V_pg_0"][i]) * (data["delta_S_pg"][i] - data["e"][i] * data["delta_S_k"][i])
+                for i in range(N)
+            ],
+        }
+
+    def test_matches_per_element_reference(self):
+        rng = random.Random(11)
+        instances = [DefaultInputValues.get_default_values()]
+        for _ in range(50):
+            data = random_instance(rng)
+            # Печь без влияния ПГ на серу: границы только V_pg_min/V_pg_max
+            data["delta_S_pg"][0] = data["e"][0] * data["delta_S_k"][0]
+            data["delta_S_p"][0] = 0.0
+            instances.append(data)
+
+        for data in instances:
+            furnaces = FurnaceArrays(data)
+            program = GasDistributionService._build_linear_program(furnaces)
+            expected = self.reference_model(data)
+            for name, value in expected.items():
+                actual = program.rows.toarray() if name == "rows" else getattr(program, name)
+                np.testing.assert_allclose(actual, value, rtol=1e-12, atol=1e-9, err_msg=name)
+
+            gas = [rng.uniform(low, high) for low, high in zip(data["V_pg_min"], data["V_pg_max"])]
+            result = GasDistributionService._prepare_results(furnaces, gas, 0.0)
+            self.assertEqual(result["gas_distribution"], [round(v, 2) for v in gas])
+            for name, value in self.reference_results(data, gas).items():
+                digits = 6 if name == "sulfur_content" else 2
+                np.testing.assert_allclose(result[name], np.round(value, digits), atol=1.01 * 10 ** -digits, err_msg=name)
+
+
+class SensitivityTestCase(SimpleTestCase):
+    """
+    Анализ чувствительности на данных по умолчанию: активно только ограничение по газу,
+    его двойственная оценка - коэффициент базисной печи 8, остальные печи на границах.
+    """
+
+    def setUp(self):
+        self.data = DefaultInputValues.get_default_values()
+        self.objective = GasDistributionService._build_linear_program(FurnaceArrays(self.data)).objective
+
+    def test_reduced_costs_and_ranges(self):
+        result = GasDistributionService.calculate_distribution(self.data, sensitivity=True)
+        sensitivity = result["sensitivity"]
+        price = self.objective[7]
+
+        gas = sensitivity["constraints"]["V_pg_total"]
+        self.assertAlmostEqual(gas["shadow_price"], price, places=6)
+        other = self.data["V_pg_total"] - result["gas_distribution"][7]
+        np.testing.assert_allclose(gas["range"], [other + self.data["V_pg_min"][7], other + self.data["V_pg_max"][7]], atol=1e-3)
+        self.assertEqual(sensitivity["constraints"]["K_total"]["shadow_price"], 0.0)
+
+        # Независимый расчет: прирост целевой функции при увеличении лимита газа
+        more = GasDistributionService.calculate_distribution({**self.data, "V_pg_total": self.data["V_pg_total"] + 1000}, backend="glop")
+        self.assertAlmostEqual((more["objective"] - result["objective"]) / 1000, price, places=4)
+
+        expected = np.where(np.arange(self.data["N"]) == 7, 0.0, self.objective - price)
+        np.testing.assert_allclose(sensitivity["reduced_costs"], expected, atol=1e-6)
+
+        at_upper = np.isclose(result["gas_distribution"], self.data["V_pg_max"])
+        for j, (low, high) in enumerate(sensitivity["objective_ranges"]):
+            if j == 7:
+                self.assertAlmostEqual(low, self.objective[~at_upper & (np.arange(8) != 7)].max(), places=6)
+                self.assertAlmostEqual(high, self.objective[at_upper].min(), places=6)
+            elif at_upper[j]:
+                self.assertEqual((round(low, 6), high), (round(price, 6), None))
+            else:
+                self.assertEqual((low, round(high, 6)), (None, round(price, 6)))
+
+    def test_unsupported_backend_and_size_are_rejected(self):
+        with self.assertLogs("error_logger", level="ERROR"):
+            response = APIClient().post("/api/gas/calculate/?sensitivity=true&backend=glop", self.data, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("auto или simplex", response.json()["error"])
+
+        data = {key: value * 30 if isinstance(value, list) else value for key, value in self.data.items()}
+        data.update(N=240, V_pg_total=self.data["V_pg_total"] * 30, K_total=self.data["K_total"] * 30, P_total=self.data["P_total"] * 30)
+        self.assertEqual(GasDistributionService.calculate_distribution(data, backend="glop")["status"], "OPTIMAL")
+        with self.assertLogs("error_logger", level="ERROR"):
+            response = APIClient().post("/api/gas/calculate/?sensitivity=true", data, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Анализ чувствительности доступен для задач не более 200 переменных", response.json()["error"])
+
+    def test_engine_error_falls_back_without_analysis(self):
+        with mock.patch("gas.services.BoundedSimplexEngine.solve", side_effect=EngineError("вырожденный базис")), \
+                self.assertLogs("base_logger", level="WARNING"):
+            result = GasDistributionService.calculate_distribution(self.data, sensitivity=True)
+        self.assertNotIn("sensitivity", result)
+        self.assertEqual(result["backend"], settings.GAS_SOLVER_FALLBACK)
+        self.assertAlmostEqual(result["objective"], 45047.75, places=2)
+
+
+class FeasibilityScreeningTestCase(SimpleTestCase):
+    """
+    Проверка совместности до вызова решателя: сообщения о нарушенных ограничениях
+    и отсутствие ложных отказов.
+    """
+
+    MESSAGE = re.compile(r"Ограничения несовместны: .+ ([\d.]+) \S+ (больше|меньше) (\w+) = ([\d.]+) на ([\d.]+) ")
+
+    def setUp(self):
+        self.data = DefaultInputValues.get_default_values()
+
+    def screen(self, **changes):
+        """Ошибка проверки; решатель при этом не вызывается"""
+        with mock.patch.object(GasDistributionService, "_solve", side_effect=AssertionError), \
+                self.assertLogs("error_logger", level="ERROR"), self.assertRaises(InfeasibleCalculationError) as error:
+            GasDistributionService.calculate_distribution({**self.data, **changes})
+        return str(error.exception)
+
+    def test_shop_constraints(self):
+        self.assertIn("минимально возможный расход ПГ 81095.54 м3/ч больше V_pg_total = 1000.00 на 80095.54 м3/ч", self.screen(V_pg_total=1000))
+
+        # Крайнее значение из сообщения достижимо, если остальные ограничения цеха сняты
+        loose = dict(V_pg_total=1e6, K_total=1e6, P_total=0)
+        for name, limit, shift in (("V_pg_total", 1000, 0.01), ("K_total", 10, 0.01), ("P_total", 5000, -0.01)):
+            match = self.MESSAGE.search(self.screen(**{name: limit}))
+            value, comparison, constraint, reported, excess = match.groups()
+            self.assertEqual((constraint, float(reported)), (name, limit))
+            self.assertEqual(comparison, "меньше" if name == "P_total" else "больше")
+            self.assertAlmostEqual(float(excess), abs(float(value) - limit), places=1)
+
+            result = GasDistributionService.calculate_distribution({**self.data, **loose, name: float(value) + shift}, backend="glop")
+            self.assertEqual(result["status"], "OPTIMAL")
+
+    def test_empty_furnace_ranges(self):
+        V_pg_min = list(self.data["V_pg_min"])
+        V_pg_min[1] = V_pg_min[4] = 25000
+        message = self.screen(V_pg_min=V_pg_min)
+        self.assertIn("печь 2: нижняя граница расхода ПГ 25000.00 (V_pg_min) больше верхней 20000.00 (V_pg_max) на 5000.00 м3/ч", message)
+        self.assertIn("печь 5:", message)
+        self.assertNotIn("всего печей", message)
+
+        message = self.screen(S_max=[0.001] * self.data["N"])
+        self.assertIn("печь 1: нижняя граница расхода ПГ 23588.96 (по содержанию серы) больше верхней 20000.00 (V_pg_max)", message)
+        self.assertNotIn("печь 6:", message)
+        self.assertIn(f"всего печей с пустым диапазоном: {self.data['N']}", message)
+
+    def test_no_false_rejections(self):
+        rng = random.Random(3)
+        rejected = 0
+        for _ in range(200):
+            furnaces = FurnaceArrays(random_instance(rng))
+            program = GasDistributionService._build_linear_program(furnaces)
+            try:
+                GasDistributionService._screen_feasibility(furnaces, program)
+            except InfeasibleCalculationError:
+                rejected += 1
+                self.assertEqual(SolverBackendRegistry.get("glop").solve(program).status, "INFEASIBLE")
+        self.assertGreater(rejected, 0)
+
+
+class SweepTestCase(SimpleTestCase):
+    """
+    Параметрический расчет по цене: сверка кривой целевой функции с независимыми
+    расчетами GLOP в выбранных значениях цены.
+    """
+
+    def assert_matches_resolves(self, data, parameter, start, end, rng):
+        sweep = GasDistributionService.sweep_distribution(data, parameter, start, end)
+        segments = sweep["segments"]
+        self.assertEqual(segments[0]["from"], start)
+        self.assertEqual(segments[-1]["to"], end)
+        for left, right in zip(segments, segments[1:]):
+            self.assertEqual(left["to"], right["from"])
+            self.assertAlmostEqual(left["objective_to"], right["objective"], delta=0.02)
+
+        # Середины отрезков, окрестности точек излома и случайные значения
+        values = [(segment["from"] + segment["to"]) / 2 for segment in segments]
+        values += [point + shift for point in sweep["breakpoints"] for shift in (-1e-3, 1e-3)]
+        values += [rng.uniform(start, end) for _ in range(5)]
+        for value in values:
+            segment = next(segment for segment in segments if segment["from"] <= value <= segment["to"])
+            slope = (segment["objective_to"] - segment["objective"]) / (segment["to"] - segment["from"])
+            expected = segment["objective"] + (value - segment["from"]) * slope
+            actual = GasDistributionService.calculate_distribution({**data, parameter: value}, backend="glop")["objective"]
+            # Границы отрезков округлены до 1e-6, целевая функция - до 0.01
+            self.assertAlmostEqual(expected, actual, delta=0.05 + 1e-6 * (abs(actual) + abs(slope)), msg=f"{parameter} = {value}")
+        return sweep
+
+    def test_default_values(self):
+        rng = random.Random(1)
+        data = DefaultInputValues.get_default_values()
+        for parameter, end in (("C_pg", 3.0), ("C_k", 10.0)):
+            sweep = self.assert_matches_resolves(data, parameter, 0.0, end, rng)
+            self.assertEqual(len(sweep["breakpoints"]), 4)
+
+    def test_random_instances(self):
+        rng = random.Random(5)
+        checked = 0
+        while checked < 4:
+            data = random_instance(rng)
+            try:
+                GasDistributionService.calculate_distribution(data, backend="glop")
+            except InfeasibleCalculationError:
+                continue
+            self.assert_matches_resolves(data, "C_pg", 0.0, 3.0, rng)
+            checked += 1
+
+
+class InputParsingTestCase(SimpleTestCase):
+    """
+    Потоковый ввод NDJSON и векторная проверка списков по печам.
+    """
+
+    def parse(self, lines):
+        return NDJSONParser().parse(io.BytesIO("\n".join(lines).encode()))
+
+    def test_ndjson_stream(self):
+        data = DefaultInputValues.get_default_values()
+        scalars = {key: value for key, value in data.items() if not isinstance(value, list)}
+        lines = [json.dumps(scalars), ""]
+        lines += [json.dumps({key: value[i:i + 3] for key, value in data.items() if isinstance(value, list)}) for i in (0, 3, 6)]
+        self.assertEqual(self.parse(lines), data)
+
+        response = APIClient().post("/api/gas/calculate/", "\n".join(lines), content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.json()["objective"], 45047.75, places=2)
+
+    def test_ndjson_errors(self):
+        with self.assertRaisesMessage(ParseError, "Строка 2: ошибка разбора JSON"):
+            self.parse(['{"N": 2}', '{"K_0": [1, 2}'])
+        with self.assertRaisesMessage(ParseError, "Строка 3: ожидается JSON-объект"):
+            self.parse(['{"N": 2}', "", "[1, 2]"])
+
+    def test_vectorized_validation_matches_per_element(self):
+        cases = [
+            [], [0, 1.5, 10], [True, 2], ["1.5", 2], [3, -1, 4, -2], [1, 11], [float("nan"), 1], [float("inf")],
+            [1, None], [1, "abc"], [[1, 2], [3, 4]], [1, [2]], [10 ** 400], ["1" * 1001],
+        ]
+        for kwargs in ({}, {"min_value": 0}, {"min_value": 0, "max_value": 10}):
+            vectorized = FloatArrayField(child=serializers.FloatField(**kwargs))
+            per_element = serializers.ListField(child=serializers.FloatField(**kwargs))
+            for case in cases:
+                with self.subTest(case=case, **kwargs):
+                    expected = self.validate(per_element, case)
+                    actual = self.validate(vectorized, case)
+                    if isinstance(expected, list):
+                        np.testing.assert_array_equal(actual, expected)
+                    else:
+                        self.assertEqual(actual, expected)
+
+    @staticmethod
+    def validate(field, data):
+        try:
+            return field.run_validation(data)
+        except serializers.ValidationError as e:
+            return e.detail
+
+
+class SolverPoolTestCase(SimpleTestCase):
+    """
+    Расчет через пул решателей по Unix-сокету и расчет в текущем процессе при недоступном пуле.
+    """
+
+    def setUp(self):
+        self.data = DefaultInputValues.get_default_values()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.address = os.path.join(directory.name, "pool.sock")
+        self.addCleanup(SolverPool.disconnect)
+
+    def test_results_are_sent_back(self):
+        server = SolverPoolServer(workers=1)
+        self.addCleanup(server.shutdown)
+        listener = Listener(self.address, authkey=SolverPool.authkey())
+        self.addCleanup(listener.close)
+        threading.Thread(target=server.serve, args=(listener,), daemon=True).start()
+
+        # Расчет в текущем процессе недоступен: результат может прийти только из пула
+        with self.settings(GAS_SOLVER_POOL_ADDRESS=self.address), \
+                mock.patch.object(GasDistributionService, "calculate_distribution", side_effect=AssertionError):
+            result = SolverPool.calculate(self.data, "glop")
+            self.assertAlmostEqual(result["objective"], 45047.75, places=2)
+            self.assertEqual(result["backend"], "glop")
+
+            with self.assertRaisesMessage(InfeasibleCalculationError, "Ограничения несовместны"):
+                SolverPool.calculate({**self.data, "P_total": 10 * self.data["P_total"]}, "glop")
+
+    def test_fallback_when_pool_is_unavailable(self):
+        with self.settings(GAS_SOLVER_POOL_ADDRESS=self.address), self.assertLogs("error_logger", level="ERROR") as logs:
+            result = SolverPool.calculate(self.data, "glop")
+        self.assertIn("Пул решателей недоступен", logs.output[0])
+        self.assertAlmostEqual(result["objective"], 45047.75, places=2)
+
+
+class ScenarioBatchCLITestCase(SimpleTestCase):
+    """
+    Пакетный расчет из командной строки (main.py): прерывание и продолжение с --resume.
+    """
+
+    def setUp(self):
+        spec = importlib.util.spec_from_file_location("main", settings.BASE_DIR.parent / "main.py")
+        self.main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.main)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = os.path.join(directory.name, "scenarios.ndjson")
+        self.target = os.path.join(directory.name, "results.ndjson")
+
+        data = DefaultInputValues.get_default_values()
+        self.scenarios = [{**data, "C_pg": 0.3 + 0.05 * k} for k in range(10)]
+        self.scenarios[6] = {key: value for key, value in data.items() if key != "K_total"}
+        with open(self.source, "w", encoding="utf-8") as file:
+            file.writelines(json.dumps(scenario) + "\n" for scenario in self.scenarios)
+
+    def run_main(self, *options):
+        with mock.patch("sys.stderr", io.StringIO()) as stderr:
+            code = self.main.main([self.source, self.target, "--workers", "1", "--chunk", "2", "--quiet", *options])
+        return code, stderr.getvalue()
+
+    def test_interrupt_and_resume(self):
+        write, written = ScenarioWriter.write, []
+
+        # Прерывание перед записью третьей порции
+        def interrupted(writer, results):
+            if len(written) == 2:
+                raise KeyboardInterrupt
+            written.append(results)
+            write(writer, results)
+
+        with mock.patch.object(ScenarioWriter, "write", interrupted):
+            code, stderr = self.run_main()
+        self.assertEqual(code, 130)
+        self.assertIn("--resume", stderr)
+        with open(self.target + ".progress", encoding="utf-8") as file:
+            self.assertEqual(json.load(file)["scenarios"], 4)
+
+        # Недописанная строка результата при сбое во время записи
+        with open(self.target, "a", encoding="utf-8") as file:
+            file.write('{"scenario": 5, "resu')
+
+        with mock.patch("gas.scenarios._solve_scenarios", wraps=_solve_scenarios) as solve:
+            self.assertEqual(self.run_main("--resume"), (0, ""))
+        self.assertEqual(sum(len(call.args[0]) for call in solve.call_args_list), 6)
+
+        with open(self.target, encoding="utf-8") as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual([line["scenario"] for line in lines], list(range(1, 11)))
+        self.assertIn("K_total", lines[6]["error"])
+        for line, scenario in zip(lines, self.scenarios):
+            if "result" in line:
+                expected = GasDistributionService.calculate_distribution(scenario)["objective"]
+                self.assertAlmostEqual(line["result"]["objective"], expected, places=2)
+
+
+class BatchCalculationTestCase(SimpleTestCase):
+    """
+    Пакетный расчет: результаты в порядке сценариев, ошибка сценария не прерывает остальные,
+    размер пакета ограничен.
+    """
+
+    def setUp(self):
+        self.data = DefaultInputValues.get_default_values()
+        self.addCleanup(BatchCalculationService.shutdown)
+
+    def post(self, scenarios):
+        return APIClient().post("/api/gas/calculate/batch/?backend=glop", {"scenarios": scenarios}, format="json")
+
+    def test_order_and_failures_on_pool(self):
+        prices = [0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
+        scenarios = [{**self.data, "C_pg": price} for price in prices]
+        scenarios[2] = {**self.data, "P_total": 10 * self.data["P_total"]}  # Несовместный
+        scenarios[4] = {key: value for key, value in self.data.items() if key != "K_total"}  # Неполный
+
+        # Ошибка несовместного сценария пишется в лог процесса пула
+        with self.settings(GAS_BATCH_WORKERS=2, GAS_BATCH_MIN_PARALLEL=2):
+            response = self.post(scenarios)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+
+        self.assertEqual([item["index"] for item in results], list(range(len(scenarios))))
+        self.assertIn("Ограничения несовместны", results[2]["error"])
+        self.assertIn("K_total", results[4]["error"])
+        for index in (0, 1, 3, 5):
+            expected = GasDistributionService.calculate_distribution(scenarios[index], backend="glop")
+            self.assertAlmostEqual(results[index]["result"]["objective"], expected["objective"], places=2)
+
+    def test_size_limit(self):
+        response = self.post([{}] * (settings.GAS_BATCH_MAX_SCENARIOS + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("scenarios", response.json()["error"])
+        self.assertEqual(self.post([]).status_code, 400)
+
+
+class CalculationCacheTestCase(SimpleTestCase):
+    """
+    Кэш результатов: попадание для совпадающих входных данных, время жизни и LRU-вытеснение
+    в памяти процесса; прерванные по сроку расчеты и ошибки, кроме несовместности, не кэшируются.
+    """
+
+    def setUp(self):
+        self.data = DefaultInputValues.get_default_values()
+        patcher = mock.patch.object(CalculationCache, "_store", MemoryCacheStore(max_entries=16, ttl=600))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.solve = mock.patch.object(CalculationCache, "solve", wraps=CalculationCache.solve).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_hit_and_miss(self):
+        first = CalculationCache.calculate(self.data, backend="glop")
+        self.assertFalse(first["cache_hit"])
+
+        # Другой порядок полей и отличие за пределами GAS_CACHE_FLOAT_DIGITS значащих цифр - тот же ключ
+        permuted = dict(reversed(list(self.data.items())), C_pg=self.data["C_pg"] * (1 + 1e-13))
+        second = CalculationCache.calculate(permuted, backend="GLOP")
+        self.assertTrue(second["cache_hit"])
+        self.assertEqual(second["objective"], first["objective"])
+
+        CalculationCache.calculate({**self.data, "C_pg": self.data["C_pg"] * 1.01}, backend="glop")
+        CalculationCache.calculate(self.data, backend="clp")
+        self.assertEqual(self.solve.call_count, 3)
+        self.assertEqual(CalculationCache.stats()["hits"], 1)
+        self.assertEqual(CalculationCache.stats()["misses"], 3)
+
+    def test_ttl_and_lru(self):
+        clock = mock.Mock()
+        with mock.patch("gas.cache.time", clock):
+            store = MemoryCacheStore(max_entries=2, ttl=10)
+            clock.monotonic.return_value = 0.0
+            store.set("a", {"value": 1})
+            store.set("b", {"value": 2})
+            self.assertEqual(store.get("a"), {"value": 1})
+            store.set("c", {"value": 3})
+            self.assertIsNone(store.get("b"))
+            self.assertEqual(store.get("a"), {"value": 1})
+
+            clock.monotonic.return_value = 10.5
+            self.assertIsNone(store.get("a"))
+            self.assertEqual(store.stats()["entries"], 1)
+
+    def test_timeouts_and_errors_are_not_cached(self):
+        timeout = dict(GasDistributionService.calculate_distribution(self.data, backend="glop"), status="FEASIBLE_TIMEOUT")
+        failures = [timeout, DeadlineExceededError("Срок расчета истек"), ValueError("Ошибка при расчете")]
+        with mock.patch.object(CalculationCache, "solve", side_effect=failures):
+            self.assertEqual(CalculationCache.calculate(self.data)["status"], "FEASIBLE_TIMEOUT")
+            with self.assertRaises(DeadlineExceededError):
+                CalculationCache.calculate(self.data)
+            with self.assertRaises(ValueError):
+                CalculationCache.calculate(self.data)
+        self.assertEqual(CalculationCache.stats()["entries"], 0)
+
+        # Несовместность не зависит от срока и кэшируется
+        infeasible = {**self.data, "P_total": 10 * self.data["P_total"]}
+        with self.assertLogs("error_logger", level="ERROR"), self.assertRaises(InfeasibleCalculationError):
+            CalculationCache.calculate(infeasible)
+        with self.assertRaises(InfeasibleCalculationError):
+            CalculationCache.calculate(infeasible)
+        self.assertEqual(CalculationCache.stats()["hits"], 1)
+
+
+class PresolveTestCase(SimpleTestCase):
+    """
+    Решение после предварительной обработки совпадает с решением исходной задачи.
+    """
+
+    def test_random_instances_match_unpresolved(self):
+        rng = random.Random(2025)
+        for _ in range(300):
+            data = random_instance(rng)
+            # Границы по сере первой печи стянуты в точку: печь должна быть исключена
+            data["S_min"][0] = data["S_max"][0] = data["S_0"][0]
+            program = GasDistributionService._build_linear_program(FurnaceArrays(data))
+            expected = BoundedSimplexEngine.solve(program)
+
+            presolve = Presolve(program)
+            if presolve.solution is None:
+                self.assertLess(presolve.program.num_variables, program.num_variables)
+                solution = presolve.restore(BoundedSimplexEngine.solve(presolve.program))
+            else:
+                solution = presolve.solution
+
+            self.assertEqual(solution.status, expected.status)
+            if expected.status == "OPTIMAL":
+                self.assertAlmostEqual(solution.objective, expected.objective,
+                                       delta=1e-6 * (1 + abs(expected.objective)))
+                self.assertTrue(program.is_feasible(solution.values))
+
+
+class PipelineBenchmarkTestCase(SimpleTestCase):
+    """
+    Сравнение замеров: регрессией считается замедление сверх порога и сверх min_ms.
+    """
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        def report(*entries):
+            return {"results": [dict(stage=stage, backend=backend, N=8, median_ms=ms) for stage, backend, ms in entries]}
+
+        baseline = report(("validate", None, 1.0), ("solve", "glop", 0.1), ("solve", "clp", 2.0), ("render", None, 1.0))
+        current = report(("validate", None, 1.5), ("solve", "glop", 0.13), ("solve", "clp", 1.0), ("prepare", None, 0.1))
+
+        result = PipelineBenchmark.compare(baseline, current, threshold=0.2, min_ms=0.05)
+        self.assertEqual([(c["stage"], c["backend"]) for c in result["regressions"]], [("validate", None)])
+        self.assertEqual([(c["stage"], c["backend"]) for c in result["improvements"]], [("solve", "clp")])
+        self.assertEqual(result["unchanged"], 1)
+        self.assertEqual(result["missing"], [{"stage": "render", "backend": None, "N": 8}])
+        self.assertEqual(len(result["new"]), 1)
+
+
+class MetricsTestCase(SimpleTestCase):
+    """
+    Замеры этапов: заголовок Server-Timing в ответе и гистограммы /metrics.
+    """
+
+    def setUp(self):
+        Metrics.clear()
+
+    def test_server_timing_and_histograms(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/gas/default/"))
+        with self.settings(GAS_SERVER_TIMING=True):
+            response = self.client.get("/api/gas/default/")
+        self.assertEqual(response.status_code, 200)
+        phases = [item.split(";")[0] for item in response["Server-Timing"].split(", ")]
+        self.assertEqual(phases, ["validate", "render", "total"])
+
+        text = self.client.get("/metrics").content.decode()
+        self.assertIn('gas_request_duration_seconds_count{endpoint="gas:default",method="GET",status="200"} 2.0', text)
+        self.assertIn('gas_request_phase_seconds_bucket{endpoint="gas:default",le="+Inf",method="GET",phase="validate"} 2.0', text)
+
+        with self.settings(GAS_METRICS=False, GAS_SERVER_TIMING=True):
+            self.assertNotIn("Server-Timing", self.client.get("/api/gas/default/"))
+            self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+
+class SolverStatsTestCase(SimpleTestCase):
+    """
+    Показатели решателя в результате расчета: повторный запрос отмечается как ответ из кэша.
+    """
+
+    def setUp(self):
+        CalculationCache.clear()
+
+    def test_result_records_solver_stats(self):
+        data = DefaultInputValues.get_default_values()
+        serializer = HistoryDetailSerializer(data=CalculationCache.calculate(data, backend="simplex"))
+        serializer.is_valid(raise_exception=True)
+        result = serializer.validated_data
+
+        self.assertEqual(result["backend"], "simplex")
+        self.assertEqual((result["variables"], result["constraints"]), (data["N"], 3))
+        self.assertGreaterEqual(result["wall_time_ms"], result["solve_time_ms"])
+        self.assertFalse(result["cache_hit"])
+
+        cached = CalculationCache.calculate(data, backend="simplex")
+        self.assertTrue(cached["cache_hit"])
+        self.assertEqual(cached["solve_time_ms"], result["solve_time_ms"])
+
+    def test_iterations_are_empty_without_solver_count(self):
+        data = DefaultInputValues.get_default_values()
+        simplex = CalculationCache.calculate(data, backend="simplex")
+        self.assertGreater(simplex["iterations"], 0)
+
+        # ModelBuilder (glop) не сообщает число итераций: в истории пусто, а не 0
+        result = CalculationCache.calculate(data, backend="glop")
+        self.assertIsNone(result["iterations"])
+        serializer = HistoryCreateSerializer(data={**result, "calculate": data})
+        serializer.is_valid(raise_exception=True)
+        self.assertIsNone(serializer.validated_data["iterations"])
+
+        # Расчет по кривым решает модель несколько раз: итерации суммируются
+        curves = [{"furnace": 2, "V_pg": [10000, 15000, 20000], "P": [130, 135.5, 137]}]
+        for backend in ("glop", "simplex"):
+            response = NonlinearDistributionService.calculate_distribution({**data, "response": {"curves": curves}}, backend)
+            self.assertGreater(response["response"]["rounds"], 1)
+            if backend == "glop":
+                self.assertIsNone(response["iterations"])
+            else:
+                self.assertGreater(response["iterations"], simplex["iterations"])
+
+    def test_history_keeps_only_signed_stats(self):
+        data = DefaultInputValues.get_default_values()
+        result = dict(CalculationCache.calculate(data, backend="glop"))
+
+        def saved(**changes):
+            serializer = HistoryCreateSerializer(data={**result, "calculate": data, **changes})
+            return serializer.validated_data if serializer.is_valid() else serializer.errors
+
+        history = saved(backend="presolve", solve_time_ms=0.001)
+        self.assertEqual((history["backend"], history["solve_time_ms"]), (result["backend"], result["solve_time_ms"]))
+        self.assertIn("stats_token", saved(stats_token=result["stats_token"] + "x"))
+        self.assertIn("stats_token", saved(objective=result["objective"] + 100))
+
+        del result["stats_token"]
+        self.assertNotIn("backend", saved(backend="simplex"))
+
+    def test_stats_period_is_bounded(self):
+        self.assertFalse(HistoryStatsSerializer(data={"days": 800000}).is_valid())
+        self.assertTrue(HistoryStatsSerializer(data={"days": 36500}).is_valid())
+
+
+class TrafficReplayTestCase(SimpleTestCase):
+    """
+    Сравнение повторного расчета с записанным ответом.
+    """
+
+    def test_compare_reports_differences_beyond_tolerance(self):
+        recorded = {"status": 200, "result": {"status": "OPTIMAL", "objective": 45047.75, "gas_distribution": [10000.0, 11000.0]}}
+
+        def outcome(objective=45047.75, gas=(10000.0, 11000.0), status="OPTIMAL"):
+            return {"result": {"status": status, "objective": objective, "gas_distribution": list(gas)}}
+
+        self.assertIsNone(TrafficReplay.compare(recorded, outcome(objective=45047.76), 1e-6))
+        self.assertIn("целевая функция", TrafficReplay.compare(recorded, outcome(objective=45050.0), 1e-6))
+        self.assertIn("печи 2", TrafficReplay.compare(recorded, outcome(gas=(10000.0, 11001.0)), 1e-6))
+        self.assertIn("статус", TrafficReplay.compare(recorded, outcome(status="FEASIBLE_TIMEOUT"), 1e-6))
+        self.assertIn("ошибка", TrafficReplay.compare(recorded, {"error": "Ошибка при расчете"}, 1e-6))
+
+        error = {"status": 400, "error": "Ошибка при расчете"}
+        self.assertIsNone(TrafficReplay.compare(error, {"error": "Ошибка при расчете"}, 1e-6))
+
+    def test_corpus_reads_files_of_all_processes(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                self.settings(GAS_CAPTURE_FILE=os.path.join(directory, "calculate.ndjson"), GAS_CAPTURE_BACKUPS=2):
+            self.addCleanup(self.close_capture)
+            TrafficCapture.record({"process": "current"})
+            current = TrafficCapture.process_file()
+            self.assertEqual(os.path.basename(current), f"calculate.{os.getpid()}.ndjson")
+
+            names = ["calculate.101.ndjson.2", "calculate.101.ndjson.1", "calculate.202.ndjson", "calculate.101.ndjson"]
+            for mtime, name in enumerate(names, start=1):
+                with open(os.path.join(directory, name), "w", encoding="utf-8") as file:
+                    file.write(json.dumps({"file": name}) + "\n")
+                os.utime(os.path.join(directory, name), (mtime, mtime))
+            open(os.path.join(directory, "calculate.old.ndjson"), "w").close()
+
+            corpus = TrafficCapture.corpus()
+            self.assertEqual([os.path.basename(path) for path in corpus], names + [os.path.basename(current)])
+            self.assertEqual([entry.get("file", entry.get("process")) for entry in TrafficCapture.read(corpus)],
+                             names + ["current"])
+
+    @staticmethod
+    def close_capture():
+        logger = logging.getLogger("gas.capture")
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        TrafficCapture._logger = None
+
+
+class LoadScenarioTestCase(SimpleTestCase):
+    """
+    Сценарии нагрузки из каталога loadtest/ корректны.
+    """
+
+    def test_repository_scenarios_are_valid(self):
+        directory = os.path.join(settings.BASE_DIR, "loadtest")
+        for name in sorted(os.listdir(directory)):
+            scenario = LoadScenario.from_file(os.path.join(directory, name))
+            self.assertGreater(scenario.duration, 0)
+
+        stages = [{"duration": 10, "rate": 1}]
+        for session in ([{"action": "calculate"}], [{"action": "login"}, {"action": "register"}],
+                        [{"action": "register", "probability": 0.5}], [{"action": "register"}, {"action": "register"}]):
+            with self.assertRaises(LoadTestError):
+                LoadScenario({"stages": stages, "session": session})
+
+
+class LoadTestLiveServerTestCase(LiveServerTestCase):
+    """
+    Клиент нагрузочного теста и сценарий smoke на сервере Django.
+    """
+
+    def test_client_keeps_connection_and_cookies(self):
+        address = urlsplit(self.live_server_url)
+
+        async def session():
+            client = HTTPClient(address.hostname, address.port, timeout=30)
+            try:
+                status, data = await client.request("POST", "/api/user/register/", {
+                    "email": "client@example.com", "password": "Lt-client-password", "first_name": "Клиент", "last_name": "Тест",
+                })
+                self.assertEqual(status, 201)
+                writer = client._writer
+                status, info = await client.request("GET", "/api/user/info/", token=data["access"])
+                self.assertEqual((status, info["email"]), (200, "client@example.com"))
+                status, refreshed = await client.request("POST", "/api/user/token/refresh/")
+                self.assertEqual(status, 200)
+                self.assertIn("access", refreshed)
+                reused = writer is client._writer
+                status, _ = await client.request("POST", "/api/user/logout/", token=refreshed["access"])
+                self.assertEqual(status, 204)
+                self.assertNotIn("refresh_token", client.cookies)
+                return reused
+            finally:
+                await client.close()
+
+        self.assertTrue(asyncio.run(session()))
+
+    @skipUnless(connection.vendor == "postgresql", "История расчетов хранится в ArrayField PostgreSQL")
+    def test_smoke_scenario(self):
+        scenario = LoadScenario.from_file(os.path.join(settings.BASE_DIR, "loadtest", "smoke.json"))
+        scenario.stages, scenario.think_time = [(1.0, 3.0)], (0.0, 0.0)
+        report = LoadTest(scenario, self.live_server_url, seed=1, data=DefaultInputValues.get_default_values()).run()
+
+        self.assertGreater(report["sessions"]["started"], 0)
+        self.assertEqual(report["sessions"]["completed"], report["sessions"]["started"])
+        for action, summary in report["endpoints"].items():
+            self.assertEqual(summary["errors"], 0, f"{action}: {summary}")
+
+
+class MemoryProfilerTestCase(SimpleTestCase):
+    """
+    Замер памяти запросов: статистика по методам API, места выделения и бюджет.
+    """
+
+    def setUp(self):
+        MemoryProfiler.clear()
+
+    def test_sampled_requests_and_stats(self):
+        with self.settings(GAS_MEMORY_RATE=1.0, GAS_MEMORY_BUDGET=1):
+            client = APIClient()
+            with self.assertLogs("base_logger", level="WARNING"):
+                self.assertEqual(client.get("/api/gas/default/").status_code, 200)
+
+            self.assertEqual(client.get("/metrics/memory/").status_code, 401)
+            client.force_authenticate(User(email="admin@example.com", is_staff=True))
+            stats = client.get("/metrics/memory/", {"limit": 5}).json()
+
+        endpoint = next(item for item in stats["endpoints"] if item["endpoint"] == "gas:default")
+        self.assertEqual((endpoint["method"], endpoint["samples"], endpoint["over_budget"]), ("GET", 1, 1))
+        self.assertGreater(endpoint["peak_max"], 0)
+        self.assertLessEqual(len(stats["sites"]), 5)
+
+        with self.settings(GAS_MEMORY_RATE=0.0):
+            self.assertEqual(client.get("/metrics/memory/").status_code, 404)
+
+
+class RobustnessTestCase(SimpleTestCase):
+    """
+    Оценка устойчивости: только для авторизованных пользователей, объем расчета ограничен,
+    при фиксированном seed результат повторяется и совпадает с аналитическими моментами.
+    """
+
+    def setUp(self):
+        self.data = DefaultInputValues.get_default_values()
+        self.gas = GasDistributionService.calculate_distribution(self.data, backend="glop")["gas_distribution"]
+        self.client = APIClient()
+        self.client.force_authenticate(User(email="robustness@example.com"))
+
+    def post(self, client=None, **changes):
+        body = {"calculate": self.data, "gas_distribution": self.gas,
+                "uncertainty": {"delta_P_pg": {"std": 0.05}}, "samples": 20_000, "seed": 42, **changes}
+        return (client or self.client).post("/api/gas/calculate/robustness/", body, format="json")
+
+    def test_validation(self):
+        self.assertEqual(self.post(client=APIClient()).status_code, 401)
+
+        with self.settings(GAS_ROBUSTNESS_MAX_ELEMENTS=100_000):
+            response = self.post(samples=20_000)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("samples x N = 160000", str(response.json()))
+
+        self.assertEqual(self.post(gas_distribution=self.gas[:-1]).status_code, 400)
+        self.assertEqual(self.post(uncertainty={"P_0": {"std": 0.1}}).status_code, 400)
+
+    def test_fixed_seed_output(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result, self.post().json())
+        self.assertNotEqual(result, self.post(seed=43).json())
+
+        furnaces = FurnaceArrays(self.data)
+        gas = np.asarray(self.gas)
+        iron, coke = result["iron_production"], result["coke_consumption"]
+        expected_std = np.sqrt(np.sum(np.square(0.05 * np.abs(furnaces.delta_P_pg) * (gas - furnaces.V_pg_0))))
+        self.assertEqual(result["samples"], 20_000)
+        self.assertAlmostEqual(iron["mean"], furnaces.total_iron_production(gas), delta=4 * expected_std / np.sqrt(20_000))
+        self.assertAlmostEqual(iron["std"], expected_std, delta=0.03 * expected_std)
+        self.assertLessEqual(iron["p5"], iron["p50"])
+        self.assertLessEqual(iron["p50"], iron["p95"])
+        self.assertEqual((coke["std"], coke["violation_probability"]), (0.0, 0.0))
+        self.assertAlmostEqual(coke["mean"], furnaces.total_coke_consumption(gas), places=2)
+
+    def test_deadline_returns_504(self):
+        with mock.patch.object(Deadline, "stopped", return_value=True):
+            response = self.post()
+        self.assertEqual(response.status_code, 504)
+
+
+class MultiPeriodTestCase(SimpleTestCase):
+    """
+    Многопериодный расчет: без ограничения перехода задача распадается на часы,
+    ограничения перехода и почасовые лимиты выполняются, неподходящий решатель отклоняется.
+    """
+
+    T = 24
+
+    def setUp(self):
+        self.data = DefaultInputValues.get_default_values()
+        self.periods = {
+            "T": self.T,
+            "C_pg": [self.data["C_pg"] * (1.5 if 8 <= t < 20 else 0.7) for t in range(self.T)],
+            "V_pg_total": [self.data["V_pg_total"] * (0.9 if 12 <= t < 16 else 1.0) for t in range(self.T)],
+        }
+
+    def post(self, periods, backend="glop"):
+        return APIClient().post(f"/api/gas/calculate/multiperiod/?backend={backend}",
+                                {**self.data, "periods": periods}, format="json")
+
+    def test_hours_without_ramp_match_single_period(self):
+        response = self.post(self.periods)
+        self.assertEqual(response.status_code, 200)
+
+        expected = sum(
+            GasDistributionService.calculate_distribution(
+                {**self.data, "C_pg": C_pg, "V_pg_total": V_pg_total}, backend="glop"
+            )["objective"]
+            for C_pg, V_pg_total in zip(self.periods["C_pg"], self.periods["V_pg_total"])
+        )
+        self.assertAlmostEqual(response.json()["objective"], expected, delta=0.01 * self.T)
+
+    def test_ramp_and_hourly_limits(self):
+        ramp = 1500.0
+        unlimited = self.post(self.periods).json()
+        response = self.post({**self.periods, "ramp": [ramp] * self.data["N"]})
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+
+        schedule = np.array(result["gas_schedule"]).reshape(self.T, self.data["N"])
+        self.assertTrue(np.all(schedule.sum(axis=1) <= np.array(self.periods["V_pg_total"]) + 1e-3 * self.T))
+        self.assertLessEqual(np.abs(np.diff(schedule, axis=0)).max(), ramp + 0.01)
+        self.assertLessEqual(np.abs(schedule[0] - self.data["V_pg_0"]).max(), ramp + 0.01)
+        self.assertLessEqual(result["objective"], unlimited["objective"] + 0.01)
+
+        with self.assertLogs("error_logger", level="ERROR"):
+            response = self.post({**self.periods, "ramp": [ramp] * self.data["N"]}, backend="simplex")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("не подходит", response.json()["error"])
+
+
+class DiscreteSetpointTestCase(SimpleTestCase):
+    """
+    Дискретный расчет: уставки кратны шагу, отключенные печи без расхода ПГ,
+    распределение удовлетворяет ограничениям цеха.
+    """
+
+    def test_step_rounding_and_switched_off_are_feasible(self):
+        data = DefaultInputValues.get_default_values()
+        step, switchable = 1500.0, [j in (1, 3) for j in range(data["N"])]
+        response = APIClient().post("/api/gas/calculate/discrete/",
+                                    {**data, "discrete": {"step": step, "switchable": switchable}}, format="json")
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+
+        gas = np.array(result["gas_distribution"])
+        off = np.array(result["discrete"]["switched_off"], dtype=int) - 1
+        running = np.setdiff1d(np.arange(data["N"]), off)
+        self.assertTrue(off.size and np.all(np.asarray(switchable)[off]))
+        self.assertTrue(np.all(gas[off] == 0.0))
+        np.testing.assert_allclose(gas[running] / step, np.round(gas[running] / step), atol=1e-9)
+
+        program = GasDistributionService._build_linear_program(FurnaceArrays(data))
+        lower = program.lower.copy()
+        lower[off] = 0.0
+        relaxed = LinearProgram(program.objective, lower, program.upper, program.rows, program.row_lower, program.row_upper)
+        self.assertTrue(relaxed.is_feasible(gas))
+        self.assertLessEqual(result["objective"], result["discrete"]["relaxation_objective"] + 0.01)
+        self.assertLessEqual(result["discrete"]["gap"], settings.GAS_MIP_GAP)
+
+
+class NonlinearResponseTestCase(SimpleTestCase):
+    """
+    Расчет по кривым, совпадающим с линейной моделью, дает результат линейного расчета.
+    """
+
+    def test_linear_curves_reproduce_linear_result(self):
+        data = DefaultInputValues.get_default_values()
+        furnaces = FurnaceArrays(data)
+        points = np.stack([furnaces.V_pg_min, furnaces.V_pg_0, furnaces.V_pg_max])
+        production = np.stack([furnaces.iron_production(gas) for gas in points])
+        sulfur = np.stack([furnaces.sulfur_content(gas) for gas in points])
+        curves = [
+            {"furnace": j + 1, "V_pg": points[:, j].tolist(), "P": production[:, j].tolist(), "S": sulfur[:, j].tolist()}
+            for j in range(furnaces.N)
+        ]
+
+        response = APIClient().post("/api/gas/calculate/nonlinear/?backend=glop",
+                                    {**data, "response": {"curves": curves}}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertAlmostEqual(response.json()["objective"], 45047.75, places=2)
+        self.assertAlmostEqual(
+            response.json()["objective"],
+            GasDistributionService.calculate_distribution(data, backend="glop")["objective"],
+            places=2,
+        )
+
+
+class TelemetryTestCase(SimpleTestCase):
+    """
+    Рекомендация команды telemetry доступна веб-процессу через файл GAS_TELEMETRY_FILE.
+    """
+
+    def test_recommendation_is_shared_through_file(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                self.settings(GAS_TELEMETRY_FILE=os.path.join(directory, "telemetry", "recommendation.json")):
+            self.assertEqual(self.client.get("/api/gas/calculate/telemetry/").status_code, 404)
+
+            optimizer = TelemetryOptimizer(DefaultInputValues.get_default_values(), backend="glop")
+            recommendation = optimizer.optimize()
+            optimizer.apply({"furnace": 1, "V_pg_0": 16000.0})
+            optimizer.optimize()
+
+            response = self.client.get("/api/gas/calculate/telemetry/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["version"], recommendation["version"] + 1)
+            self.assertEqual(response.json()["inputs"]["V_pg_0"][0], 16000.0)
+            self.assertEqual(os.listdir(os.path.dirname(settings.GAS_TELEMETRY_FILE)), ["recommendation.json"])
+
+
+class DeadlineTestCase(SimpleTestCase):
+    """
+    Срок расчета: допустимое решение, найденное к сроку, возвращается со статусом FEASIBLE_TIMEOUT,
+    без него - ошибка 504; закрытие соединения клиентом отменяет расчет.
+    Чтобы срок истекал в заданной фазе симплекс-метода, проверка срока перед нужной итерацией
+    ждет его истечения.
+    """
+
+    def setUp(self):
+        self.data = DefaultInputValues.get_default_values()
+
+    @staticmethod
+    def slow_solver(check: int):
+        """Проверка срока, которая перед check-й проверкой ждет истечения срока"""
+        calls = []
+        stopped = Deadline.stopped
+
+        def side_effect(deadline):
+            calls.append(deadline)
+            if len(calls) == check:
+                time.sleep(deadline.remaining())
+            return stopped(deadline)
+        return mock.patch.object(Deadline, "stopped", autospec=True, side_effect=side_effect)
+
+    def test_feasible_incumbent_on_timeout(self):
+        # Первые две проверки - фаза 1, третья - фаза 2 с допустимой точкой
+        with self.slow_solver(check=3):
+            result = GasDistributionService.calculate_distribution(self.data, backend="simplex", deadline=Deadline(0.05))
+
+        self.assertEqual(result["status"], "FEASIBLE_TIMEOUT")
+        self.assertLess(result["objective"], 45047.75)
+        self.assertLessEqual(sum(result["gas_distribution"]), self.data["V_pg_total"] + 1e-6)
+
+    def test_timeout_without_solution_returns_504(self):
+        with self.slow_solver(check=1), self.assertLogs("error_logger", level="ERROR"):
+            response = APIClient().post("/api/gas/calculate/?backend=simplex", {**self.data, "C_pg": 1.01},
+                                        format="json", HTTP_X_CALCULATION_DEADLINE="0.05")
+
+        self.assertEqual(response.status_code, 504)
+        self.assertIn("Срок расчета истек", response.json()["error"])
+
+    def test_client_disconnect_cancels_calculation(self):
+        client, server = socket.socketpair()
+        request = SimpleNamespace(META={"gunicorn.socket": server})
+        deadline = Deadline(10)
+        interrupted = threading.Event()
+        try:
+            with deadline.watch(request), deadline.interrupt(interrupted.set):
+                client.close()
+                self.assertTrue(interrupted.wait(10 * Deadline.POLL_INTERVAL))
+        finally:
+            server.close()
+
+        self.assertTrue(deadline.stopped())
+        self.assertIsInstance(deadline.error(), CalculationCancelledError)
+        with self.assertLogs("error_logger", level="ERROR"), self.assertRaises(CalculationCancelledError):
+            GasDistributionService.calculate_distribution(self.data, backend="simplex", deadline=deadline)
+
+    def test_client_socket_from_wsgi_input(self):
+        client, server = socket.socketpair()
+        stream = server.makefile("rb")
+        deadline = Deadline(10)
+        interrupted = threading.Event()
+        sockets, client_socket = [], Deadline._client_socket
+
+        def watched(request):
+            sockets.append(client_socket(request))
+            return sockets[-1]
+
+        try:
+            with mock.patch.object(Deadline, "_client_socket", side_effect=watched), \
+                    deadline.watch(SimpleNamespace(META={"wsgi.input": stream})), deadline.interrupt(interrupted.set):
+                client.close()
+                self.assertTrue(interrupted.wait(10 * Deadline.POLL_INTERVAL))
+
+            # Проверялась копия дескриптора: она закрыта, сокет сервера остается открытым
+            (copy, owned), = sockets
+            self.assertTrue(owned)
+            self.assertEqual(copy.fileno(), -1)
+            self.assertGreaterEqual(server.fileno(), 0)
+        finally:
+            stream.close()
+            server.close()
+        self.assertIsInstance(deadline.error(), CalculationCancelledError)
+
+    def test_without_client_socket_only_deadline_applies(self):
+        deadline = Deadline(10)
+        with tempfile.TemporaryFile() as file:
+            for stream in (io.BytesIO(b"{}"), file):
+                with mock.patch.object(Deadline, "_socket_warned", False), \
+                        self.assertLogs("base_logger", level="WARNING") as logs, mock.patch("threading.Thread") as thread:
+                    with deadline.watch(SimpleNamespace(META={"wsgi.input": stream})):
+                        pass
+                self.assertIn("Сокет клиента недоступен", logs.output[0])
+                thread.assert_not_called()
+
+        # Предупреждение выводится один раз на процесс
+        with mock.patch.object(Deadline, "_socket_warned", True), mock.patch("server.settings.BASE_LOGGER.warning") as warning:
+            self.assertEqual(Deadline._client_socket(SimpleNamespace(META={})), (None, False))
+        warning.assert_not_called()
+        self.assertFalse(deadline.stopped())
+
+
+class CalculationJobQueueTestCase(TransactionTestCase):
+    """
+    Очередь асинхронных расчетов: лимит пользователя, захват с SKIP LOCKED,
+    повторы с увеличивающейся задержкой и возврат зависших заданий.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user("queue@example.com", "password")
+        self.data = DefaultInputValues.get_default_values()
+
+    def test_user_limit(self):
+        with self.settings(GAS_JOB_USER_LIMIT=2):
+            first = CalculationJobQueue.submit(self.user, self.data)
+            CalculationJobQueue.submit(self.user, self.data)
+            with self.assertRaises(JobLimitError):
+                CalculationJobQueue.submit(self.user, self.data)
+
+            CalculationJob.objects.filter(pk=first.pk).update(status=CalculationJob.Status.DONE)
+            CalculationJobQueue.submit(self.user, self.data)
+
+    def test_submit_with_auto_backend(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post("/api/gas/calculate/jobs/?backend=auto", self.data, format="json")
+        self.assertEqual(response.status_code, 202)
+
+        job = CalculationJob.objects.get(pk=response.json()["id"])
+        self.assertEqual(job.backend, "auto")
+        CalculationJobQueue.run(CalculationJobQueue.claim("worker"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, CalculationJob.Status.DONE)
+        self.assertEqual(round(job.result["objective"], 2), 45047.75)
+
+        response = client.post("/api/gas/calculate/jobs/?backend=unknown", self.data, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    @skipUnless(connection.vendor == "postgresql", "Нужна блокировка строк SELECT ... FOR UPDATE SKIP LOCKED")
+    def test_claim_skips_locked_jobs(self):
+        first = CalculationJobQueue.submit(self.user, self.data)
+        second = CalculationJobQueue.submit(self.user, self.data)
+        locked, release = threading.Event(), threading.Event()
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    CalculationJob.objects.select_for_update().get(pk=first.pk)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            self.assertEqual(CalculationJobQueue.claim("worker-1").pk, second.pk)
+            self.assertIsNone(CalculationJobQueue.claim("worker-1"))
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(CalculationJobQueue.claim("worker-2").pk, first.pk)
+
+    def test_retry_backoff_until_max_attempts(self):
+        job = CalculationJobQueue.submit(self.user, self.data)
+        with self.settings(GAS_JOB_RETRY_DELAY=5), \
+                mock.patch("gas.jobs.CalculationCache.calculate", side_effect=RuntimeError("сбой")), \
+                self.assertLogs("error_logger", level="ERROR"):
+            for attempt in range(1, job.max_attempts + 1):
+                started = timezone.now()
+                CalculationJobQueue.run(CalculationJobQueue.claim("worker"))
+                job.refresh_from_db()
+                self.assertEqual(job.attempts, attempt)
+                if attempt == job.max_attempts:
+                    break
+
+                self.assertEqual(job.status, CalculationJob.Status.PENDING)
+                delay = (job.available_at - started).total_seconds()
+                self.assertAlmostEqual(delay, 5 * 2 ** (attempt - 1), delta=1)
+                self.assertIsNone(CalculationJobQueue.claim("worker"))
+                CalculationJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+
+        self.assertEqual(job.status, CalculationJob.Status.FAILED)
+        self.assertIn(f"Исчерпано попыток: {job.max_attempts}", job.error)
+
+    def test_recover_runs_while_jobs_are_pending(self):
+        with self.settings(GAS_JOB_USER_LIMIT=10, GAS_JOB_RECOVER_INTERVAL=0):
+            stale = CalculationJobQueue.submit(self.user, self.data)
+            CalculationJobQueue.claim("crashed")
+            CalculationJob.objects.filter(pk=stale.pk).update(
+                started_at=timezone.now() - timedelta(seconds=settings.GAS_JOB_TIMEOUT + 1)
+            )
+            expired = CalculationJobQueue.submit(self.user, self.data)
+            CalculationJob.objects.filter(pk=expired.pk).update(expires_at=timezone.now())
+            pending = [CalculationJobQueue.submit(self.user, self.data) for _ in range(3)]
+
+            self.assertEqual(CalculationJobQueue.process("worker", max_jobs=1), 1)
+
+        statuses = dict(CalculationJob.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[stale.pk], CalculationJob.Status.PENDING)
+        self.assertEqual(statuses[expired.pk], CalculationJob.Status.EXPIRED)
+        self.assertEqual([statuses[job.pk] for job in pending],
+                         [CalculationJob.Status.DONE, CalculationJob.Status.PENDING, CalculationJob.Status.PENDING])
+
+    def test_recover_requeues_stale_jobs(self):
+        stale = timezone.now() - timedelta(seconds=1)
+        with self.settings(GAS_JOB_TIMEOUT=0, GAS_JOB_MAX_ATTEMPTS=2):
+            job = CalculationJobQueue.submit(self.user, self.data)
+            CalculationJobQueue.claim("crashed")
+            CalculationJob.objects.filter(pk=job.pk).update(started_at=stale)
+
+            self.assertEqual(CalculationJobQueue.recover()["requeued"], 1)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.error), (CalculationJob.Status.PENDING, "Превышено время выполнения"))
+
+            CalculationJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+            self.assertEqual(CalculationJobQueue.claim("worker").attempts, 2)
+            CalculationJob.objects.filter(pk=job.pk).update(started_at=stale)
+
+            self.assertEqual(CalculationJobQueue.recover()["failed"], 1)
+            job.refresh_from_db()
+            self.assertEqual(job.status, CalculationJob.Status.FAILED)
@@ -1,11 +1,29 @@
 from django.urls import path
-from gas.views import (CalculateAPIView, DefaultInputValuesAPIView,
-                       HistoryAPIView)
+from gas.views import (CalculateAPIView, CalculateBatchAPIView,
+                       CalculateCacheAPIView, CalculateDiscreteAPIView,
+                       CalculateEstimateAPIView, CalculateJobAPIView,
+                       CalculateJobDetailAPIView, CalculateMultiPeriodAPIView,
+                       CalculateNonlinearAPIView, CalculateRobustnessAPIView,
+                       CalculateSweepAPIView, CalculateTelemetryAPIView,
+                       DefaultInputValuesAPIView, HistoryAPIView,
+                       HistoryStatsAPIView)
 
 app_name = 'gas'
 
 urlpatterns = [
     path("calculate/", CalculateAPIView.as_view(), name="calculate"),
+    path("calculate/batch/", CalculateBatchAPIView.as_view(), name="calculate-batch"),
+    path("calculate/multiperiod/", CalculateMultiPeriodAPIView.as_view(), name="calculate-multiperiod"),
+    path("calculate/discrete/", CalculateDiscreteAPIView.as_view(), name="calculate-discrete"),
+    path("calculate/nonlinear/", CalculateNonlinearAPIView.as_view(), name="calculate-nonlinear"),
+    path("calculate/sweep/", CalculateSweepAPIView.as_view(), name="calculate-sweep"),
+    path("calculate/estimate/", CalculateEstimateAPIView.as_view(), name="calculate-estimate"),
+    path("calculate/robustness/", CalculateRobustnessAPIView.as_view(), name="calculate-robustness"),
+    path("calculate/jobs/", CalculateJobAPIView.as_view(), name="calculate-jobs"),
+    path("calculate/jobs/<int:pk>/", CalculateJobDetailAPIView.as_view(), name="calculate-job"),
+    path("calculate/telemetry/", CalculateTelemetryAPIView.as_view(), name="calculate-telemetry"),
+    path("calculate/cache/", CalculateCacheAPIView.as_view(), name="calculate-cache"),
     path("default/", DefaultInputValuesAPIView.as_view(), name="default"),
     path("history/", HistoryAPIView.as_view(), name="history"),
+    path("history/stats/", HistoryStatsAPIView.as_view(), name="history-stats"),
 ]
\ No newline at end of file
@@ -1,15 +1,40 @@
 from django.conf import settings
+from django.http import HttpResponse
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from gas.models import History
-from gas.serializers import (CalculateCreateSerializer,
+from gas.backends import SolverBackendRegistry
+from gas.batch import BatchCalculationService
+from gas.cache import CalculationCache
+from gas.deadline import Deadline, DeadlineExceededError
+from gas.jobs import CalculationJobQueue, JobLimitError
+from gas.memory import MemoryProfiler
+from gas.metrics import Metrics
+from gas.models import CalculationJob, History
+from gas.parsers import NDJSONParser
+from gas.reports import SolverStatsReport
+from gas.serializers import (CalculateBatchSerializer,
+                             CalculateCreateSerializer,
+                             CalculateDiscreteSerializer,
+                             CalculateEstimateSerializer,
+                             CalculateMultiPeriodSerializer,
+                             CalculateNonlinearSerializer,
+                             CalculateRobustnessSerializer,
+                             CalculateSweepSerializer,
+                             CalculationJobSerializer,
                              HistoryCreateSerializer, HistoryDetailSerializer,
-                             HistoryListSerializer)
-from gas.services import DefaultInputValues, GasDistributionService
+                             HistoryListSerializer, HistoryStatsSerializer,
+                             MemoryStatsSerializer)
+from gas.services import (DefaultInputValues, DiscreteDistributionService,
+                          GasDistributionService,
+                          MultiPeriodDistributionService,
+                          NonlinearDistributionService, RobustnessService,
+                          SensitivityEstimateService)
+from gas.telemetry import TelemetryOptimizer
 from rest_framework import status
-from rest_framework.exceptions import NotFound
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
 
@@ -17,45 +42,1133 @@ from rest_framework.views import APIView
 class CalculateAPIView(APIView):
     """
     API метод расчета задачи распределения природного газа в группе доменных печей.
+    Большие группы печей можно передавать потоком application/x-ndjson (gas.parsers.NDJSONParser).
     """
-    
+
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser]
+
+    @swagger_auto_schema(
+        operation_summary="Вызов расчета природного газа",
+        operation_description="API метод расчета задачи распределения природного газа в группе доменных печей",
+        request_body=CalculateCreateSerializer,
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name="backend",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                enum=SolverBackendRegistry.choices(),
+                description="Решатель (по умолчанию из настройки GAS_SOLVER_BACKEND)"
+            ),
+            openapi.Parameter(
+                name="sensitivity",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_BOOLEAN,
+                required=False,
+                description="Добавить анализ чувствительности (расчет встроенным симплекс-методом: backend auto или simplex, не более 200 печей; для большей задачи - ошибка 400)"
+            ),
+            openapi.Parameter(
+                name="X-Calculation-Deadline",
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description="Срок расчета, с (или поле deadline в теле). По умолчанию GAS_DEADLINE_DEFAULT, не более GAS_DEADLINE_MAX. "
+                "Если срок истек, а допустимое решение найдено, оно возвращается со статусом FEASIBLE_TIMEOUT"
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: CalculateCreateSerializer,
+            status.HTTP_504_GATEWAY_TIMEOUT: openapi.Response(
+                description="Срок расчета истек, допустимое решение не найдено",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Оптимальное решение не найдено",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        try:
+            serializer = CalculateCreateSerializer(data=request.data)
+            Metrics.validate(serializer, raise_exception=True)
+
+            deadline = Deadline.from_request(request)
+            with deadline.watch(request):
+                result = CalculationCache.calculate(
+                    serializer.validated_data,
+                    backend=request.query_params.get("backend"),
+                    sensitivity=request.query_params.get("sensitivity", "").lower() in ("1", "true"),
+                    deadline=deadline
+                )
+            serializer = HistoryDetailSerializer(data=result)
+            Metrics.validate(serializer, raise_exception=True)
+
+            result = serializer.validated_data
+            return Response(
+                data=result,
+                status=status.HTTP_200_OK
+            )
+        except DeadlineExceededError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_504_GATEWAY_TIMEOUT
+            )
+        except ValueError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+class CalculateBatchAPIView(APIView):
+    """
+    API метод пакетного расчета сценариев распределения природного газа.
+    """
+
+    @swagger_auto_schema(
+        operation_summary="Пакетный расчет сценариев",
+        operation_description="Проверяет все сценарии и решает корректные параллельно на пуле процессов. "
+        "Результаты возвращаются в порядке сценариев, ошибка сценария не прерывает расчет пакета.",
+        request_body=CalculateBatchSerializer,
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name="backend",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                enum=SolverBackendRegistry.choices(),
+                description="Решатель (по умолчанию из настройки GAS_SOLVER_BACKEND)"
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Результаты по сценариям",
+                examples={
+                    "application/json": {
+                        "results": [
+                            {"index": 0, "result": {"objective": 1000.0, "status": "OPTIMAL"}},
+                            {"index": 1, "error": "<Ошибка>"}
+                        ]
+                    }
+                }
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Некорректный пакет",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        serializer = CalculateBatchSerializer(data=request.data)
+        if not Metrics.validate(serializer):
+            return Response(
+                data={"error": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Неизвестный решатель - ошибка всего пакета, а не каждого сценария
+        backend = request.query_params.get("backend")
+        if backend and backend.lower() != SolverBackendRegistry.AUTO:
+            try:
+                SolverBackendRegistry.get(backend)
+            except ValueError as e:
+                return Response(
+                    data={"error": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # Проверка всех сценариев, к расчету передаются только корректные
+        results, valid = [], []
+        for index, scenario in enumerate(serializer.validated_data["scenarios"]):
+            scenario_serializer = CalculateCreateSerializer(data=scenario)
+            if Metrics.validate(scenario_serializer):
+                results.append({"index": index})
+                valid.append((index, scenario_serializer.validated_data))
+            else:
+                results.append({"index": index, "error": scenario_serializer.errors})
+
+        try:
+            solved = BatchCalculationService.calculate([data for _, data in valid], backend=backend)
+        except ValueError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        for (index, _), item in zip(valid, solved):
+            if "error" in item:
+                results[index]["error"] = item["error"]
+                continue
+
+            result_serializer = HistoryDetailSerializer(data=item["result"])
+            if Metrics.validate(result_serializer):
+                results[index]["result"] = result_serializer.validated_data
+            else:
+                results[index]["error"] = result_serializer.errors
+
+        return Response(
+            data={"results": results},
+            status=status.HTTP_200_OK
+        )
+
+class CalculateMultiPeriodAPIView(APIView):
+    """
+    API метод многопериодного (почасового) расчета распределения природного газа.
+    """
+
+    @swagger_auto_schema(
+        operation_summary="Многопериодный расчет",
+        operation_description="Расчет распределения ПГ на T часов одной линейной задачей: почасовые цены, "
+        "лимиты цеха и границы печей, ограничение изменения расхода печи между часами (ramp). "
+        "Поля однопериодного результата содержат средние за час значения, gas_schedule - график T x N построчно.",
+        request_body=CalculateMultiPeriodSerializer,
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name="backend",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                enum=SolverBackendRegistry.choices(),
+                description="Решатель (по умолчанию из настройки GAS_SOLVER_BACKEND)"
+            ),
+            openapi.Parameter(
+                name="X-Calculation-Deadline",
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description="Срок расчета, с (или поле deadline в теле). По умолчанию GAS_DEADLINE_DEFAULT, не более GAS_DEADLINE_MAX. "
+                "Если срок истек, а допустимое решение найдено, оно возвращается со статусом FEASIBLE_TIMEOUT"
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Почасовой график и итоги по часам",
+                examples={
+                    "application/json": {
+                        "objective": 1081146.0,
+                        "gas_distribution": [10000.0, 11095.54],
+                        "total_gas_consumption": 120000.0,
+                        "total_coke_consumption": 502.55,
+                        "total_iron_production": 1190.1,
+                        "sulfur_content": [0.02315, 0.025],
+                        "status": "OPTIMAL",
+                        "gas_schedule": [10000.0, 11095.54, 10000.0, 11095.54],
+                        "periods": {
+                            "objective": [45047.75, 45047.75],
+                            "total_gas_consumption": [120000.0, 120000.0],
+                            "total_coke_consumption": [502.55, 502.55],
+                            "total_iron_production": [1190.1, 1190.1]
+                        }
+                    }
+                }
+            ),
+            status.HTTP_504_GATEWAY_TIMEOUT: openapi.Response(
+                description="Срок расчета истек, допустимое решение не найдено",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Оптимальное решение не найдено",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        try:
+            serializer = CalculateMultiPeriodSerializer(data=request.data)
+            Metrics.validate(serializer, raise_exception=True)
+            if not serializer.validated_data.get("periods"):
+                raise ValueError("Не заданы почасовые параметры periods")
+
+            deadline = Deadline.from_request(request)
+            with deadline.watch(request):
+                result = MultiPeriodDistributionService.calculate_distribution(
+                    serializer.validated_data,
+                    backend=request.query_params.get("backend"),
+                    deadline=deadline
+                )
+            return Response(
+                data=result,
+                status=status.HTTP_200_OK
+            )
+        except DeadlineExceededError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_504_GATEWAY_TIMEOUT
+            )
+        except ValueError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+class CalculateDiscreteAPIView(APIView):
+    """
+    API метод дискретного расчета распределения природного газа (уставки с шагом, отключаемые печи).
+    """
+
+    @swagger_auto_schema(
+        operation_summary="Дискретный расчет",
+        operation_description="Расчет распределения ПГ с уставками, кратными шагу регулятора, и возможностью "
+        "отключения печей (смешанная целочисленная задача, SCIP). Решение линейной релаксации, округленное до уставок, "
+        "передается решателю как начальное. Расчет останавливается при разрыве оптимальности discrete.gap "
+        "или по лимиту времени discrete.time_limit; в результате - разрыв, оценка и отключенные печи.",
+        request_body=CalculateDiscreteSerializer,
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name="X-Calculation-Deadline",
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description="Срок расчета, с (или поле deadline в теле). По умолчанию GAS_DEADLINE_DEFAULT, не более GAS_DEADLINE_MAX"
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Распределение по дискретным уставкам",
+                examples={
+                    "application/json": {
+                        "objective": 45010.5,
+                        "gas_distribution": [10000.0, 11000.0],
+                        "total_gas_consumption": 120000.0,
+                        "total_coke_consumption": 502.6,
+                        "total_iron_production": 1190.0,
+                        "sulfur_content": [0.02315, 0.0249],
+                        "status": "OPTIMAL",
+                        "discrete": {
+                            "gap": 0.0004,
+                            "bound": 45028.7,
+                            "relaxation_objective": 45047.75,
+                            "warm_start_objective": 44990.1,
+                            "switched_off": []
+                        }
+                    }
+                }
+            ),
+            status.HTTP_504_GATEWAY_TIMEOUT: openapi.Response(
+                description="Срок расчета истек, допустимое решение не найдено",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Допустимые уставки не найдены",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        try:
+            serializer = CalculateDiscreteSerializer(data=request.data)
+            Metrics.validate(serializer, raise_exception=True)
+
+            deadline = Deadline.from_request(request)
+            with deadline.watch(request):
+                result = DiscreteDistributionService.calculate_distribution(
+                    serializer.validated_data,
+                    deadline=deadline
+                )
+            return Response(
+                data=result,
+                status=status.HTTP_200_OK
+            )
+        except DeadlineExceededError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_504_GATEWAY_TIMEOUT
+            )
+        except ValueError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+class CalculateNonlinearAPIView(APIView):
+    """
+    API метод расчета распределения природного газа по нелинейным характеристикам печей.
+    """
+
+    @swagger_auto_schema(
+        operation_summary="Расчет по нелинейным характеристикам печей",
+        operation_description="Расчет распределения ПГ, в котором производство чугуна и содержание серы печей "
+        "заданы кривыми по точкам (response.curves). Кривая производства приближается кусочно-линейной функцией, "
+        "точки излома добавляются около оптимального расхода, пока отклонение от кривой больше response.tolerance. "
+        "Печи без кривой рассчитываются по линейной модели.",
+        request_body=CalculateNonlinearSerializer,
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name="X-Calculation-Deadline",
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description="Срок расчета, с (или поле deadline в теле). По умолчанию GAS_DEADLINE_DEFAULT, не более GAS_DEADLINE_MAX"
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Распределение по нелинейным характеристикам",
+                examples={
+                    "application/json": {
+                        "objective": 45031.2,
+                        "gas_distribution": [10250.0, 11400.0],
+                        "total_gas_consumption": 120000.0,
+                        "total_coke_consumption": 502.1,
+                        "total_iron_production": 1188.4,
+                        "sulfur_content": [0.02301, 0.0248],
+                        "status": "OPTIMAL",
+                        "response": {
+                            "rounds": 4,
+                            "breakpoints": 9,
+                            "samples": 41,
+                            "max_error": 0.0062
+                        }
+                    }
+                }
+            ),
+            status.HTTP_504_GATEWAY_TIMEOUT: openapi.Response(
+                description="Срок расчета истек, допустимое решение не найдено",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Ошибка в кривых или несовместные ограничения",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        try:
+            serializer = CalculateNonlinearSerializer(data=request.data)
+            Metrics.validate(serializer, raise_exception=True)
+
+            deadline = Deadline.from_request(request)
+            with deadline.watch(request):
+                result = NonlinearDistributionService.calculate_distribution(
+                    serializer.validated_data,
+                    deadline=deadline
+                )
+            return Response(
+                data=result,
+                status=status.HTTP_200_OK
+            )
+        except DeadlineExceededError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_504_GATEWAY_TIMEOUT
+            )
+        except ValueError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+class CalculateSweepAPIView(APIView):
+    """
+    API метод параметрического расчета распределения по цене газа или кокса.
+    """
+
+    @swagger_auto_schema(
+        operation_summary="Параметрический расчет по цене",
+        operation_description="Возвращает точки излома кусочно-линейной кривой целевой функции при изменении "
+        "цены C_pg или C_k в заданном диапазоне и распределение ПГ на каждом отрезке между ними. "
+        "Расчет выполняется встроенным симплекс-методом с переходом от базиса к базису.",
+        request_body=CalculateCreateSerializer,
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name="parameter",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=True,
+                enum=["C_pg", "C_k"],
+                description="Изменяемая цена"
+            ),
+            openapi.Parameter(
+                name="start",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_NUMBER,
+                required=True,
+                description="Начало диапазона цены"
+            ),
+            openapi.Parameter(
+                name="end",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_NUMBER,
+                required=True,
+                description="Конец диапазона цены"
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Точки излома и распределения по отрезкам",
+                examples={
+                    "application/json": {
+                        "parameter": "C_pg",
+                        "breakpoints": [0.85],
+                        "segments": [
+                            {"from": 0.1, "to": 0.85, "objective": 52000.0, "objective_to": 47000.0,
+                             "gas_distribution": [20000.0], "status": "OPTIMAL"},
+                            {"from": 0.85, "to": 2.0, "objective": 47000.0, "objective_to": 40000.0,
+                             "gas_distribution": [10000.0], "status": "OPTIMAL"}
+                        ]
+                    }
+                }
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Оптимальное решение не найдено",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        try:
+            params = CalculateSweepSerializer(data=request.query_params)
+            Metrics.validate(params, raise_exception=True)
+
+            serializer = CalculateCreateSerializer(data=request.data)
+            Metrics.validate(serializer, raise_exception=True)
+
+            result = GasDistributionService.sweep_distribution(
+                serializer.validated_data,
+                **params.validated_data
+            )
+            return Response(
+                data=result,
+                status=status.HTTP_200_OK
+            )
+        except ValueError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+class CalculateEstimateAPIView(APIView):
+    """
+    API метод оценки результата при небольших изменениях параметров без вызова решателя.
+    """
+
+    @swagger_auto_schema(
+        operation_summary="Оценка по анализу чувствительности",
+        operation_description="Оценивает целевую функцию и распределение ПГ при изменении лимитов цеха "
+        "(V_pg_total, K_total, P_total) и цен (C_pg, C_k) по анализу чувствительности расчета. "
+        "Источник - расчет из истории (history) или результат /calculate/?sensitivity=true (result). "
+        "Если изменения выходят за диапазоны устойчивости, требуется полный расчет.",
+        request_body=CalculateEstimateSerializer,
+        tags=["Расчет"],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Оценка результата",
+                examples={
+                    "application/json": {
+                        "objective": 45047.75,
+                        "gas_distribution": [10000.0, 11095.54, 20000.0, 10000.0],
+                        "total_gas_consumption": 51095.54,
+                        "status": "ESTIMATE"
+                    }
+                }
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Изменение выходит за диапазон устойчивости или нет анализа чувствительности",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            ),
+            status.HTTP_404_NOT_FOUND: openapi.Response(
+                description="История не была найдена",
+                examples={
+                    "application/json": {
+                        "error": "История не найдена"
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        try:
+            serializer = CalculateEstimateSerializer(data=request.data)
+            Metrics.validate(serializer, raise_exception=True)
+            data = serializer.validated_data
+
+            if "history" in data:
+                history = None
+                if request.user.is_authenticated:
+                    history = History.objects.filter(id=data["history"], user=request.user).first()
+                if not history:
+                    raise NotFound("История не найдена")
+                result = HistoryDetailSerializer(history).data
+            else:
+                result = data["result"]
+
+            return Response(
+                data=SensitivityEstimateService.estimate(result, data["changes"]),
+                status=status.HTTP_200_OK
+            )
+        except NotFound as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except ValueError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except (KeyError, TypeError):
+            return Response(
+                data={"error": "Некорректный анализ чувствительности"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+class CalculateRobustnessAPIView(APIView):
+    """
+    API метод оценки устойчивости распределения ПГ к неопределенности коэффициентов влияния.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Оценка устойчивости распределения",
+        operation_description="Проверяет распределение ПГ на выборках коэффициентов влияния (метод Монте-Карло): "
+        "распределения производства чугуна, расхода кокса и содержания серы по печам "
+        "и вероятности нарушения ограничений.",
+        request_body=CalculateRobustnessSerializer,
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name='Authorization',
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description='Bearer токен. Пример: "Bearer eyJhbGciOi..."',
+                default="Bearer "
+            ),
+            openapi.Parameter(
+                name="X-Calculation-Deadline",
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_NUMBER,
+                required=False,
+                description="Срок расчета, с (или поле deadline в теле). По умолчанию GAS_DEADLINE_DEFAULT, не более GAS_DEADLINE_MAX"
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Статистики по выборкам",
+                examples={
+                    "application/json": {
+                        "samples": 100000,
+                        "iron_production": {"mean": 1190.1, "std": 1.71, "min": 1182.3, "max": 1197.5,
+                                            "p5": 1187.3, "p50": 1190.1, "p95": 1192.9, "violation_probability": 0.0},
+                        "coke_consumption": {"mean": 502.55, "std": 0.0, "min": 502.55, "max": 502.55,
+                                             "p5": 502.55, "p50": 502.55, "p95": 502.55, "violation_probability": 0.0},
+                        "sulfur_content": {"mean": [0.02315], "std": [0.00096], "min": [0.0185], "max": [0.0279],
+                                           "violation_probability": [0.027]},
+                        "any_violation_probability": 0.51
+                    }
+                }
+            ),
+            status.HTTP_504_GATEWAY_TIMEOUT: openapi.Response(
+                description="Срок расчета истек",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            ),
+            status.HTTP_400_BAD_REQUEST: openapi.Response(
+                description="Ошибка оценки",
+                examples={
+                    "application/json": {
+                        "error": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        try:
+            serializer = CalculateRobustnessSerializer(data=request.data)
+            Metrics.validate(serializer, raise_exception=True)
+            data = serializer.validated_data
+
+            deadline = Deadline.from_request(request)
+            with deadline.watch(request):
+                result = RobustnessService.evaluate(
+                    data["calculate"],
+                    data["gas_distribution"],
+                    data["uncertainty"],
+                    samples=data["samples"],
+                    seed=data.get("seed"),
+                    deadline=deadline
+                )
+            return Response(
+                data=result,
+                status=status.HTTP_200_OK
+            )
+        except DeadlineExceededError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_504_GATEWAY_TIMEOUT
+            )
+        except ValueError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+class CalculateCacheAPIView(APIView):
+    """
+    API метод статистики кэша результатов расчета.
+    """
+
+    permission_classes = [IsAdminUser]
+
     @swagger_auto_schema(
-        operation_summary="Вызов расчета природного газа",
-        operation_description="API метод расчета задачи распределения природного газа в группе доменных печей",
+        operation_summary="Статистика кэша расчетов",
+        operation_description="Число попаданий и промахов кэша результатов расчета, заполненность и настройки",
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name='Authorization',
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description='Bearer токен. Пример: "Bearer eyJhbGciOi..."',
+                default="Bearer "
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Статистика кэша",
+                examples={
+                    "application/json": {
+                        "hits": 120,
+                        "misses": 30,
+                        "entries": 30,
+                        "backend": "memory",
+                        "max_entries": 1024,
+                        "ttl": 600,
+                        "hit_rate": 0.8
+                    }
+                }
+            )
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(
+            data=CalculationCache.stats(),
+            status=status.HTTP_200_OK
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Очистка кэша расчетов",
+        operation_description="Очищает кэш в памяти процесса и сбрасывает счетчики. "
+        "Записи общего кэша Django удаляются по истечении времени жизни.",
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name='Authorization',
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description='Bearer токен. Пример: "Bearer eyJhbGciOi..."',
+                default="Bearer "
+            )
+        ],
+        responses={
+            status.HTTP_204_NO_CONTENT: openapi.Response(
+                description="Кэш очищен"
+            )
+        }
+    )
+    def delete(self, request, *args, **kwargs):
+        CalculationCache.clear()
+        return Response(
+            status=status.HTTP_204_NO_CONTENT
+        )
+
+class CalculateJobAPIView(APIView):
+    """
+    API метод асинхронного расчета: задание ставится в очередь и выполняется обработчиком
+    (manage.py calculation_worker), статус и результат - по CalculateJobDetailAPIView.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser]
+
+    @swagger_auto_schema(
+        operation_summary="Постановка расчета в очередь",
+        operation_description="Проверяет входные данные и ставит расчет в очередь. Возвращает номер задания сразу, "
+        "не дожидаясь расчета. Число незавершенных заданий пользователя ограничено настройкой GAS_JOB_USER_LIMIT.",
         request_body=CalculateCreateSerializer,
         tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name='Authorization',
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description='Bearer токен. Пример: "Bearer eyJhbGciOi..."',
+                default="Bearer "
+            ),
+            openapi.Parameter(
+                name="backend",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                enum=SolverBackendRegistry.choices(),
+                description="Решатель (по умолчанию из настройки GAS_SOLVER_BACKEND)"
+            ),
+            openapi.Parameter(
+                name="sensitivity",
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_BOOLEAN,
+                required=False,
+                description="Добавить анализ чувствительности (расчет встроенным симплекс-методом: backend auto или simplex, не более 200 печей; для большей задачи - ошибка 400)"
+            )
+        ],
         responses={
-            status.HTTP_200_OK: CalculateCreateSerializer,
+            status.HTTP_202_ACCEPTED: CalculationJobSerializer,
             status.HTTP_400_BAD_REQUEST: openapi.Response(
-                description="Оптимальное решение не найдено",
+                description="Ошибка во входных данных",
                 examples={
                     "application/json": {
                         "error": "<Ошибка>"
                     }
                 }
+            ),
+            status.HTTP_429_TOO_MANY_REQUESTS: openapi.Response(
+                description="Превышен лимит одновременных заданий",
+                examples={
+                    "application/json": {
+                        "error": "Превышен лимит одновременных заданий: 5. Дождитесь завершения текущих расчетов"
+                    }
+                }
             )
         }
     )
     def post(self, request):
         try:
             serializer = CalculateCreateSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
+            Metrics.validate(serializer, raise_exception=True)
 
-            result = GasDistributionService.calculate_distribution(serializer.validated_data)
-            serializer = HistoryDetailSerializer(data=result)
-            serializer.is_valid(raise_exception=True)
+            # Неизвестный решатель - ошибка при постановке задания, а не при расчете
+            backend = request.query_params.get("backend")
+            if backend and backend.lower() != SolverBackendRegistry.AUTO:
+                SolverBackendRegistry.get(backend)
 
-            result = serializer.validated_data
+            job = CalculationJobQueue.submit(
+                request.user,
+                serializer.validated_data,
+                backend=backend,
+                sensitivity=request.query_params.get("sensitivity", "").lower() in ("1", "true")
+            )
             return Response(
-                data=result,
-                status=status.HTTP_200_OK
+                data=CalculationJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
+            )
+        except JobLimitError as e:
+            return Response(
+                data={"error": str(e)},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
             )
         except ValueError as e:
             return Response(
                 data={"error": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
+class CalculateJobDetailAPIView(APIView):
+    """
+    API метод статуса и результата задания асинхронного расчета.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Статус задания расчета",
+        operation_description="Статус задания (PENDING, RUNNING, DONE, FAILED, EXPIRED), число попыток, "
+        "результат расчета после завершения или сообщение об ошибке",
+        tags=["Расчет"],
+        manual_parameters=[
+            openapi.Parameter(
+                name='Authorization',
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description='Bearer токен. Пример: "Bearer eyJhbGciOi..."',
+                default="Bearer "
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: CalculationJobSerializer,
+            status.HTTP_404_NOT_FOUND: openapi.Response(
+                description="Задание не найдено",
+                examples={
+                    "application/json": {
+                        "error": "Задание не найдено"
+                    }
+                }
+            )
+        }
+    )
+    def get(self, request, pk, *args, **kwargs):
+        job = CalculationJob.objects.filter(pk=pk, user=request.user).first()
+        if job is None:
+            return Response(
+                data={"error": "Задание не найдено"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(
+            data=CalculationJobSerializer(job).data,
+            status=status.HTTP_200_OK
+        )
+
+class CalculateTelemetryAPIView(APIView):
+    """
+    API метод получения последней рекомендации, рассчитанной по потоку измерений (manage.py telemetry).
+    """
+
+    @swagger_auto_schema(
+        operation_summary="Рекомендация по потоку измерений",
+        operation_description="Последнее распределение ПГ, рассчитанное командой telemetry по текущим измерениям печей. "
+        "Пересчет выполняется только при существенном изменении измерений (GAS_TELEMETRY_THRESHOLD), "
+        "поэтому опрашивать этот метод дешевле, чем /calculate/. Поле error - ошибка последнего пересчета "
+        "(result при этом - предыдущая рекомендация).",
+        tags=["Расчет"],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Последняя рекомендация",
+                examples={
+                    "application/json": {
+                        "version": 42,
+                        "updated_at": "2025-01-01T12:00:00+00:00",
+                        "measurements": 1530,
+                        "solve_time_ms": 3.1,
+                        "inputs": {
+                            "V_pg_0": [12150.0, 11000.0],
+                            "K_0": [60.7, 61.1],
+                            "P_0": [150.2, 148.9],
+                            "S_0": [0.0231, 0.0249]
+                        },
+                        "result": {
+                            "objective": 45047.75,
+                            "gas_distribution": [10000.0, 11000.0],
+                            "total_gas_consumption": 120000.0,
+                            "total_coke_consumption": 502.6,
+                            "total_iron_production": 1190.0,
+                            "sulfur_content": [0.02315, 0.0249],
+                            "status": "OPTIMAL"
+                        }
+                    }
+                }
+            ),
+            status.HTTP_404_NOT_FOUND: openapi.Response(
+                description="Рекомендация еще не рассчитана",
+                examples={
+                    "application/json": {
+                        "detail": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        recommendation = TelemetryOptimizer.latest()
+        if recommendation is None:
+            raise NotFound("Рекомендация по измерениям еще не рассчитана: запустите manage.py telemetry")
+        return Response(
+            data=recommendation,
+            status=status.HTTP_200_OK
+        )
+
+class MetricsAPIView(APIView):
+    """
+    API метод выгрузки замеров этапов обработки запросов в текстовом формате Prometheus.
+    """
+
+    @swagger_auto_schema(
+        operation_summary="Замеры этапов запросов",
+        operation_description="Гистограммы длительности запросов (gas_request_duration_seconds) и этапов их обработки "
+        "(gas_request_phase_seconds: validate, build, solve, prepare, db, render) по методам API, в формате Prometheus. "
+        "При нескольких процессах сервера суммируются по всем процессам (PROMETHEUS_MULTIPROC_DIR). "
+        "При GAS_SERVER_TIMING те же этапы текущего запроса возвращаются в заголовке Server-Timing. "
+        "Отключается настройкой GAS_METRICS.",
+        tags=["Замеры"],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Замеры в формате Prometheus (text/plain)",
+                examples={
+                    "text/plain": 'gas_request_phase_seconds_count{endpoint="gas:calculate",method="POST",phase="solve"} 42'
+                }
+            ),
+            status.HTTP_404_NOT_FOUND: openapi.Response(
+                description="Замеры отключены",
+                examples={
+                    "application/json": {
+                        "detail": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        if not Metrics.enabled():
+            raise NotFound("Замеры отключены (GAS_METRICS)")
+        return HttpResponse(
+            Metrics.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+            status=status.HTTP_200_OK
+        )
+
+class MemoryProfileAPIView(APIView):
+    """
+    API метод статистики выборочного замера памяти запросов (tracemalloc).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="Память запросов",
+        operation_description="Показатели памяти замеренных запросов по методам API: наибольший объем выделенной "
+        "памяти Python (peak), объем, не освобожденный к концу запроса (retained), прирост RSS процесса (в нем видна "
+        "память OR-Tools) и число запросов сверх GAS_MEMORY_BUDGET; места выделения неосвобожденной памяти по объему. "
+        "Замеряется доля GAS_MEMORY_RATE запросов, статистика своя у каждого процесса сервера. Объемы в байтах.",
+        tags=["Замеры"],
+        query_serializer=MemoryStatsSerializer,
+        manual_parameters=[
+            openapi.Parameter(
+                name='Authorization',
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description='Bearer токен. Пример: "Bearer eyJhbGciOi..."',
+                default="Bearer "
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Статистика памяти запросов",
+                examples={
+                    "application/json": {
+                        "rate": 0.01,
+                        "budget": 268435456,
+                        "frames": 5,
+                        "rss": 412516352,
+                        "samples": 120,
+                        "skipped": 3,
+                        "endpoints": [
+                            {
+                                "endpoint": "gas:calculate",
+                                "method": "POST",
+                                "samples": 80,
+                                "peak_avg": 1843200,
+                                "peak_max": 96468992,
+                                "retained_avg": 20480,
+                                "rss_delta_avg": 53248,
+                                "over_budget": 0
+                            }
+                        ],
+                        "sites": [
+                            {
+                                "traceback": ["gas/cache.py:112"],
+                                "size": 409600,
+                                "count": 240,
+                                "requests": 80
+                            }
+                        ]
+                    }
+                }
+            ),
+            status.HTTP_404_NOT_FOUND: openapi.Response(
+                description="Замер памяти отключен",
+                examples={
+                    "application/json": {
+                        "detail": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        if not MemoryProfiler.enabled():
+            raise NotFound("Замер памяти отключен (GAS_MEMORY_RATE)")
+        params = MemoryStatsSerializer(data=request.query_params)
+        Metrics.validate(params, raise_exception=True)
+        return Response(
+            data=MemoryProfiler.stats(limit=params.validated_data["limit"]),
+            status=status.HTTP_200_OK
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Сброс статистики памяти запросов",
+        operation_description="Сбрасывает статистику замера памяти текущего процесса.",
+        tags=["Замеры"],
+        manual_parameters=[
+            openapi.Parameter(
+                name='Authorization',
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description='Bearer токен. Пример: "Bearer eyJhbGciOi..."',
+                default="Bearer "
+            )
+        ],
+        responses={
+            status.HTTP_204_NO_CONTENT: openapi.Response(
+                description="Статистика сброшена"
+            )
+        }
+    )
+    def delete(self, request, *args, **kwargs):
+        MemoryProfiler.clear()
+        return Response(
+            status=status.HTTP_204_NO_CONTENT
+        )
+
 class DefaultInputValuesAPIView(APIView):
     """
     API метод получения входных значений по умолчанию
@@ -81,7 +1194,7 @@ class DefaultInputValuesAPIView(APIView):
         try:
             values = DefaultInputValues.get_default_values()
             serializer = CalculateCreateSerializer(data=values)
-            serializer.is_valid(raise_exception=True)
+            Metrics.validate(serializer, raise_exception=True)
 
             result = serializer.validated_data
             return Response(
@@ -206,7 +1319,7 @@ class HistoryAPIView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = HistoryCreateSerializer(data=request.data, context={"request": request})
         try:
-            if not serializer.is_valid():
+            if not Metrics.validate(serializer):
                 return Response(
                     data={"error": serializer.errors},
                     status=status.HTTP_400_BAD_REQUEST
@@ -285,4 +1398,83 @@ class HistoryAPIView(APIView):
             return Response(
                 {"error": "Произошла ошибка при удалении истории"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )   
\ No newline at end of file
+            )   
+
+class HistoryStatsAPIView(APIView):
+    """
+    API метод отчета о производительности расчетов по истории.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Производительность расчетов",
+        operation_description="Процентили времени решателя и общего времени расчета (p50, p90, p99, мс), среднее "
+        "число итераций и переменных модели по количеству печей N и решателю, доля ответов из кэша. "
+        "Строится по показателям, сохраненным в истории вместе с расчетами; ответы из кэша во времени не учитываются. "
+        "scope=all - отчет по всем пользователям, доступен только администратору.",
+        tags=['История расчетов'],
+        query_serializer=HistoryStatsSerializer,
+        manual_parameters=[
+            openapi.Parameter(
+                name='Authorization',
+                in_=openapi.IN_HEADER,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description='Bearer токен. Пример: "Bearer eyJhbGciOi..."',
+                default="Bearer "
+            )
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Отчет о производительности",
+                examples={
+                    "application/json": {
+                        "scope": "user",
+                        "days": 30,
+                        "calculations": 152,
+                        "cache_hit_rate": 0.21,
+                        "groups": [
+                            {
+                                "N": 8,
+                                "backend": "clp",
+                                "count": 120,
+                                "iterations": 3.4,
+                                "variables": 8.0,
+                                "solve_time_ms_p50": 0.41,
+                                "wall_time_ms_p50": 1.93,
+                                "solve_time_ms_p90": 0.77,
+                                "wall_time_ms_p90": 2.88,
+                                "solve_time_ms_p99": 2.1,
+                                "wall_time_ms_p99": 6.02
+                            }
+                        ]
+                    }
+                }
+            ),
+            status.HTTP_403_FORBIDDEN: openapi.Response(
+                description="Отчет по всем пользователям доступен только администратору",
+                examples={
+                    "application/json": {
+                        "detail": "<Ошибка>"
+                    }
+                }
+            )
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        params = HistoryStatsSerializer(data=request.query_params)
+        Metrics.validate(params, raise_exception=True)
+
+        scope = params.validated_data["scope"]
+        if scope == "all" and not request.user.is_staff:
+            raise PermissionDenied("Отчет по всем пользователям доступен только администратору")
+
+        report = SolverStatsReport.build(
+            user=request.user if scope == "user" else None,
+            days=params.validated_data.get("days")
+        )
+        return Response(
+            data=report,
+            status=status.HTTP_200_OK
+        )
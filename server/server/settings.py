@@ -27,6 +27,51 @@ env = environ.Env(
     DB_HOST=(str),
     DB_PORT=(int),
     CLIENT_URLS=(list),
+    GAS_MAX_FURNACES=(int, 20000),
+    GAS_SOLVER_BACKEND=(str, "auto"),
+    GAS_SOLVER_FALLBACK=(str, "scip"),
+    GAS_CACHE_BACKEND=(str, "memory"),
+    GAS_CACHE_ALIAS=(str, "default"),
+    GAS_CACHE_MAX_ENTRIES=(int, 1024),
+    GAS_CACHE_TTL=(int, 600),
+    GAS_CACHE_FLOAT_DIGITS=(int, 10),
+    GAS_BATCH_WORKERS=(int, 2),
+    GAS_BATCH_MAX_SCENARIOS=(int, 1000),
+    GAS_BATCH_MIN_PARALLEL=(int, 4),
+    GAS_ROBUSTNESS_MAX_SAMPLES=(int, 1000000),
+    GAS_ROBUSTNESS_MAX_ELEMENTS=(int, 20000000),
+    GAS_MULTIPERIOD_MAX_PERIODS=(int, 168),
+    GAS_SOLVER_TEMPLATES=(int, 16),
+    GAS_PRESOLVE=(bool, True),
+    GAS_MIP_GAP=(float, 0.001),
+    GAS_MIP_TIME_LIMIT=(float, 10.0),
+    GAS_RESPONSE_TOL=(float, 0.01),
+    GAS_RESPONSE_MAX_ROUNDS=(int, 30),
+    GAS_DEADLINE_DEFAULT=(float, 30.0),
+    GAS_DEADLINE_MAX=(float, 120.0),
+    GAS_SOLVER_POOL_ADDRESS=(str, ""),
+    GAS_SOLVER_POOL_WORKERS=(int, 0),
+    GAS_TELEMETRY_THRESHOLD=(float, 0.005),
+    GAS_TELEMETRY_DEBOUNCE=(float, 2.0),
+    GAS_TELEMETRY_MAX_DELAY=(float, 10.0),
+    GAS_TELEMETRY_BACKEND=(str, "clp"),
+    GAS_TELEMETRY_FILE=(str, ""),
+    GAS_METRICS=(bool, True),
+    GAS_SERVER_TIMING=(bool, False),
+    GAS_CAPTURE_RATE=(float, 0.0),
+    GAS_CAPTURE_FILE=(str, ""),
+    GAS_CAPTURE_MAX_BYTES=(int, 50 * 1024 * 1024),
+    GAS_CAPTURE_BACKUPS=(int, 5),
+    GAS_MEMORY_RATE=(float, 0.0),
+    GAS_MEMORY_BUDGET=(int, 0),
+    GAS_MEMORY_FRAMES=(int, 5),
+    GAS_JOB_USER_LIMIT=(int, 5),
+    GAS_JOB_MAX_ATTEMPTS=(int, 3),
+    GAS_JOB_RETRY_DELAY=(int, 5),
+    GAS_JOB_TIMEOUT=(int, 600),
+    GAS_JOB_TTL=(int, 3600),
+    GAS_JOB_RESULT_TTL=(int, 86400),
+    GAS_JOB_RECOVER_INTERVAL=(int, 30),
 )
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -69,6 +114,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'gas.middleware.TrafficCaptureMiddleware',
+    'gas.middleware.MetricsMiddleware',
+    'gas.middleware.MemoryProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -123,6 +171,14 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -279,6 +335,76 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
 }
 
+# РЕШАТЕЛЬ
+GAS_MAX_FURNACES = env("GAS_MAX_FURNACES")  # Максимальное количество печей в одном расчете
+GAS_SOLVER_BACKEND = env("GAS_SOLVER_BACKEND")  # auto, simplex, glop, pdlp, scip, clp
+GAS_SOLVER_FALLBACK = env("GAS_SOLVER_FALLBACK")  # Решатель при сбое встроенного движка
+GAS_SOLVER_CALIBRATION_FILE = os.path.join(BASE_DIR, "solver_calibration.json")  # Таблица калибровки для режима auto
+GAS_SOLVER_TEMPLATES = env("GAS_SOLVER_TEMPLATES")  # Шаблонов моделей pywraplp на поток (по структуре задачи)
+GAS_PRESOLVE = env("GAS_PRESOLVE")  # Предварительная обработка задачи (ужесточение границ, исключение печей, масштабирование)
+GAS_MIP_GAP = env("GAS_MIP_GAP")  # Относительный разрыв оптимальности дискретного расчета
+GAS_MIP_TIME_LIMIT = env("GAS_MIP_TIME_LIMIT")  # Лимит времени дискретного расчета, с
+GAS_RESPONSE_TOL = env("GAS_RESPONSE_TOL")  # Допустимое отклонение кусочно-линейной характеристики печи от кривой, т/ч
+GAS_RESPONSE_MAX_ROUNDS = env("GAS_RESPONSE_MAX_ROUNDS")  # Наибольшее число уточнений точек излома
+
+# СРОК РАСЧЕТА
+GAS_DEADLINE_DEFAULT = env("GAS_DEADLINE_DEFAULT")  # Срок расчета по умолчанию, с (заголовок X-Calculation-Deadline или поле deadline)
+GAS_DEADLINE_MAX = env("GAS_DEADLINE_MAX")  # Максимальный срок расчета, с
+
+# ПУЛ РЕШАТЕЛЕЙ
+GAS_SOLVER_POOL_ADDRESS = env("GAS_SOLVER_POOL_ADDRESS")  # Unix-сокет или host:port пула (manage.py solver_pool), пусто - расчет в веб-процессе
+GAS_SOLVER_POOL_WORKERS = env("GAS_SOLVER_POOL_WORKERS")  # Число процессов пула, 0 - по числу ядер
+
+# ПОТОК ИЗМЕРЕНИЙ
+GAS_TELEMETRY_THRESHOLD = env("GAS_TELEMETRY_THRESHOLD")  # Относительное изменение входных данных, при котором нужен пересчет
+GAS_TELEMETRY_DEBOUNCE = env("GAS_TELEMETRY_DEBOUNCE")  # Пересчет после стольких секунд без существенных изменений
+GAS_TELEMETRY_MAX_DELAY = env("GAS_TELEMETRY_MAX_DELAY")  # Наибольшая задержка пересчета после первого изменения, с
+GAS_TELEMETRY_BACKEND = env("GAS_TELEMETRY_BACKEND")  # Решатель пересчета (clp продолжает с базиса предыдущего расчета)
+GAS_TELEMETRY_FILE = env("GAS_TELEMETRY_FILE") or os.path.join(BASE_DIR, "telemetry", "recommendation.json")  # Файл последней рекомендации, общий для команды и веб-процессов
+
+# ЗАМЕРЫ
+GAS_METRICS = env("GAS_METRICS")  # Замер этапов запросов: гистограммы GET /metrics (несколько процессов - PROMETHEUS_MULTIPROC_DIR)
+GAS_SERVER_TIMING = env("GAS_SERVER_TIMING")  # Заголовок Server-Timing с длительностями этапов в каждом ответе (виден любому клиенту)
+
+# ЗАПИСЬ ЗАПРОСОВ
+GAS_CAPTURE_RATE = env("GAS_CAPTURE_RATE")  # Доля записываемых запросов /api/gas/calculate/ (0 - запись выключена)
+GAS_CAPTURE_FILE = env("GAS_CAPTURE_FILE") or os.path.join(BASE_DIR, "capture", "calculate.ndjson")  # Файл записи (NDJSON)
+GAS_CAPTURE_MAX_BYTES = env("GAS_CAPTURE_MAX_BYTES")  # Размер файла записи, после которого он ротируется, байт
+GAS_CAPTURE_BACKUPS = env("GAS_CAPTURE_BACKUPS")  # Число хранимых предыдущих файлов записи
+
+# ЗАМЕР ПАМЯТИ
+GAS_MEMORY_RATE = env("GAS_MEMORY_RATE")  # Доля запросов с замером памяти через tracemalloc (0 - замер выключен)
+GAS_MEMORY_BUDGET = env("GAS_MEMORY_BUDGET")  # Бюджет памяти запроса, байт: запросы сверх него пишутся в журнал (0 - без бюджета)
+GAS_MEMORY_FRAMES = env("GAS_MEMORY_FRAMES")  # Глубина стека мест выделения памяти
+
+# КЭШ РАСЧЕТОВ
+GAS_CACHE_BACKEND = env("GAS_CACHE_BACKEND")  # memory - в памяти процесса, django - общий кэш CACHES, off - отключен
+GAS_CACHE_ALIAS = env("GAS_CACHE_ALIAS")  # Алиас кэша Django для режима django
+GAS_CACHE_MAX_ENTRIES = env("GAS_CACHE_MAX_ENTRIES")  # Максимальное число записей (LRU) для режима memory
+GAS_CACHE_TTL = env("GAS_CACHE_TTL")  # Время жизни записи, с
+GAS_CACHE_FLOAT_DIGITS = env("GAS_CACHE_FLOAT_DIGITS")  # Значащих цифр при округлении входных данных для ключа
+
+# ПАКЕТНЫЙ РАСЧЕТ
+GAS_BATCH_WORKERS = env("GAS_BATCH_WORKERS")  # Число процессов пула в каждом веб-процессе, 0 - по числу ядер
+GAS_BATCH_MAX_SCENARIOS = env("GAS_BATCH_MAX_SCENARIOS")  # Максимум сценариев в одном запросе
+GAS_BATCH_MIN_PARALLEL = env("GAS_BATCH_MIN_PARALLEL")  # Меньшие пакеты решаются в текущем процессе
+
+# ОЦЕНКА УСТОЙЧИВОСТИ
+GAS_ROBUSTNESS_MAX_SAMPLES = env("GAS_ROBUSTNESS_MAX_SAMPLES")  # Максимум выборок коэффициентов в одном запросе
+GAS_ROBUSTNESS_MAX_ELEMENTS = env("GAS_ROBUSTNESS_MAX_ELEMENTS")  # Максимум выборок x печей в одном запросе (объем расчета)
+
+# МНОГОПЕРИОДНЫЙ РАСЧЕТ
+GAS_MULTIPERIOD_MAX_PERIODS = env("GAS_MULTIPERIOD_MAX_PERIODS")  # Максимум часов в горизонте расчета
+
+# АСИНХРОННЫЕ РАСЧЕТЫ
+GAS_JOB_USER_LIMIT = env("GAS_JOB_USER_LIMIT")  # Максимум незавершенных заданий одного пользователя
+GAS_JOB_MAX_ATTEMPTS = env("GAS_JOB_MAX_ATTEMPTS")  # Максимум попыток выполнения задания
+GAS_JOB_RETRY_DELAY = env("GAS_JOB_RETRY_DELAY")  # Задержка перед первым повтором, с (далее удваивается)
+GAS_JOB_TIMEOUT = env("GAS_JOB_TIMEOUT")  # Через сколько секунд выполняющееся задание считается зависшим
+GAS_JOB_TTL = env("GAS_JOB_TTL")  # Срок ожидания задания в очереди, с
+GAS_JOB_RESULT_TTL = env("GAS_JOB_RESULT_TTL")  # Срок хранения завершенных заданий, с
+GAS_JOB_RECOVER_INTERVAL = env("GAS_JOB_RECOVER_INTERVAL")  # Период обслуживания очереди обработчиком (recover), с
+
 # USER
 AUTH_USER_MODEL = "user.User"
 
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import include, path
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
+from gas.views import MemoryProfileAPIView, MetricsAPIView
 from rest_framework import permissions
 
 schema_view = get_schema_view(
@@ -38,6 +39,9 @@ urlpatterns = [
     # APPS
     path("api/gas/", include("gas.urls", namespace="gas")),
     path("api/user/", include("user.urls", namespace="user")),
+    # ЗАМЕРЫ
+    path("metrics", MetricsAPIView.as_view(), name="metrics"),
+    path("metrics/memory/", MemoryProfileAPIView.as_view(), name="metrics-memory"),
     # SWAGGER
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('created_at', models.DateField(auto_now_add=True, verbose_name='Дата создания')),
+                ('email', models.EmailField(max_length=255, unique=True, verbose_name='Email адрес')),
+                ('first_name', models.CharField(max_length=64, verbose_name='Имя')),
+                ('last_name', models.CharField(max_length=64, verbose_name='Фамилия')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активный')),
+                ('is_staff', models.BooleanField(default=False, verbose_name='Сотрудник')),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -32,6 +32,6 @@ class CookieServices:
         """Удалить refresh-токен из cookies (для выхода из системы)."""
         response.delete_cookie(
             key=self.COOKIE_NAME,
-            path='/api/auth/',
+            path='/api/user/',
             domain=settings.SESSION_COOKIE_DOMAIN if hasattr(settings, 'SESSION_COOKIE_DOMAIN') else None,
         )
\ No newline at end of file
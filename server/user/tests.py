@@ -1,3 +1,29 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
+from user.models import User
 
-# Create your tests here.
+
+class LogoutTestCase(TestCase):
+    """
+    Выход из системы: refresh-токен заносится в blacklist, cookie удаляется
+    в ответе по тому же пути, по которому установлена.
+    """
+
+    def test_logout_deletes_refresh_cookie(self):
+        credentials = {"email": "user@example.com", "password": "secret-password"}
+        User.objects.create_user(**credentials, first_name="Иван", last_name="Иванов")
+        client = APIClient()
+
+        login = client.post("/api/user/login/", credentials, format="json")
+        self.assertEqual(login.status_code, 200)
+        refresh = login.cookies["refresh_token"]
+        self.assertEqual(refresh["path"], "/api/user/")
+
+        response = client.post("/api/user/logout/")
+        self.assertEqual(response.status_code, 204)
+        deleted = response.cookies["refresh_token"]
+        self.assertEqual((deleted.value, deleted["path"], deleted["max-age"]), ("", "/api/user/", 0))
+
+        # Токен из удаленной cookie больше не обновляет access-токен
+        client.cookies["refresh_token"] = refresh.value
+        self.assertEqual(client.post("/api/user/token/refresh/").status_code, 401)
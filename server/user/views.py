@@ -1,6 +1,7 @@
 from django.conf import settings
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
+from gas.metrics import Metrics
 from rest_framework import status
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import IsAuthenticated
@@ -88,8 +89,9 @@ class LoginAPIView(TokenObtainPairView):
     )
     def post(self, request, *args, **kwargs):
         try:
-            # Пробуем получить токены через родительский класс
-            response = super().post(request, *args, **kwargs)
+            # Пробуем получить токены через родительский класс (проверка учетных данных)
+            with Metrics.phase("validate"):
+                response = super().post(request, *args, **kwargs)
 
             custom_response = Response(
                 data={"access": response.data["access"]},
@@ -266,7 +268,7 @@ class RegisterAPIView(APIView):
     def post(self, request, *args, **kwargs):
         serializer = UserCreateSerializer(data=request.data)
         
-        if not serializer.is_valid():
+        if not Metrics.validate(serializer):
             return Response(
                 data={"error": serializer.errors},
                 status=status.HTTP_400_BAD_REQUEST
@@ -327,16 +329,16 @@ class LogoutAPIView(APIView):
         try:
             cookie_service = CookieServices()
 
-            refresh_token = cookie_service.get(request)
-            if refresh_token:
-                token = RefreshToken(refresh_token)
-                token.blacklist()   # Добавляем токен в blacklist
-                cookie_service.delete(request)
-            
             response = Response(
                 data={"detail": "Успешный выход из системы"},
                 status=status.HTTP_204_NO_CONTENT
             )
+
+            refresh_token = cookie_service.get(request)
+            if refresh_token:
+                token = RefreshToken(refresh_token)
+                token.blacklist()   # Добавляем токен в blacklist
+                cookie_service.delete(response)
             return response
         except TokenError:
             return Response(